@@ -6,16 +6,22 @@ from pathlib import Path
 import sqlite3
 from datetime import datetime
 import json
+import time
+from contextvars import ContextVar
 
 # Add parent directory to path for imports
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
 from langchain.agents import create_react_agent, AgentExecutor
 from langchain.tools import tool
-from langchain.memory import ConversationBufferWindowMemory
-from config.database import get_table_names
+from config.database import get_table_names, ensure_approvals_schema
 from config.llm import get_llm
 from config.prompts import import_get_react_prompt
+from NEW.config.log_writer import get_log_writer
+from NEW.config.classifier import get_classifier, CONFIDENCE_THRESHOLD
+from NEW.agents.session_memory import SessionMemoryStore
+from NEW.config.metrics import span
+from NEW.config.policy import check_governance
 
 # -----------------------
 # Safe imports for specialized agents (fallback to stubs if missing)
@@ -57,7 +63,6 @@ except Exception:
 # Memory + LLM
 # -----------------------
 llm = get_llm()
-memory = ConversationBufferWindowMemory(k=5, return_messages=True)
 
 # -----------------------
 # Orchestrator DB helpers (uses erp_sample.db)
@@ -66,9 +71,48 @@ DB_PATH = Path(__file__).parent / "erp_sample.db"
 SESSION_ID = os.getenv("ERP_SESSION_ID", "demo-session")
 USER_ID = os.getenv("ERP_USER_ID", "demo-user")
 
+# Session of the request being handled. ask() sets it, so classify_and_route (which the router
+# agent calls as a tool) queues approvals and saves turns under that session, not SESSION_ID.
+session_id_var: ContextVar[str] = ContextVar("erp_session_id", default=SESSION_ID)
+
 def get_db_connection():
     return sqlite3.connect(DB_PATH)
 
+
+def load_session_turns(session_id: str, limit: int):
+    """Last `limit` logged turns of a session, oldest first."""
+    with get_db_connection() as conn:
+        columns = {row[1] for row in conn.execute("PRAGMA table_info(conversations)")}
+        if "user_input" in columns:
+            rows = conn.execute(
+                "SELECT user_input, agent_output FROM conversations WHERE session_id = ? ORDER BY id DESC LIMIT ?",
+                (session_id, limit),
+            ).fetchall()
+            return list(reversed(rows))
+        # The shipped erp_sample.db logs one row per message (message_type/content)
+        rows = conn.execute(
+            "SELECT message_type, content FROM conversations WHERE session_id = ? AND message_type IN ('user', 'agent') "
+            "ORDER BY id DESC LIMIT ?",
+            (session_id, 2 * limit),
+        ).fetchall()
+    turns, question = [], None
+    for kind, content in reversed(rows):
+        if kind == "user":
+            question = content
+        elif question is not None:
+            turns.append((question, content))
+            question = None
+    return turns[-limit:]
+
+
+# Per-session memory; every turn is persisted by log_conversation in the layout
+# load_session_turns reads, so evicted sessions rehydrate from there and nothing is spilled
+session_memory = SessionMemoryStore(
+    max_sessions=int(os.getenv("SESSION_MEMORY_MAX_SESSIONS", "256")),
+    loader=load_session_turns,
+    spiller=None,
+)
+
 # Ensure tables exist (idempotent) for orchestrator logs/approvals
 # These will be no-ops if the tables already exist
 with get_db_connection() as _conn:
@@ -97,84 +141,62 @@ with get_db_connection() as _conn:
             agent TEXT,
             inputs TEXT,
             outputs TEXT,
-            success INTEGER
-        );
-        """
-    )
-    cur.execute(
-        """
-        CREATE TABLE IF NOT EXISTS approvals (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-            session_id TEXT,
-            user_id TEXT,
-            request TEXT,
-            agent TEXT,
-            status TEXT,
-            reasons TEXT
+            success INTEGER,
+            execution_time_ms INTEGER
         );
         """
     )
+    # Also migrates the older approvals table shipped in erp_sample.db
+    ensure_approvals_schema(_conn)
+    # Older databases predate the timing column
+    if "execution_time_ms" not in [row[1] for row in cur.execute("PRAGMA table_info(tool_calls)")]:
+        cur.execute("ALTER TABLE tool_calls ADD COLUMN execution_time_ms INTEGER")
     _conn.commit()
+    # setup_db.py creates one row per turn (user_input/agent_output) and per-agent tool_calls
+    # (agent/inputs/outputs/success); the shipped erp_sample.db has one row per message
+    # (message_type/content) and tool_calls with agent_name/tool_name/input_data/output_data/status
+    MESSAGE_LOG = "message_type" in {row[1] for row in cur.execute("PRAGMA table_info(conversations)")}
+    TOOL_LOG = "tool_name" in {row[1] for row in cur.execute("PRAGMA table_info(tool_calls)")}
 
 
 # -----------------------
 # Governance + Logging helpers
 # -----------------------
 
-def check_governance(user_request: str, domain: str) -> dict:
-    """Simple policy check that flags risky operations requiring approval.
-    Returns dict: {needs_approval: bool, risk_level: str, reasons: [str]}
-    """
-    risky_phrases = [
-        "export all", "delete all", "drop table", "truncate", "wipe",
-        "download financials", "mass update", "bulk delete", "transfer funds"
-    ]
-    domain_sensitive = {
-        "finance": ["payments", "payout", "transfer", "invoice export"],
-        "inventory": ["adjust all stock", "zero stock"],
-        "sales": ["export customers", "delete leads"],
-        "analytics": ["export report", "download report"]
-    }
-    reasons = [p for p in risky_phrases if p in user_request.lower()]
-    for phrase in domain_sensitive.get(domain, []):
-        if phrase in user_request.lower():
-            reasons.append(f"domain-sensitive: {phrase}")
-    if reasons:
-        return {"needs_approval": True, "risk_level": "HIGH", "reasons": reasons}
-    return {"needs_approval": False, "risk_level": "LOW", "reasons": []}
-
-
-def log_tool_call(agent: str, inputs: dict, outputs: str, success: bool):
-    """Persist tool call metadata for observability."""
-    try:
-        with get_db_connection() as conn:
-            conn.execute(
-                """
-                INSERT INTO tool_calls (session_id, user_id, agent, inputs, outputs, success)
-                VALUES (?, ?, ?, ?, ?, ?)
-                """,
-                (SESSION_ID, USER_ID, agent, json.dumps(inputs), outputs, int(success)),
-            )
-            conn.commit()
-    except Exception as e:
-        print(f"Tool call logging error: {e}")
+def log_tool_call(agent: str, inputs: dict, outputs: str, success: bool, execution_time_ms: int = None,
+                  session_id: str = None):
+    """Queue tool call metadata for observability (written in the background)."""
+    session_id = session_id or SESSION_ID
+    if TOOL_LOG:
+        # No session column here; the session goes into input_data
+        get_log_writer(DB_PATH).write(
+            "INSERT INTO tool_calls (user_id, agent_name, tool_name, input_data, output_data, execution_time_ms, "
+            "status, error_message) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+            (USER_ID, agent, f"execute_with_{agent}_agent", json.dumps(dict(inputs, session_id=session_id)), outputs,
+             execution_time_ms, "success" if success else "error", None if success else outputs),
+        )
+        return
+    get_log_writer(DB_PATH).write(
+        "INSERT INTO tool_calls (session_id, user_id, agent, inputs, outputs, success, execution_time_ms) "
+        "VALUES (?, ?, ?, ?, ?, ?, ?)",
+        (session_id, USER_ID, agent, json.dumps(inputs), outputs, int(success), execution_time_ms),
+    )
 
 
-def log_conversation(user_input: str, agent_output: str, agent: str, success: bool):
-    """Persist conversation turns for memory/audit."""
-    try:
-        with get_db_connection() as conn:
-            conn.execute(
-                """
-                INSERT INTO conversations (session_id, user_id, user_input, agent_output, agent, success)
-                VALUES (?, ?, ?, ?, ?, ?)
-                """,
-                (SESSION_ID, USER_ID, user_input, agent_output, agent, int(success)),
-            )
-            conn.commit()
-    except Exception as e:
-        print(f"Conversation logging error: {e}")
+def log_conversation(user_input: str, agent_output: str, agent: str, success: bool, session_id: str = None):
+    """Queue a conversation turn for memory/audit (written in the background)."""
+    session_id = session_id or SESSION_ID
+    writer = get_log_writer(DB_PATH)
+    if MESSAGE_LOG:
+        insert = ("INSERT INTO conversations (user_id, session_id, message_type, content, agent_name, metadata) "
+                  "VALUES (?, ?, ?, ?, ?, ?)")
+        writer.write(insert, (USER_ID, session_id, "user", user_input, None, None))
+        writer.write(insert, (USER_ID, session_id, "agent", agent_output, agent, json.dumps({"success": success})))
+        return
+    writer.write(
+        "INSERT INTO conversations (session_id, user_id, user_input, agent_output, agent, success) VALUES (?, ?, ?, ?, ?, ?)",
+        (session_id, USER_ID, user_input, agent_output, agent, int(success)),
+    )
 
 
 def llm_classify_domain(user_request: str) -> str:
@@ -205,45 +227,45 @@ def llm_classify_domain(user_request: str) -> str:
 # -----------------------
 
 @tool
-def execute_with_sales_agent(user_request: str) -> str:
+def execute_with_sales_agent(user_request: str, chat_history: str = "") -> str:
     """Execute a request using the Sales Agent for customer, order, and lead management.
     Input: user's request/question about sales, customers, orders, or leads"""
     try:
         print(f"Routing to Sales Agent: {user_request}")
-        result = sales_executor.invoke({"input": user_request})
+        result = sales_executor.invoke({"input": user_request, "chat_history": chat_history})
         return f"Sales Agent Response: {result['output']}"
     except Exception as e:
         return f"Sales Agent Error: {str(e)}"
 
 @tool
-def execute_with_finance_agent(user_request: str) -> str:
+def execute_with_finance_agent(user_request: str, chat_history: str = "") -> str:
     """Execute a request using the Finance Agent for financial data and accounting.
     Input: user's request/question about finances, invoices, payments, or accounting"""
     try:
         print(f"Routing to Finance Agent: {user_request}")
-        result = finance_executor.invoke({"input": user_request})
+        result = finance_executor.invoke({"input": user_request, "chat_history": chat_history})
         return f"Finance Agent Response: {result['output']}"
     except Exception as e:
         return f"Finance Agent Error: {str(e)}"
 
 @tool
-def execute_with_inventory_agent(user_request: str) -> str:
+def execute_with_inventory_agent(user_request: str, chat_history: str = "") -> str:
     """Execute a request using the Inventory Agent for stock and product management.
     Input: user's request/question about inventory, stock levels, or products"""
     try:
         print(f"Routing to Inventory Agent: {user_request}")
-        result = inventory_executor.invoke({"input": user_request})
+        result = inventory_executor.invoke({"input": user_request, "chat_history": chat_history})
         return f"Inventory Agent Response: {result['output']}"
     except Exception as e:
         return f"Inventory Agent Error: {str(e)}"
 
 @tool
-def execute_with_analytics_agent(user_request: str) -> str:
+def execute_with_analytics_agent(user_request: str, chat_history: str = "") -> str:
     """Execute a request using the Analytics Agent for reports and business intelligence.
     Input: user's request/question about analytics, reports, or business insights"""
     try:
         print(f"Routing to Analytics Agent: {user_request}")
-        result = analytics_executor.invoke({"input": user_request})
+        result = analytics_executor.invoke({"input": user_request, "chat_history": chat_history})
         return f"Analytics Agent Response: {result['output']}"
     except Exception as e:
         return f"Analytics Agent Error: {str(e)}"
@@ -258,23 +280,19 @@ def classify_and_route(user_request: str) -> str:
     """Automatically classify the user request and route it to the appropriate specialist agent.
     Includes governance (approval flows), logging, and memory persistence."""
 
-    # --- Step 1: Try LLM classification ---
-    best_domain = llm_classify_domain(user_request)
-
-    # --- Step 2: Fallback to keyword scoring ---
-    if best_domain == "unknown":
-        request_lower = user_request.lower()
-        scores = {
-            'sales': sum(1 for kw in ['customer','lead','prospect','sale','order','crm','contact','deal','client'] if kw in request_lower),
-            'finance': sum(1 for kw in ['invoice','payment','accounting','revenue','expense','budget','financial','money','cost'] if kw in request_lower),
-            'inventory': sum(1 for kw in ['stock','inventory','product','warehouse','supply','procurement','vendor','item'] if kw in request_lower),
-            'analytics': sum(1 for kw in ['report','analytics','dashboard','metrics','analysis','trend','chart','insight'] if kw in request_lower)
-        }
-        best_domain, _ = max(scores.items(), key=lambda x: x[1])
+    # --- Step 1: Local classifier, escalating to the LLM only when unsure ---
+    with span("router", "local_classify"):
+        best_domain, confidence = get_classifier(DB_PATH).predict(user_request)
+    if confidence < CONFIDENCE_THRESHOLD:
+        with span("router", "llm_classify"):
+            llm_domain = llm_classify_domain(user_request)
+        if llm_domain != "unknown":
+            best_domain = llm_domain
 
-    print(f"Auto-routing to {best_domain} agent (via LLM+keywords)")
+    print(f"Auto-routing to {best_domain} agent (local confidence {confidence:.2f})")
 
-    # --- Step 3: Governance Check ---
+    # --- Step 2: Governance Check ---
+    session_id = session_id_var.get()
     gov_result = check_governance(user_request, best_domain)
     if gov_result["needs_approval"]:
         with get_db_connection() as conn:
@@ -283,38 +301,50 @@ def classify_and_route(user_request: str) -> str:
                 INSERT INTO approvals (session_id, user_id, request, agent, status, reasons)
                 VALUES (?, ?, ?, ?, ?, ?)
                 """,
-                (SESSION_ID, USER_ID, user_request, best_domain, "PENDING", ", ".join(gov_result["reasons"]))
+                (session_id, USER_ID, user_request, best_domain, "PENDING", ", ".join(gov_result["reasons"]))
             )
             conn.commit()
         return f"⚠️ This request is flagged as {gov_result['risk_level']} risk and requires approval.\nReasons: {', '.join(gov_result['reasons'])}"
 
-    # --- Step 4: Route to the correct agent ---
+    return run_routed(user_request, best_domain, session_id=session_id)
+
+
+def run_routed(user_request: str, best_domain: str, session_id: str = None) -> str:
+    """Execute a request with the given domain's agent, then save memory and log it.
+    Also used by approvals.ApprovalWorker to resume requests once they are approved."""
+    session_id = session_id or SESSION_ID
+
+    # --- Step 3: Route to the correct agent, with the session's recent turns ---
+    started = time.perf_counter()
     try:
+        args = {"user_request": user_request, "chat_history": session_memory.history(session_id, USER_ID)}
         if best_domain == 'sales':
-            result = execute_with_sales_agent(user_request)
+            result = execute_with_sales_agent.invoke(args)
         elif best_domain == 'finance':
-            result = execute_with_finance_agent(user_request)
+            result = execute_with_finance_agent.invoke(args)
         elif best_domain == 'inventory':
-            result = execute_with_inventory_agent(user_request)
+            result = execute_with_inventory_agent.invoke(args)
         elif best_domain == 'analytics':
-            result = execute_with_analytics_agent(user_request)
+            result = execute_with_analytics_agent.invoke(args)
         else:
             result = "❓ Unable to classify request."
+        elapsed_ms = int((time.perf_counter() - started) * 1000)
 
-        # --- Step 5: Update Memory ---
-        memory.chat_memory.add_user_message(user_request)
-        memory.chat_memory.add_ai_message(result)
+        # --- Step 4: Update Memory ---
+        session_memory.save_turn(session_id, user_request, result, USER_ID)
 
-        # --- Step 6: Log Tool Calls & Conversation ---
-        log_tool_call(best_domain, {"user_request": user_request}, result, success=True)
-        log_conversation(user_request, result, best_domain, success=True)
+        # --- Step 5: Log Tool Calls & Conversation ---
+        log_tool_call(best_domain, {"user_request": user_request}, result, success=True,
+                      execution_time_ms=elapsed_ms, session_id=session_id)
+        log_conversation(user_request, result, best_domain, success=True, session_id=session_id)
 
         return result
 
     except Exception as e:
         error_msg = f"Error routing to {best_domain} agent: {str(e)}"
-        log_tool_call(best_domain, {"user_request": user_request}, error_msg, success=False)
-        log_conversation(user_request, error_msg, best_domain, success=False)
+        log_tool_call(best_domain, {"user_request": user_request}, error_msg, success=False,
+                      execution_time_ms=int((time.perf_counter() - started) * 1000), session_id=session_id)
+        log_conversation(user_request, error_msg, best_domain, success=False, session_id=session_id)
         return error_msg
 
 
@@ -391,11 +421,21 @@ router_agent = create_react_agent(
 router_executor = AgentExecutor(
     agent=router_agent,
     tools=tools,
-    memory=memory,
     verbose=True
 )
 
 
+def ask(user_request: str, session_id: str = None) -> str:
+    """Answer through the router agent, with the session's recent turns as {chat_history}."""
+    session_id = session_id or SESSION_ID
+    token = session_id_var.set(session_id)
+    try:
+        history = session_memory.history(session_id, USER_ID)
+        return router_executor.invoke({"input": user_request, "chat_history": history})["output"]
+    finally:
+        session_id_var.reset(token)
+
+
 if __name__ == "__main__":
     print("Smart Router Agent ready. Type 'system' for info or 'quit' to exit.")
     while True:
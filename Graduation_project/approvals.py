@@ -0,0 +1,241 @@
+"""
+Approval queue for requests flagged by governance in classify_and_route.
+
+Lifecycle of an `approvals` row:
+
+    PENDING -> APPROVED -> RUNNING -> EXECUTED | FAILED
+            -> REJECTED
+
+Reviewers list the queue and approve/reject many rows at once; a decision
+only applies to rows that are still PENDING, and a whole batch is committed
+in one transaction. ApprovalWorker claims APPROVED rows and re-runs them
+through Router_agent.run_routed (the same execute/log/memory path as a
+live request, minus the governance check) on at most APPROVAL_CONCURRENCY
+threads. Rows left RUNNING by a crash go back to APPROVED on start. The
+table is created, or migrated from the older schema shipped in
+erp_sample.db, by config.database.ensure_approvals_schema.
+
+Serve the API and the worker together:
+    uvicorn approvals:app --port 8001
+"""
+import logging
+import os
+import sqlite3
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Callable, Dict, List, Literal, Optional
+
+from fastapi import APIRouter, FastAPI, HTTPException
+from pydantic import BaseModel, Field
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from config.database import ensure_approvals_schema
+
+logger = logging.getLogger("erp.approvals")
+
+DB_PATH = Path(__file__).parent / "erp_sample.db"
+APPROVAL_CONCURRENCY = int(os.getenv("APPROVAL_CONCURRENCY", "2"))
+APPROVAL_POLL_SECONDS = float(os.getenv("APPROVAL_POLL_SECONDS", "2"))
+_CHUNK = 500  # stay under SQLite's bound-parameter limit in IN (...) lists
+
+def _connect(db_path=None) -> sqlite3.Connection:
+    conn = sqlite3.connect(db_path or DB_PATH, timeout=30)
+    conn.row_factory = sqlite3.Row
+    return conn
+
+
+def list_approvals(status: Optional[str] = "PENDING", agent: Optional[str] = None,
+                   after_id: int = 0, limit: int = 50, db_path=None) -> List[Dict]:
+    """One page of the queue, oldest first; pass the last id as `after_id` for the next page."""
+    query, params = "SELECT * FROM approvals WHERE id > ?", [after_id]
+    if status:
+        query += " AND status = ?"
+        params.append(status.upper())
+    if agent:
+        query += " AND agent = ?"
+        params.append(agent)
+    with _connect(db_path) as conn:
+        rows = conn.execute(query + " ORDER BY id LIMIT ?", params + [limit]).fetchall()
+    return [dict(r) for r in rows]
+
+
+def get_approval(approval_id: int, db_path=None) -> Optional[Dict]:
+    with _connect(db_path) as conn:
+        row = conn.execute("SELECT * FROM approvals WHERE id = ?", (approval_id,)).fetchone()
+    return dict(row) if row else None
+
+
+def decide(ids: List[int], decision: str, decided_by: str, note: str = "", db_path=None) -> Dict[str, List[int]]:
+    """Approve or reject every still-PENDING row in `ids` in a single transaction."""
+    status = {"approve": "APPROVED", "reject": "REJECTED"}[decision]
+    ids = sorted(set(ids))
+    updated: List[int] = []
+    conn = _connect(db_path)
+    try:
+        conn.execute("BEGIN IMMEDIATE")
+        for i in range(0, len(ids), _CHUNK):
+            chunk = ids[i:i + _CHUNK]
+            marks = ",".join("?" * len(chunk))
+            updated += [r[0] for r in conn.execute(
+                f"SELECT id FROM approvals WHERE status = 'PENDING' AND id IN ({marks})", chunk)]
+            conn.execute(
+                f"UPDATE approvals SET status = ?, decided_by = ?, decided_at = CURRENT_TIMESTAMP, "
+                f"decision_note = ? WHERE status = 'PENDING' AND id IN ({marks})",
+                [status, decided_by, note] + chunk)
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        conn.close()
+    done = set(updated)
+    return {"updated": updated, "skipped": [i for i in ids if i not in done]}
+
+
+def _default_route(user_request: str, domain: str, session_id: Optional[str]) -> str:
+    # Imported lazily: building the router loads the agents and the LLM client
+    from Router_agent import run_routed
+    return run_routed(user_request, domain, session_id=session_id)
+
+
+class ApprovalWorker:
+    """Re-executes APPROVED requests with at most `concurrency` running at once."""
+
+    def __init__(self, route: Callable[[str, str, Optional[str]], str] = _default_route, db_path=None,
+                 concurrency: int = APPROVAL_CONCURRENCY, poll_interval: float = APPROVAL_POLL_SECONDS):
+        self.route = route
+        self.db_path = db_path
+        self.concurrency = concurrency
+        self.poll_interval = poll_interval
+        self._slots = threading.BoundedSemaphore(concurrency)
+        self._pool = ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="approval")
+        self._stop = threading.Event()
+        self._wake = threading.Event()
+        self._thread = threading.Thread(target=self._loop, name="approval-worker", daemon=True)
+
+    def start(self):
+        with _connect(self.db_path) as conn:
+            ensure_approvals_schema(conn)
+            conn.execute("UPDATE approvals SET status = 'APPROVED' WHERE status = 'RUNNING'")
+            conn.commit()
+        self._thread.start()
+        return self
+
+    def stop(self, wait: bool = True):
+        self._stop.set()
+        self._wake.set()
+        # The loop must be gone before the pool shuts down, or it could still submit() to it
+        if self._thread.is_alive():
+            self._thread.join()
+        self._pool.shutdown(wait=wait)
+
+    def notify(self):
+        """Skip the poll delay, e.g. right after a bulk approval."""
+        self._wake.set()
+
+    def _claim(self, limit: int) -> List[sqlite3.Row]:
+        conn = _connect(self.db_path)
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            rows = conn.execute(
+                "SELECT id, session_id, request, agent FROM approvals WHERE status = 'APPROVED' ORDER BY id LIMIT ?",
+                (limit,)).fetchall()
+            if rows:
+                marks = ",".join("?" * len(rows))
+                conn.execute(f"UPDATE approvals SET status = 'RUNNING' WHERE id IN ({marks})", [r["id"] for r in rows])
+            conn.commit()
+            return rows
+        finally:
+            conn.close()
+
+    def _loop(self):
+        while not self._stop.is_set():
+            self._wake.clear()
+            free = 0
+            while self._slots.acquire(blocking=False):
+                free += 1
+            try:
+                rows = self._claim(free) if free else []
+            except sqlite3.Error as e:
+                logger.error("Approval worker could not claim requests: %s", e)
+                rows = []
+            for _ in range(free - len(rows)):
+                self._slots.release()
+            for row in rows:
+                self._pool.submit(self._execute, row)
+            self._wake.wait(self.poll_interval)
+
+    def _execute(self, row: sqlite3.Row):
+        try:
+            try:
+                result, status = self.route(row["request"], row["agent"], row["session_id"]), "EXECUTED"
+            except Exception as e:
+                result, status = f"Error executing approved request: {e}", "FAILED"
+            with _connect(self.db_path) as conn:
+                conn.execute(
+                    "UPDATE approvals SET status = ?, result = ?, executed_at = CURRENT_TIMESTAMP WHERE id = ?",
+                    (status, result, row["id"]))
+                conn.commit()
+        finally:
+            self._slots.release()
+            self._wake.set()
+
+
+# -----------------------
+# API
+# -----------------------
+
+router = APIRouter(prefix="/api/approvals", tags=["approvals"])
+worker: Optional[ApprovalWorker] = None
+
+
+class Decision(BaseModel):
+    ids: List[int] = Field(..., min_length=1)
+    decision: Literal["approve", "reject"]
+    decided_by: str
+    note: str = ""
+
+
+@router.get("")
+def list_endpoint(status: Optional[str] = "PENDING", agent: Optional[str] = None,
+                  after_id: int = 0, limit: int = 50):
+    return list_approvals(status, agent, after_id, min(limit, 500))
+
+
+@router.get("/{approval_id}")
+def get_endpoint(approval_id: int):
+    row = get_approval(approval_id)
+    if row is None:
+        raise HTTPException(status_code=404, detail=f"approval {approval_id} not found")
+    return row
+
+
+@router.post("/decisions")
+def decide_endpoint(body: Decision):
+    result = decide(body.ids, body.decision, body.decided_by, body.note)
+    if worker and body.decision == "approve" and result["updated"]:
+        worker.notify()
+    return result
+
+
+app = FastAPI(title="ERP approvals")
+app.include_router(router)
+
+
+@app.on_event("startup")
+def start_worker():
+    global worker
+    with _connect() as conn:
+        ensure_approvals_schema(conn)
+    if os.getenv("APPROVAL_WORKER", "1") != "0":
+        worker = ApprovalWorker().start()
+
+
+@app.on_event("shutdown")
+def stop_worker():
+    if worker:
+        worker.stop()
@@ -1,6 +1,7 @@
 import sqlite3
 import os
 from pathlib import Path
+from NEW.config.log_writer import get_log_writer
 
 # Database configuration
 DB_PATH = Path(__file__).parent.parent / "erp_sample.db"
@@ -45,19 +46,82 @@ def execute_query(query, params=None):
         return None
 
 def log_tool_call(user_id, agent_name, tool_name, input_data, output_data, execution_time_ms, status="success", error_message=None):
-    """Log a tool call to the database"""
+    """Queue a tool call row; returns False if the audit queue dropped it"""
     query = """
     INSERT INTO tool_calls (user_id, agent_name, tool_name, input_data, output_data, execution_time_ms, status, error_message)
     VALUES (?, ?, ?, ?, ?, ?, ?, ?)
     """
     params = (user_id, agent_name, tool_name, str(input_data), str(output_data), execution_time_ms, status, error_message)
-    return execute_query(query, params)
+    return get_log_writer(DB_PATH).write(query, params)
 
 def log_conversation(user_id, session_id, message_type, content, agent_name=None, metadata=None):
-    """Log a conversation message to the database"""
+    """Queue a conversation message row; returns False if the audit queue dropped it"""
     query = """
     INSERT INTO conversations (user_id, session_id, message_type, content, agent_name, metadata)
     VALUES (?, ?, ?, ?, ?, ?)
     """
     params = (user_id, session_id, message_type, content, agent_name, str(metadata) if metadata else None)
-    return execute_query(query, params)
+    return get_log_writer(DB_PATH).write(query, params)
+
+# Approval queue used by Router_agent and approvals.py
+APPROVALS_TABLE = """
+CREATE TABLE IF NOT EXISTS approvals (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    session_id TEXT,
+    user_id TEXT,
+    request TEXT,
+    agent TEXT,
+    status TEXT,
+    reasons TEXT,
+    decided_by TEXT,
+    decided_at TIMESTAMP,
+    decision_note TEXT,
+    result TEXT,
+    executed_at TIMESTAMP
+)
+"""
+
+# Added after the first release of the queue
+APPROVAL_DECISION_COLUMNS = {
+    "decided_by": "TEXT",
+    "decided_at": "TIMESTAMP",
+    "decision_note": "TEXT",
+    "result": "TEXT",
+    "executed_at": "TIMESTAMP",
+}
+
+def ensure_approvals_schema(conn):
+    """Create or upgrade the approvals table and its queue indexes (idempotent).
+
+    The shipped erp_sample.db has an older approvals table (request_type,
+    requester_id, request_data, lowercase statuses under a CHECK). It is
+    renamed to approvals_legacy and its rows are copied into the queue schema;
+    rows it had already approved become EXECUTED so the worker does not re-run them.
+    """
+    existing = {row[1] for row in conn.execute("PRAGMA table_info(approvals)")}
+    if existing and not {"request", "agent"} <= existing:
+        conn.execute("ALTER TABLE approvals RENAME TO approvals_legacy")
+        conn.execute(APPROVALS_TABLE)
+        if {"request_type", "requester_id", "request_data"} <= existing:
+            conn.execute(
+                """
+                INSERT INTO approvals (id, created_at, user_id, request, agent, status,
+                                       decided_by, decided_at, decision_note, result)
+                SELECT id, created_at, requester_id, request_data, request_type,
+                       CASE LOWER(status) WHEN 'rejected' THEN 'REJECTED' WHEN 'approved' THEN 'EXECUTED'
+                                          ELSE 'PENDING' END,
+                       approver_id, approved_at, approval_notes,
+                       CASE LOWER(status) WHEN 'approved' THEN 'Approved before the queue migration; not re-run' END
+                FROM approvals_legacy
+                """
+            )
+        existing = set()
+    conn.execute(APPROVALS_TABLE)
+    existing = existing or {row[1] for row in conn.execute("PRAGMA table_info(approvals)")}
+    for name, kind in APPROVAL_DECISION_COLUMNS.items():
+        if name not in existing:
+            conn.execute(f"ALTER TABLE approvals ADD COLUMN {name} {kind}")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_approvals_status_agent ON approvals (status, agent, id)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_approvals_session ON approvals (session_id, id)")
+    conn.commit()
@@ -1,9 +1,14 @@
 from langchain_google_genai import ChatGoogleGenerativeAI
+from NEW.config.llm_cache import get_response_cache
+from NEW.config.fake_llm import get_fake_llm
+from NEW.config.metrics import MetricsCallbackHandler
 import os
 
 
 def get_llm():
     """Get configured LLM instance -general- (Gemini 1.5 Flash)"""
+    if os.getenv("ERP_LLM_BACKEND", "gemini").lower() == "fake":
+        return get_fake_llm()
     api_key = os.getenv("GOOGLE_API_KEY")  # TODO: set via environment, do not hardcode
     if not api_key:
         raise RuntimeError("GOOGLE_API_KEY not set. Export it in your environment.")
@@ -11,11 +16,15 @@ def get_llm():
         model="gemini-1.5-flash",
         temperature=0.1,
         google_api_key=api_key,
+        cache=get_response_cache("gemini-1.5-flash", 0.1),
+        callbacks=[MetricsCallbackHandler("gemini-1.5-flash")],
     )
 
 
 def get_router_llm():
     """Get LLM for router decisions (deterministic)"""
+    if os.getenv("ERP_LLM_BACKEND", "gemini").lower() == "fake":
+        return get_fake_llm()
     api_key = os.getenv("GOOGLE_API_KEY")  # TODO: set via environment, do not hardcode
     if not api_key:
         raise RuntimeError("GOOGLE_API_KEY not set. Export it in your environment.")
@@ -23,4 +32,6 @@ def get_router_llm():
         model="gemini-1.5-flash",
         temperature=0.0,
         google_api_key=api_key,
+        cache=get_response_cache("gemini-1.5-flash", 0.0),
+        callbacks=[MetricsCallbackHandler("gemini-1.5-flash")],
     )
@@ -0,0 +1,151 @@
+# config/memory_store.py
+"""
+Key-value agent memory behind `remember` / `recall`.
+
+Every value written is a new version row in `memory`; `recall` returns the
+newest. The latest value of each (namespace, key) is kept in an in-process
+LRU cache that is filled on write, so repeated recalls never touch SQLite.
+Misses are answered from the (namespace, key, timestamp) index on a
+per-thread connection. Writes are queued to a background writer and
+committed in batches; the queue blocks rather than drops, since this is
+agent state and not an audit trail.
+
+Namespaces scope keys ("global" by default, e.g. "session:<id>" per
+session). With MEMORY_VERSION_TTL set (seconds), superseded versions older
+than that are deleted in the background; the latest version of a key is
+always kept. The cache assumes this process is the only writer.
+"""
+import atexit
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from typing import Optional
+
+from NEW.config.log_writer import LogWriter
+
+MEMORY_CACHE_SIZE = int(os.getenv("MEMORY_CACHE_SIZE", "10000"))
+MEMORY_FLUSH_MS = float(os.getenv("MEMORY_FLUSH_MS", "100"))
+MEMORY_VERSION_TTL = float(os.getenv("MEMORY_VERSION_TTL", "0"))
+DEFAULT_NAMESPACE = "global"
+
+_MISSING = object()
+
+INSERT = "INSERT INTO memory (namespace, key, value, timestamp) VALUES (?, ?, ?, ?)"
+COMPACT = """
+    DELETE FROM memory WHERE timestamp < ? AND EXISTS (
+        SELECT 1 FROM memory AS newer
+        WHERE newer.namespace = memory.namespace AND newer.key = memory.key
+          AND (newer.timestamp > memory.timestamp OR (newer.timestamp = memory.timestamp AND newer.rowid > memory.rowid))
+    )
+"""
+
+
+def _now() -> str:
+    return datetime.utcnow().isoformat(" ")
+
+
+class MemoryStore:
+    def __init__(self, db_path, cache_size: int = MEMORY_CACHE_SIZE, version_ttl: float = MEMORY_VERSION_TTL):
+        self.db_path = str(db_path)
+        self.cache_size = cache_size
+        self.version_ttl = version_ttl
+        self.hits = 0
+        self.misses = 0
+        self._cache: "OrderedDict[tuple, Optional[str]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._last_compact = time.monotonic()
+        self._ensure_schema()
+        self._writer = LogWriter(self.db_path, batch_size=500, flush_interval=MEMORY_FLUSH_MS / 1000,
+                                 policy="block", block_timeout=None)
+        atexit.register(self._writer.close)
+
+    def _ensure_schema(self):
+        with sqlite3.connect(self.db_path) as conn:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS memory (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    key TEXT NOT NULL,
+                    value TEXT,
+                    timestamp TIMESTAMP
+                )
+            """)
+            # Tables created before scoping get every existing row in the default namespace
+            if "namespace" not in [row[1] for row in conn.execute("PRAGMA table_info(memory)")]:
+                conn.execute(f"ALTER TABLE memory ADD COLUMN namespace TEXT NOT NULL DEFAULT '{DEFAULT_NAMESPACE}'")
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_memory_ns_key_ts ON memory (namespace, key, timestamp)")
+            conn.commit()
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = self._local.conn = sqlite3.connect(self.db_path)
+        return conn
+
+    def _cache_put(self, cache_key: tuple, value: Optional[str], replace: bool = True) -> Optional[str]:
+        """Cache `value` (only if the key is absent when not `replace`); returns the cached value."""
+        with self._lock:
+            if replace:
+                self._cache[cache_key] = value
+            else:
+                value = self._cache.setdefault(cache_key, value)
+            self._cache.move_to_end(cache_key)
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+            return value
+
+    def remember(self, key: str, value: str, namespace: str = DEFAULT_NAMESPACE):
+        """Store a new version of `key`; visible to recall immediately, persisted in the background."""
+        self._cache_put((namespace, key), value)
+        self._writer.write(INSERT, (namespace, key, value, _now()))
+        if self.version_ttl > 0 and time.monotonic() - self._last_compact >= self.version_ttl:
+            self.compact()
+
+    def recall(self, key: str, namespace: str = DEFAULT_NAMESPACE) -> Optional[str]:
+        """Latest value of `key`, or None."""
+        cache_key = (namespace, key)
+        with self._lock:
+            value = self._cache.get(cache_key, _MISSING)
+            if value is not _MISSING:
+                self._cache.move_to_end(cache_key)
+                self.hits += 1
+                return value
+            self.misses += 1
+        # An evicted key may still have its newest version in the write queue
+        self._writer.flush()
+        row = self._conn().execute(
+            "SELECT value FROM memory WHERE namespace = ? AND key = ? ORDER BY timestamp DESC, rowid DESC LIMIT 1",
+            (namespace, key),
+        ).fetchone()
+        # A remember() that ran since the flush has cached a newer value than this read; keep it
+        return self._cache_put(cache_key, row[0] if row else None, replace=False)
+
+    def compact(self, ttl: Optional[float] = None):
+        """Queue deletion of versions superseded more than `ttl` seconds ago."""
+        ttl = self.version_ttl if ttl is None else ttl
+        self._last_compact = time.monotonic()
+        cutoff = (datetime.utcnow() - timedelta(seconds=ttl)).isoformat(" ")
+        self._writer.write(COMPACT, (cutoff,))
+
+    def flush(self) -> bool:
+        return self._writer.flush()
+
+    def stats(self) -> dict:
+        return dict(self._writer.stats(), cached=len(self._cache), hits=self.hits, misses=self.misses)
+
+
+_stores = {}
+_stores_lock = threading.Lock()
+
+
+def get_memory_store(db_path) -> MemoryStore:
+    """Process-wide store for a database file."""
+    key = os.path.abspath(str(db_path))
+    with _stores_lock:
+        store = _stores.get(key)
+        if store is None:
+            store = _stores[key] = MemoryStore(key)
+        return store
@@ -21,12 +21,16 @@ Final Answer: the final answer to the original input question
 
 Begin!
 
+Previous conversation:
+{chat_history}
+
 Question: {input}
 Thought: {agent_scratchpad}"""
 
     return PromptTemplate(
         template=template,
-        input_variables=["input", "agent_scratchpad", "tools", "tool_names"]
+        input_variables=["input", "agent_scratchpad", "tools", "tool_names"],
+        partial_variables={"chat_history": ""}
     )
 
 def get_router_prompt():
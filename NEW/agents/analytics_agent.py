@@ -1,20 +1,10 @@
 import os
 from langchain.agents import AgentExecutor, create_react_agent
-from langchain.memory import ConversationBufferWindowMemory
 from langchain_core.prompts import PromptTemplate
-from ..config.llm import get_llm
-from ..tools.analytics_tools import TextToSQLTool, RAGDefinitionTool, AnalyticsReportingTool
-
-# Initialize the LLM and memory
-llm = get_llm()
-memory = ConversationBufferWindowMemory(k=5, return_messages=True)
-
-# Initialize the tools
-analytics_tools = [
-    TextToSQLTool(),
-    RAGDefinitionTool(),
-    AnalyticsReportingTool()
-]
+from langchain_core.tools import Tool
+from config.llm import get_llm
+from tools.analytics_tools import TextToSQLTool
+from tools.schema_digest import build_sql_context
 
 # Define the agent's prompt
 analytics_prompt_template = """
@@ -23,21 +13,48 @@ You are a specialized analytics agent for an ERP system. Your goal is to answer
 
 Use these tools to answer the user's questions. You should always try to use the most specific tool for the task.
 
+{schema}
+
+Use the following format:
+
+Question: the input question you must answer
+Thought: you should always think about what to do
+Action: the action to take, should be one of [{tool_names}]
+Action Input: the input to the action
+Observation: the result of the action
+... (this Thought/Action/Action Input/Observation can repeat N times)
+Thought: I now know the final answer
+Final Answer: the final answer to the original input question
+
 Begin!
 
 Question: {input}
-{agent_scratchpad}
+Thought: {agent_scratchpad}
 """
 
-# Create the agent executor
-analytics_executor = AgentExecutor(
-    agent=create_react_agent(llm, analytics_tools, PromptTemplate.from_template(analytics_prompt_template)),
-    tools=analytics_tools,
-    memory=memory,
-    verbose=True,
-    handle_parsing_errors=True
-)
+# Create the agent executor on first use (see agents/registry.py)
+def build_analytics_executor():
+    # TextToSQLTool is the only analytics tool there is; it opens a connection per call
+    text_to_sql = TextToSQLTool()
+    analytics_tools = [
+        Tool(
+            name=text_to_sql.name,
+            func=lambda query: text_to_sql._run(query.strip().strip("`")),
+            description=" ".join(text_to_sql.description.split()) + " Input: one SQLite SELECT statement."
+        ),
+    ]
+    return AgentExecutor(
+        agent=create_react_agent(get_llm(), analytics_tools,
+                                 PromptTemplate.from_template(analytics_prompt_template).partial(schema="")),
+        tools=analytics_tools,
+        verbose=True,
+        handle_parsing_errors=True
+    )
+
+def analytics_inputs(query: str) -> dict:
+    """Executor inputs with a schema digest of only the tables the question needs."""
+    return {"input": query, "schema": build_sql_context(query)}
 
 # You can still define a handler function if needed, but the executor is the main export
 # def handle_analytics_query(query: str):
-#     return analytics_executor.invoke({"input": query})
+#     return get_agent("analytics").invoke({"input": query})
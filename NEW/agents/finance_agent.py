@@ -1,7 +1,7 @@
 ﻿from typing import Dict, Any
-from ..tools.finance_sql_tool import FinanceSQLTool
-from ..tools.policy_rag_tool import PolicyRAGTool
-from ..tools.anomaly_detector_tool import AnomalyDetectorTool
+from tools.finance_sql_tool import FinanceSQLTool
+from tools.policy_rag_tool import PolicyRAGTool
+from tools.anomaly_detector_tool import AnomalyDetectorTool
 
 class FinanceAgent:
     def __init__(self, db_path: str):
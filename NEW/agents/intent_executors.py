@@ -0,0 +1,96 @@
+"""
+ReAct executors over the deterministic SalesAgent / FinanceAgent.
+
+The router and the fan-out talk to every domain as an executor taking
+{"input": question}; these adapters expose each agent's intents (plus a
+read-only SQL tool over its tables) as tools so the sales and finance
+branches can answer free-text questions.
+"""
+import json
+from langchain.agents import AgentExecutor, create_react_agent
+from langchain_core.prompts import PromptTemplate
+from langchain_core.tools import Tool
+from config.llm import get_llm
+from config.database import INTENTS_DB_PATH
+from .sales_agent import SalesAgent
+from .finance_agent import FinanceAgent
+
+intent_prompt_template = """
+You are a specialized {domain} agent for an ERP system. You have access to the following tools:
+{tools}
+
+Tools that take a JSON object must get valid JSON as their input. Prefer the read-only SQL tool for questions about existing records.
+
+Use the following format:
+
+Question: the input question you must answer
+Thought: you should always think about what to do
+Action: the action to take, should be one of [{tool_names}]
+Action Input: the input to the action
+Observation: the result of the action
+... (this Thought/Action/Action Input/Observation can repeat N times)
+Thought: I now know the final answer
+Final Answer: the final answer to the original input question
+
+Begin!
+
+Question: {input}
+Thought: {agent_scratchpad}
+"""
+
+
+def _intent_tool(agent, intent: str, description: str, text_field: str = None) -> Tool:
+    """A tool that calls agent.handle(intent, payload) with a JSON payload (or plain text as `text_field`)."""
+    def call(text: str):
+        try:
+            payload = json.loads(text)
+        except ValueError:
+            payload = None
+        if not isinstance(payload, dict):
+            if text_field is None:
+                return {"ok": False, "error": "Input must be a JSON object"}
+            payload = {text_field: text.strip()}
+        try:
+            return agent.handle(intent, payload)
+        except (KeyError, TypeError, ValueError) as e:
+            return {"ok": False, "error": f"Bad input for {intent}: {e}"}
+    return Tool(name=intent, func=call, description=description)
+
+
+def _sql_read_tool(agent, name: str, tables: str) -> Tool:
+    def call(query: str):
+        if not query.strip().strip("`").lower().startswith("select"):
+            return {"ok": False, "error": "Only SELECT queries are allowed"}
+        return agent.sql.run({"op": "read", "query": query.strip().strip("`"), "params": []})
+    return Tool(name=name, func=call, description=f"Run one read-only SQLite SELECT over {tables}.")
+
+
+def _executor(domain: str, tools) -> AgentExecutor:
+    prompt = PromptTemplate.from_template(intent_prompt_template).partial(domain=domain)
+    return AgentExecutor(
+        agent=create_react_agent(get_llm(), tools, prompt),
+        tools=tools,
+        verbose=True,
+        handle_parsing_errors=True
+    )
+
+
+def build_sales_executor():
+    agent = SalesAgent(str(INTENTS_DB_PATH))
+    return _executor("sales", [
+        _sql_read_tool(agent, "sales_sql_read", "customers, leads, products, orders, order_items and tickets"),
+        _intent_tool(agent, "search_docs", "Search sales manuals and FAQs. Input: search text.", text_field="q"),
+        _intent_tool(agent, "lead_score", 'Score a lead. Input: {"features": {"msg_len": 120, "kw_hits": 2, "visits": 3, "source": "web"}}.'),
+        _intent_tool(agent, "add_lead", 'Create a lead. Input: {"name": "...", "email": "...", "source": "web", "notes": "..."}.'),
+        _intent_tool(agent, "convert_lead_to_order", 'Turn a lead into an order. Input: {"lead_id": 1, "product_id": 2, "qty": 1}.'),
+    ])
+
+
+def build_finance_executor():
+    agent = FinanceAgent(str(INTENTS_DB_PATH))
+    return _executor("finance", [
+        _sql_read_tool(agent, "finance_sql_read", "vendors, invoices, invoice_lines, payments, chart_of_accounts and ledger tables"),
+        _intent_tool(agent, "policy_lookup", "Search finance policies and the glossary. Input: search text.", text_field="q"),
+        _intent_tool(agent, "detect_anomaly", 'Score an invoice for anomalies. Input: {"invoice_id": 1}.'),
+        _intent_tool(agent, "generate_invoice_from_order", 'Create an invoice for an order. Input: {"order_id": 1}.'),
+    ])
@@ -1,39 +1,73 @@
 import os
 from langchain.agents import AgentExecutor, create_react_agent
-from langchain.memory import ConversationBufferWindowMemory
 from langchain_core.prompts import PromptTemplate
-from ..config.llm import get_llm
-from ..tools.inventory_tools import ReadInventoryTool, UpdateInventoryTool, ForecastInventoryTool
-
-# Initialize the LLM and memory
-llm = get_llm()
-memory = ConversationBufferWindowMemory(k=5, return_messages=True)
-
-# Initialize the tools
-inventory_tools = [
-    ReadInventoryTool(),
-    UpdateInventoryTool(),
-    ForecastInventoryTool()
-]
+from langchain_core.tools import Tool
+from config.llm import get_llm
+from config.database import DB_PATH
+from tools.inventory_tools import InventorySQLReadTool, InventorySQLWriteTool, InventoryBulkAdjustTool, ForecastTool
+# Same module inventory_tools uses, so reads and write-through share one stock cache
+from tools.stock_cache import StockLevelTool
 
 # Define the agent's prompt
 inventory_prompt_template = """
 You are a specialized inventory management agent for an ERP system. Your goal is to manage stock levels, provide inventory forecasts, and answer questions about products. You have access to the following tools:
 {tools}
 
-Use these tools to answer the user's questions. You should always try to use the most specific tool for the task.
+Use these tools to answer the user's questions. You should always try to use the most specific tool for the task; for current stock levels that is stock_level_lookup.
+
+Use the following format:
+
+Question: the input question you must answer
+Thought: you should always think about what to do
+Action: the action to take, should be one of [{tool_names}]
+Action Input: the input to the action
+Observation: the result of the action
+... (this Thought/Action/Action Input/Observation can repeat N times)
+Thought: I now know the final answer
+Final Answer: the final answer to the original input question
 
 Begin!
 
 Question: {input}
-{agent_scratchpad}
+Thought: {agent_scratchpad}
 """
 
-# Create the agent executor
-inventory_executor = AgentExecutor(
-    agent=create_react_agent(llm, inventory_tools, PromptTemplate.from_template(inventory_prompt_template)),
-    tools=inventory_tools,
-    memory=memory,
-    verbose=True,
-    handle_parsing_errors=True
-)
+# Create the agent executor on first use (see agents/registry.py)
+def build_inventory_executor():
+    db_path = str(DB_PATH)
+    # The SQL tools hold a connection, which SQLite ties to the creating thread; agent
+    # tools run on worker threads, so those are built per call like classify_and_route.
+    stock_levels = StockLevelTool(db_path)
+    inventory_tools = [
+        Tool(
+            name=stock_levels.name,
+            func=stock_levels.run,
+            description=stock_levels.description + ' Input: a product id, or {"product_id": 1, "warehouse": "A"}.'
+        ),
+        Tool(
+            name=InventorySQLReadTool.name,
+            func=lambda query: InventorySQLReadTool(db_path).run(query),
+            description=InventorySQLReadTool.description + " Input: one SQLite SELECT statement."
+        ),
+        Tool(
+            name=InventorySQLWriteTool.name,
+            func=lambda query: InventorySQLWriteTool(db_path).run(query),
+            description=InventorySQLWriteTool.description + " Input: one SQLite statement."
+        ),
+        Tool(
+            name=InventoryBulkAdjustTool.name,
+            func=lambda payload: InventoryBulkAdjustTool(db_path).run(payload),
+            description=InventoryBulkAdjustTool.description
+        ),
+        Tool(
+            name=ForecastTool.name,
+            func=lambda product_id: ForecastTool(db_path).run(product_id.strip()),
+            description=ForecastTool.description + " Input: a product id."
+        ),
+    ]
+    return AgentExecutor(
+        agent=create_react_agent(get_llm(), inventory_tools, PromptTemplate.from_template(inventory_prompt_template)),
+        tools=inventory_tools,
+        verbose=True,
+        handle_parsing_errors=True
+    )
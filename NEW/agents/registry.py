@@ -0,0 +1,50 @@
+import threading
+from importlib import import_module
+from inspect import isfunction
+from typing import Any, Dict, Iterable, Optional
+
+# name -> "module:attribute". The attribute is either a factory function that
+# builds the executor or an already-built executor object. Modules are only
+# imported on first use so that importing the router stays cheap.
+_specs: Dict[str, str] = {}
+_agents: Dict[str, Any] = {}
+_locks: Dict[str, threading.Lock] = {}
+
+
+def register_agent(name: str, spec: str):
+    """Register a lazily built agent, e.g. register_agent("analytics", ".analytics_agent:build_analytics_executor")."""
+    _specs[name] = spec
+    _locks[name] = threading.Lock()
+
+
+def get_agent(name: str) -> Any:
+    """Return the agent, building it on first use (thread-safe, built once)."""
+    agent = _agents.get(name)
+    if agent is not None:
+        return agent
+    if name not in _specs:
+        raise KeyError(f"No agent registered as '{name}'")
+    with _locks[name]:
+        if name not in _agents:
+            module_name, attr = _specs[name].split(":")
+            target = getattr(import_module(module_name, __package__), attr)
+            _agents[name] = target() if isfunction(target) else target
+    return _agents[name]
+
+
+def is_built(name: str) -> bool:
+    return name in _agents
+
+
+def prewarm(names: Optional[Iterable[str]] = None) -> threading.Thread:
+    """Build agents in a background thread so the first requests don't pay for it."""
+    def _warm():
+        for name in list(names or _specs):
+            try:
+                get_agent(name)
+            except Exception as e:
+                print(f"Agent prewarm failed for {name}: {e}")
+
+    thread = threading.Thread(target=_warm, name="agent-prewarm", daemon=True)
+    thread.start()
+    return thread
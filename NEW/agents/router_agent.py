@@ -1,26 +1,32 @@
+import contextvars
 import json
+import os
+import re
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
 from langchain.prompts import PromptTemplate
 from langchain.agents import AgentExecutor, create_react_agent
-from langchain.memory import ConversationBufferWindowMemory
 from langchain_core.pydantic_v1 import BaseModel, Field
 from langchain_core.tools import Tool
 
 # Corrected imports using absolute paths from the project root
-from ..config.llm import get_llm
-from ..config.prompts import import_get_react_prompt
-from ..tools.base_tool import register_tool, BaseTool
-from ..tools.analytics_tools import TextToSQLTool
-from ..tools.inventory_tools import InventoryReadTool, InventoryWriteTool, InventoryForecastTool
-from ..tools.anomaly_detector_tool import AnomalyDetectorTool
-from ..tools.sales_rag_tool import SalesRAGTool
-
-# Relative imports for other agents in the same folder are correct
-from .analytics_agent import analytics_executor
-from .inventory_agent import inventory_executor
-from .finance_agent import finance_executor
-from .sales_agent import sales_executor
-
-llm = get_llm()
+from config.llm import get_llm
+from config.metrics import span
+from config.classifier import get_classifier, tokenize, CONFIDENCE_THRESHOLD, DOMAINS, DOMAIN_KEYWORDS
+from config.prompts import import_get_react_prompt
+from tools.base_tool import register_tool, BaseTool
+from tools.analytics_tools import TextToSQLTool
+from tools.anomaly_detector_tool import AnomalyDetectorTool
+from tools.sales_rag_tool import SalesRAGTool
+
+# Specialist agents are imported and built on first use, not at import time
+from .registry import register_agent, get_agent
+
+register_agent("analytics", ".analytics_agent:build_analytics_executor")
+register_agent("inventory", ".inventory_agent:build_inventory_executor")
+register_agent("finance", ".intent_executors:build_finance_executor")
+register_agent("sales", ".intent_executors:build_sales_executor")
+register_agent("router", ".router_agent:build_router_executor")
 
 # Define the router tool functions
 @register_tool
@@ -32,38 +38,169 @@ class ClassifyAndRouteTool(BaseTool):
     The input to this tool is the original user query.
     """
     def run(self, query: str):
-        # A simple keyword-based router, which can be improved with an LLM call
-        query_lower = query.lower()
-        if "analytics" in query_lower or "report" in query_lower or "data" in query_lower or "business intelligence" in query_lower or "sql" in query_lower:
-            return "analytics_agent"
-        elif "inventory" in query_lower or "stock" in query_lower or "product" in query_lower or "level" in query_lower or "unit" in query_lower or "forecast" in query_lower:
-            return "inventory_agent"
-        elif "sales" in query_lower or "customer" in query_lower or "feedback" in query_lower or "sentiment" in query_lower:
-            return "sales_agent"
-        elif "finance" in query_lower or "payment" in query_lower or "invoice" in query_lower or "transaction" in query_lower or "anomaly" in query_lower or "fraud" in query_lower:
-            return "finance_agent"
-        else:
-            return "general"
+        with span("router", "local_classify"):
+            domain, confidence = get_classifier().predict(query)
+        if confidence < CONFIDENCE_THRESHOLD:
+            with span("router", "llm_classify"):
+                llm_domain = llm_classify_domain(query)
+            # Keep the local best guess when the LLM fails or answers off-list
+            if llm_domain in DOMAINS:
+                domain = llm_domain
+        return f"{domain}_agent" if domain in DOMAINS else "general"
+
+def llm_classify_domain(query: str) -> str:
+    """Fallback for low-confidence local classifications."""
+    prompt = f"""
+    Classify the following ERP user request into one domain:
+    - sales
+    - finance
+    - inventory
+    - analytics
+
+    Request: "{query}"
+    Answer with only one domain.
+    """
+    try:
+        return get_llm().invoke(prompt).content.strip().lower()
+    except Exception as e:
+        print(f"LLM classification error: {e}")
+        return "general"
 
 def get_system_info():
     """Provides a list of available specialized agents."""
-    return "Available agents: analytics_agent, inventory_agent, finance_agent, sales_agent."
+    return ("Available agents: analytics_agent, inventory_agent, finance_agent, sales_agent. "
+            "Multi-domain questions can be answered in parallel with execute_multi_domain.")
 
 def execute_with_analytics_agent(query: str):
     """Executes a query with the analytics agent."""
-    return analytics_executor.invoke({"input": query})['output']
+    from .analytics_agent import analytics_inputs
+    return get_agent("analytics").invoke(analytics_inputs(query))['output']
 
 def execute_with_inventory_agent(query: str):
     """Executes a query with the inventory agent."""
-    return inventory_executor.invoke({"input": query})['output']
+    return get_agent("inventory").invoke({"input": query})['output']
 
 def execute_with_finance_agent(query: str):
     """Executes a query with the finance agent."""
-    return finance_executor.invoke({"input": query})['output']
+    return get_agent("finance").invoke({"input": query})['output']
 
 def execute_with_sales_agent(query: str):
     """Executes a query with the sales agent."""
-    return sales_executor.invoke({"input": query})['output']
+    return get_agent("sales").invoke({"input": query})['output']
+
+DOMAIN_EXECUTORS = {
+    "analytics": execute_with_analytics_agent,
+    "inventory": execute_with_inventory_agent,
+    "finance": execute_with_finance_agent,
+    "sales": execute_with_sales_agent,
+}
+
+# Multi-domain fan-out: independent sub-queries run concurrently, so latency is
+# bounded by the slowest branch instead of the sum of the chain.
+FANOUT_BRANCH_TIMEOUT = float(os.getenv("FANOUT_BRANCH_TIMEOUT", "60"))
+_fanout_pool = ThreadPoolExecutor(max_workers=int(os.getenv("FANOUT_MAX_WORKERS", "8")),
+                                  thread_name_prefix="fanout")
+
+def _keyword_domains(query: str):
+    tokens = set(tokenize(query))
+    return [d for d in DOMAINS if any(set(tokenize(k)) <= tokens for k in DOMAIN_KEYWORDS[d])]
+
+def decompose_query(query: str) -> dict:
+    """Split a request into {domain: sub_query}, one independent sub-query per domain."""
+    prompt = f"""
+    Split the following ERP request into independent sub-questions, one per domain that is needed.
+    Domains: sales (customers, leads, orders), finance (invoices, payments, anomalies),
+    inventory (stock, products, forecasts), analytics (reports, SQL over business data).
+    Each sub-question must be answerable on its own, without the other answers.
+
+    Request: "{query}"
+    Answer with only a JSON object mapping domain to sub-question.
+    """
+    try:
+        text = get_llm().invoke(prompt).content
+        parsed = json.loads(re.search(r"\{.*\}", text, re.S).group(0))
+        branches = {d.lower(): str(q) for d, q in parsed.items() if d.lower() in DOMAINS and q}
+        if branches:
+            return branches
+    except Exception as e:
+        print(f"Query decomposition error: {e}")
+    # Fall back to sending the whole request to every domain it mentions
+    domains = _keyword_domains(query) or [get_classifier().predict(query)[0]]
+    return {d: query for d in domains}
+
+def merge_answers(query: str, results: dict) -> str:
+    """Combine per-domain answers into one response."""
+    answered = {d: r for d, r in results.items() if r["ok"]}
+    if len(answered) == 1:
+        return next(iter(answered.values()))["output"]
+    sections = "\n\n".join(f"[{d}] {r['output']}" for d, r in results.items())
+    if not answered:
+        return sections
+    prompt = f"""
+    Answer the user's request by combining the findings from each ERP domain below.
+    Mention any domain that failed or timed out.
+
+    Request: "{query}"
+
+    {sections}
+    """
+    try:
+        return get_llm().invoke(prompt).content
+    except Exception as e:
+        print(f"Answer merge error: {e}")
+        return sections
+
+def _run_branch(started: dict, domain: str, query: str):
+    started[domain] = time.monotonic()
+    return DOMAIN_EXECUTORS[domain](query)
+
+def fan_out(query: str, timeout: float = None) -> dict:
+    """
+    Run the per-domain sub-queries of `query` concurrently.
+
+    Returns {"output": merged answer, "branches": {domain: {"query", "ok", "output"}}}.
+    Each branch gets `timeout` seconds from when it starts running, plus up to
+    `timeout` seconds queued for a free worker in the shared pool. A branch that
+    overruns is reported as timed out (its worker thread is left to finish in the
+    background); one that never got a worker is cancelled and reported as not started.
+    """
+    timeout = FANOUT_BRANCH_TIMEOUT if timeout is None else timeout
+    branches = decompose_query(query)
+    started = {}
+    submitted = time.monotonic()
+    # copy_context keeps the request's trace ID in the worker threads
+    futures = {d: _fanout_pool.submit(contextvars.copy_context().run, _run_branch, started, d, q)
+               for d, q in branches.items()}
+    pending = dict(futures)
+    while pending:
+        now = time.monotonic()
+        deadlines = {}
+        for domain, future in list(pending.items()):
+            deadline = started.get(domain, submitted) + timeout
+            # cancel() only succeeds while the branch is still queued; one that has
+            # just picked up a worker gets its own full timeout from when it started
+            if future.done() or (deadline <= now and (future.cancel() or started.get(domain, now) + timeout <= now)):
+                del pending[domain]
+            else:
+                deadlines[domain] = max(deadline, now)
+        if pending:
+            wait(pending.values(), timeout=min(deadlines.values()) - now, return_when=FIRST_COMPLETED)
+    results = {}
+    for domain, future in futures.items():
+        if future.cancelled():
+            results[domain] = {"ok": False, "output": f"not started: no free worker after {timeout:g}s"}
+        elif not future.done():
+            results[domain] = {"ok": False, "output": f"timed out after {timeout:g}s"}
+        elif future.exception():
+            results[domain] = {"ok": False, "output": f"error: {future.exception()}"}
+        else:
+            results[domain] = {"ok": True, "output": future.result()}
+        results[domain]["query"] = branches[domain]
+    return {"output": merge_answers(query, results), "branches": results}
+
+def execute_multi_domain(query: str):
+    """Executes a query spanning several domains with the specialist agents in parallel."""
+    return fan_out(query)["output"]
 
 # Define tools for the router agent
 tools = [
@@ -91,17 +228,19 @@ tools = [
         name="execute_with_sales_agent",
         func=execute_with_sales_agent,
         description="Executes a query with the sales agent. Use for queries about customers or sales-related information."
+    ),
+    Tool(
+        name="execute_multi_domain",
+        func=execute_multi_domain,
+        description="Answers a query that needs several domains at once (e.g. customers with overdue invoices and low stock) by running the specialist agents in parallel. Prefer this over calling several execute_with_* tools in sequence."
     )
 ]
 
-# Set up the memory for the router agent
-memory = ConversationBufferWindowMemory(k=5, return_messages=True)
-
-# Create the router agent
-router_executor = AgentExecutor(
-    agent=create_react_agent(llm, tools, import_get_react_prompt()),
-    tools=tools,
-    memory=memory,
-    verbose=True,
-    handle_parsing_errors=True
-)
+# Create the router agent on first use
+def build_router_executor():
+    return AgentExecutor(
+        agent=create_react_agent(get_llm(), tools, import_get_react_prompt()),
+        tools=tools,
+        verbose=True,
+        handle_parsing_errors=True
+    )
@@ -1,13 +1,16 @@
 ﻿from typing import Dict, Any
-from ..tools.sales_sql_tool import SalesSQLTool
-from ..tools.sales_rag_tool import SalesRAGTool
-from ..tools.lead_score_tool import LeadScoreTool
+from tools.sales_sql_tool import SalesSQLTool
+from tools.sales_rag_tool import SalesRAGTool
+from tools.lead_score_tool import LeadScoreTool
+# Same module as inventory_tools: one stock_cache module means one cache per database
+from tools.stock_cache import get_stock_cache
 
 class SalesAgent:
     def __init__(self, db_path: str, lead_model_path: str = None):
         self.sql = SalesSQLTool(db_path)
         self.rag = SalesRAGTool(db_path)
         self.scorer = LeadScoreTool(lead_model_path)
+        self.stock_cache = get_stock_cache(db_path)
     def handle(self, intent: str, data: Dict[str, Any]) -> Dict[str, Any]:
         if intent == "add_lead":
             q = """INSERT INTO leads(name,email,source,status,notes,created_at)
@@ -48,6 +51,7 @@ class SalesAgent:
             total = price * qty
             self.sql.run({"op":"write","query":"UPDATE orders SET total_amount=?, status='open' WHERE order_id=?","params":[total, order_id]})
             self.sql.run({"op":"write","query":"UPDATE leads SET status='converted' WHERE lead_id=?","params":[lead_id]})
+            self.stock_cache.invalidate(product_id)
             return {"ok": True, "order_id": order_id, "customer_id": customer_id, "total": total}
         if intent == "search_docs":
             return self.rag.run({"query": data.get("q",""), "k": data.get("k", 3)})
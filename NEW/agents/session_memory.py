@@ -0,0 +1,155 @@
+import threading
+from collections import OrderedDict
+from typing import Callable, Dict, List, Optional, Tuple
+
+from langchain.memory import ConversationBufferWindowMemory
+
+from config.database import get_connection
+
+Turn = Tuple[str, str]  # (user input, agent output)
+
+
+def _ensure_table(conn):
+    conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS conversations (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            user_id INTEGER NOT NULL,
+            session_id TEXT NOT NULL,
+            message_type TEXT NOT NULL CHECK(message_type IN ('user', 'agent', 'system')),
+            content TEXT NOT NULL,
+            agent_name TEXT,
+            metadata TEXT,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+        """
+    )
+
+
+def load_turns(session_id: str, limit: int) -> List[Turn]:
+    """Last `limit` turns of a session from the conversations table (user/agent rows)."""
+    with get_connection() as conn:
+        _ensure_table(conn)
+        rows = conn.execute(
+            "SELECT message_type, content FROM conversations WHERE session_id = ? "
+            "AND message_type IN ('user', 'agent') ORDER BY id DESC LIMIT ?",
+            (session_id, limit * 2),
+        ).fetchall()
+    turns, pending_user = [], None
+    for message_type, content in reversed(rows):
+        if message_type == "user":
+            pending_user = content
+        elif pending_user is not None:
+            turns.append((pending_user, content))
+            pending_user = None
+    return turns[-limit:]
+
+
+def spill_turns(session_id: str, user_id, turns: List[Turn], agent: str = "router"):
+    """Append turns to the conversations table as user/agent message pairs."""
+    rows = []
+    for user_input, output in turns:
+        rows.append((user_id, session_id, "user", user_input, None))
+        rows.append((user_id, session_id, "agent", output, agent))
+    with get_connection() as conn:
+        _ensure_table(conn)
+        conn.executemany(
+            "INSERT INTO conversations (user_id, session_id, message_type, content, agent_name) VALUES (?, ?, ?, ?, ?)",
+            rows,
+        )
+        conn.commit()
+
+
+class _Session:
+    __slots__ = ("memory", "user_id", "unsaved")
+
+    def __init__(self, memory, user_id):
+        self.memory = memory
+        self.user_id = user_id
+        self.unsaved: List[Turn] = []
+
+
+class SessionMemoryStore:
+    """
+    Conversation memory per session with a bounded number of resident sessions.
+
+    Each session gets its own ConversationBufferWindowMemory(k). Past
+    max_sessions, the least recently used session is evicted and its unsaved
+    turns are spilled through `spiller`; a later request for that session
+    rehydrates the last k turns through `loader`. Pass spiller=None when
+    turns are already persisted elsewhere (e.g. by conversation logging).
+    """
+
+    def __init__(self, max_sessions: int = 256, k: int = 5,
+                 loader: Optional[Callable[[str, int], List[Turn]]] = load_turns,
+                 spiller: Optional[Callable[[str, object, List[Turn]], None]] = spill_turns):
+        self.max_sessions = max_sessions
+        self.k = k
+        self.loader = loader
+        self.spiller = spiller
+        self._sessions: "OrderedDict[str, _Session]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _new_session(self, session_id: str, user_id) -> _Session:
+        memory = ConversationBufferWindowMemory(k=self.k)
+        if self.loader:
+            try:
+                for user_input, output in self.loader(session_id, self.k):
+                    memory.save_context({"input": user_input}, {"output": output})
+            except Exception as e:
+                print(f"Session memory rehydrate error: {e}")
+        return _Session(memory, user_id)
+
+    def _session(self, session_id: str, user_id=None) -> _Session:
+        with self._lock:
+            session = self._sessions.get(session_id)
+            if session is not None:
+                self._sessions.move_to_end(session_id)
+                return session
+        # Rehydrate outside the lock so a slow read doesn't stall other sessions
+        fresh = self._new_session(session_id, user_id)
+        evicted = []
+        with self._lock:
+            session = self._sessions.setdefault(session_id, fresh)
+            self._sessions.move_to_end(session_id)
+            while len(self._sessions) > self.max_sessions:
+                evicted.append(self._sessions.popitem(last=False))
+        for evicted_id, old in evicted:
+            self._spill(evicted_id, old)
+        return session
+
+    def _spill(self, session_id: str, session: _Session):
+        turns, session.unsaved = session.unsaved, []
+        if self.spiller and turns:
+            try:
+                self.spiller(session_id, session.user_id, turns)
+            except Exception as e:
+                print(f"Session memory spill error: {e}")
+
+    def get(self, session_id: str, user_id=None) -> ConversationBufferWindowMemory:
+        return self._session(session_id, user_id).memory
+
+    def history(self, session_id: str, user_id=None) -> str:
+        """The session's recent turns formatted for a prompt."""
+        return self.get(session_id, user_id).load_memory_variables({})["history"]
+
+    def save_turn(self, session_id: str, user_input: str, output: str, user_id=None):
+        session = self._session(session_id, user_id)
+        memory = session.memory
+        memory.save_context({"input": user_input}, {"output": output})
+        # The window only reads the last k turns; drop older messages from RAM
+        del memory.chat_memory.messages[:-2 * self.k]
+        if self.spiller:
+            session.unsaved.append((user_input, output))
+            if len(session.unsaved) >= self.k:
+                self._spill(session_id, session)
+
+    def flush(self):
+        """Spill every resident session's unsaved turns (call on shutdown)."""
+        with self._lock:
+            sessions = list(self._sessions.items())
+        for session_id, session in sessions:
+            self._spill(session_id, session)
+
+    def __len__(self):
+        return len(self._sessions)
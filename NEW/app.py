@@ -1,20 +1,64 @@
 import streamlit as st
 import requests
 import json
+import os
+import time
+import uuid
 
 # FastAPI backend URL - this will be the service name 'backend' in Docker Compose
-API_URL = "http://backend:8000"
+API_URL = os.getenv("API_URL", "http://backend:8000")
+API_POOL_SIZE = int(os.getenv("API_POOL_SIZE", "32"))
+HISTORY_WINDOW = 20  # messages rendered per rerun; older ones on request
+REPAINT_SECONDS = 0.05  # minimum gap between redraws of a streaming answer
+
+@st.cache_resource
+def get_api_session():
+    """One keep-alive connection pool shared by every browser session of this server."""
+    session = requests.Session()
+    adapter = requests.adapters.HTTPAdapter(pool_connections=1, pool_maxsize=API_POOL_SIZE)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+@st.cache_data(max_entries=1000)
+def parse_chart(chart_spec):
+    return json.loads(chart_spec)
+
+def render_message(message):
+    with st.chat_message(message["role"]):
+        st.markdown(message["content"])
+        if message.get("chart_spec"):
+            st.altair_chart(parse_chart(message["chart_spec"]), use_container_width=True)
 
 st.title("Helios Dynamics Agent-Driven ERP")
 
-# Initialize chat history
+# Initialize chat history; the session id keeps each user's conversation memory separate on the backend
 if "messages" not in st.session_state:
     st.session_state.messages = []
+    st.session_state.session_id = uuid.uuid4().hex
+    st.session_state.history_window = HISTORY_WINDOW
 
-# Display chat messages from history
-for message in st.session_state.messages:
-    with st.chat_message(message["role"]):
-        st.markdown(message["content"])
+# Display the most recent messages from history
+messages = st.session_state.messages
+hidden = max(0, len(messages) - st.session_state.history_window)
+if hidden and st.button(f"Show earlier messages ({hidden} hidden)"):
+    st.session_state.history_window += HISTORY_WINDOW
+    st.rerun()
+for message in messages[hidden:]:
+    render_message(message)
+
+def stream_chat(prompt):
+    """Yield (event, data) pairs from the backend's Server-Sent Events stream."""
+    with get_api_session().post(f"{API_URL}/api/chat/stream", params={"query": prompt},
+                                headers={"X-Session-ID": st.session_state.session_id},
+                                stream=True, timeout=(5, 300)) as response:
+        response.raise_for_status()
+        event = "message"
+        for line in response.iter_lines(decode_unicode=True):
+            if line.startswith("event:"):
+                event = line[len("event:"):].strip()
+            elif line.startswith("data:"):
+                yield event, json.loads(line[len("data:"):])
 
 # Accept user input
 if prompt := st.chat_input("What can I help you with?"):
@@ -23,22 +67,47 @@ if prompt := st.chat_input("What can I help you with?"):
         st.markdown(prompt)
 
     with st.chat_message("assistant"):
-        with st.spinner("Thinking..."):
-            try:
-                # Send the prompt to the backend
-                response = requests.post(f"{API_URL}/chat", json={"prompt": prompt})
-                response.raise_for_status()
-                assistant_response = response.json().get("response", "No response from agent.")
-
-                st.markdown(assistant_response)
-                st.session_state.messages.append({"role": "assistant", "content": assistant_response})
-
-                # Handle visualizations if the response contains a chart spec
-                if "chart_spec" in response.json():
-                    chart_spec = response.json()["chart_spec"]
-                    st.altair_chart(json.loads(chart_spec), use_container_width=True)
-
-            except requests.exceptions.ConnectionError:
-                st.error("Could not connect to the backend server. Please ensure the backend is running.")
-            except Exception as e:
-                st.error(f"An error occurred: {e}")
\ No newline at end of file
+        status = st.status("Thinking...", expanded=False)
+        answer_box = st.empty()
+        answer, chart_spec, painted = "", None, 0.0
+        try:
+            # Render agent steps and answer tokens as the backend produces them
+            for event, data in stream_chat(prompt):
+                if event == "step":
+                    status.write(f"Using `{data['tool']}`: {data['input']}")
+                elif event == "observation":
+                    status.write(data["output"])
+                elif event == "token":
+                    answer += data["text"]
+                    if time.monotonic() - painted >= REPAINT_SECONDS:
+                        answer_box.markdown(answer + "▌")
+                        painted = time.monotonic()
+                elif event == "final":
+                    answer = answer or str(data.get("output", ""))
+                    chart_spec = data.get("chart_spec")
+                elif event == "error":
+                    raise RuntimeError(data["error"])
+            status.update(label="Done", state="complete")
+
+            assistant_response = answer or "No response from agent."
+            answer_box.markdown(assistant_response)
+            # Keep the chart with its message so reruns redraw it from the parsed-spec cache
+            st.session_state.messages.append({"role": "assistant", "content": assistant_response,
+                                              "chart_spec": chart_spec})
+
+            # Handle visualizations if the response contains a chart spec
+            if chart_spec:
+                st.altair_chart(parse_chart(chart_spec), use_container_width=True)
+
+        except requests.exceptions.ConnectionError:
+            status.update(label="Failed", state="error")
+            st.error("Could not connect to the backend server. Please ensure the backend is running.")
+        except requests.exceptions.HTTPError as e:
+            status.update(label="Failed", state="error")
+            if e.response is not None and e.response.status_code == 429:
+                st.warning("The assistant is busy right now. Please try again in a moment.")
+            else:
+                st.error(f"An error occurred: {e}")
+        except Exception as e:
+            status.update(label="Failed", state="error")
+            st.error(f"An error occurred: {e}")
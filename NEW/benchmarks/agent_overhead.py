@@ -0,0 +1,137 @@
+"""
+Offline benchmark of per-request overhead in the agent stack.
+
+Runs against the fake LLM backend (config/fake_llm.py), so no network or API
+key is involved and LLM time is whatever FAKE_LLM_LATENCY_MS says (0 by
+default). Each stage wraps the one below it:
+
+    db      one query through config.database.get_connection
+    tool    local classify_and_route + schema digest for the question
+    agent   the specialist agent for the question's domain
+    router  the full router ReAct loop (classify, delegate, answer)
+
+For every stage it reports p50/p95/p99 latency, fake LLM calls per request
+and, from a separate tracemalloc pass, the net and peak bytes allocated per
+request. From the NEW directory:
+    python -m benchmarks.agent_overhead --iterations 200 --json results.json
+"""
+import argparse
+import json
+import os
+import time
+import tracemalloc
+
+os.environ.setdefault("ERP_LLM_BACKEND", "fake")
+os.environ.setdefault("LLM_CACHE_ENABLED", "0")
+os.environ.setdefault("AGENT_PREWARM", "0")
+
+from config.classifier import SAMPLE_QUERIES
+from config.database import get_connection
+from config.llm import get_llm
+from agents.registry import get_agent
+from agents.router_agent import ClassifyAndRouteTool, DOMAIN_EXECUTORS
+from tools.schema_digest import build_sql_context
+
+
+def percentile(samples, pct):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+
+def db_stage(query, domain):
+    with get_connection() as conn:
+        conn.execute("SELECT COUNT(*) FROM customers").fetchone()
+
+
+def tool_stage(query, domain):
+    ClassifyAndRouteTool().run(query)
+    build_sql_context(query)
+
+
+def agent_stage(query, domain):
+    DOMAIN_EXECUTORS[domain](query)
+
+
+def router_stage(query, domain):
+    get_agent("router").invoke({"input": query})
+
+
+STAGES = {"db": db_stage, "tool": tool_stage, "agent": agent_stage, "router": router_stage}
+
+
+def measure(fn, iterations: int, warmup: int):
+    llm = get_llm()
+    errors = 0
+    for i in range(warmup):
+        query, domain = SAMPLE_QUERIES[i % len(SAMPLE_QUERIES)]
+        try:
+            fn(query, domain)
+        except Exception:
+            pass
+
+    latencies, calls_before = [], llm.calls
+    for i in range(iterations):
+        query, domain = SAMPLE_QUERIES[i % len(SAMPLE_QUERIES)]
+        start = time.perf_counter()
+        try:
+            fn(query, domain)
+        except Exception as e:
+            errors += 1
+            last_error = str(e)
+        latencies.append(time.perf_counter() - start)
+    llm_calls = (llm.calls - calls_before) / iterations
+
+    # Allocation pass is separate: tracing slows every call down
+    net, peak = [], []
+    tracemalloc.start()
+    for i in range(min(iterations, 50)):
+        query, domain = SAMPLE_QUERIES[i % len(SAMPLE_QUERIES)]
+        before, _ = tracemalloc.get_traced_memory()
+        tracemalloc.reset_peak()
+        try:
+            fn(query, domain)
+        except Exception:
+            pass
+        after, high = tracemalloc.get_traced_memory()
+        net.append(after - before)
+        peak.append(high - before)
+    tracemalloc.stop()
+
+    result = {
+        "iterations": iterations,
+        "errors": errors,
+        "p50_ms": percentile(latencies, 50) * 1000,
+        "p95_ms": percentile(latencies, 95) * 1000,
+        "p99_ms": percentile(latencies, 99) * 1000,
+        "llm_calls_per_request": llm_calls,
+        "alloc_net_kib": sum(net) / len(net) / 1024,
+        "alloc_peak_kib": max(peak) / 1024,
+    }
+    if errors:
+        result["last_error"] = last_error
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline router/agent/tool/DB overhead benchmark.")
+    parser.add_argument("--iterations", type=int, default=100)
+    parser.add_argument("--warmup", type=int, default=10)
+    parser.add_argument("--stages", default=",".join(STAGES), help="comma-separated subset of " + ",".join(STAGES))
+    parser.add_argument("--json", help="write results to this file")
+    args = parser.parse_args()
+
+    results = {}
+    print(f"{'stage':<8}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'llm/req':>9}{'net KiB':>10}{'peak KiB':>10}{'errors':>8}")
+    for name in args.stages.split(","):
+        r = results[name] = measure(STAGES[name], args.iterations, args.warmup)
+        print(f"{name:<8}{r['p50_ms']:>10.2f}{r['p95_ms']:>10.2f}{r['p99_ms']:>10.2f}{r['llm_calls_per_request']:>9.1f}"
+              f"{r['alloc_net_kib']:>10.1f}{r['alloc_peak_kib']:>10.1f}{r['errors']:>8}")
+        if r["errors"]:
+            print(f"  last error: {r['last_error']}")
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({"fake_llm_latency_ms": float(os.getenv("FAKE_LLM_LATENCY_MS", "0")), "stages": results}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+"""
+Concurrent load test for POST /api/chat.
+
+Fires `--requests` chat calls from `--concurrency` parallel clients and
+reports throughput, latency percentiles and the status-code mix (429s show
+the limiter shedding load). Start the API first, then from the NEW directory:
+    python -m benchmarks.chat_load --url http://localhost:8000 --concurrency 16 --requests 64
+"""
+import argparse
+import statistics
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+
+def percentile(samples, pct):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+
+def run(url: str, query: str, concurrency: int, total: int):
+    session = requests.Session()
+    session.mount("http://", requests.adapters.HTTPAdapter(pool_maxsize=concurrency))
+
+    def one(_):
+        start = time.perf_counter()
+        try:
+            status = session.post(f"{url}/api/chat", params={"query": query}, timeout=300).status_code
+        except requests.RequestException:
+            status = "error"
+        return status, time.perf_counter() - start
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        results = list(pool.map(one, range(total)))
+    elapsed = time.perf_counter() - start
+
+    latencies = [lat for status, lat in results if status == 200]
+    print(f"concurrency={concurrency} requests={total} wall={elapsed:.2f}s "
+          f"throughput={len(latencies) / elapsed:.2f} ok/s")
+    print(f"status codes: {dict(Counter(status for status, _ in results))}")
+    if latencies:
+        print(f"latency ms: p50={percentile(latencies, 50) * 1000:.0f} "
+              f"p95={percentile(latencies, 95) * 1000:.0f} mean={statistics.mean(latencies) * 1000:.0f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test the chat endpoint.")
+    parser.add_argument("--url", default="http://localhost:8000")
+    parser.add_argument("--query", default="How many customers do we have?")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--requests", type=int, default=32)
+    args = parser.parse_args()
+    run(args.url, args.query, args.concurrency, args.requests)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,341 @@
+"""
+Deterministic synthetic ERP dataset for load and scale testing.
+
+Creates the seed_data.sql schema (plus the `stock` and `stock_movements`
+tables the inventory tools read) and streams referentially consistent rows
+into it:
+
+    customers, leads, products, tickets, documents
+    orders -> order_items -> stock_movements (sales), stock
+           -> invoices -> invoice_lines, invoice_orders
+                       -> payments -> payment_allocations
+           -> ledger_entries -> ledger_lines (invoice: AR/revenue, payment: cash/AR)
+
+Order totals equal their items, invoices equal their orders, stock levels
+equal receipts minus sales, and every ledger entry balances. The same
+--seed and --scale always produce the same data. Scale 1 is about 1M rows;
+counts scale linearly (`--set orders=500000` overrides one table's base).
+Rows go in through executemany in chunks with journalling and syncing off;
+secondary indexes are built after the load.
+
+From the NEW directory:
+    python -m benchmarks.generate_data --db /tmp/erp_10m.db --scale 10
+"""
+import argparse
+import random
+import sqlite3
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Dict, List
+
+NEW_DIR = Path(__file__).resolve().parents[1]
+
+# Rows per unit of --scale for the independently sized tables
+BASE_COUNTS = {
+    "customers": 20_000,
+    "leads": 10_000,
+    "products": 2_000,
+    "orders": 60_000,
+    "receipts": 20_000,
+    "tickets": 5_000,
+    "documents": 1_000,
+}
+WAREHOUSES = ("WH-A", "WH-B", "WH-C")
+
+EXTRA_TABLES = [
+    """CREATE TABLE IF NOT EXISTS stock (stock_id INTEGER PRIMARY KEY AUTOINCREMENT, product_id INTEGER
+       REFERENCES products(product_id), warehouse_location TEXT, quantity INTEGER, last_updated TEXT)""",
+    """CREATE TABLE IF NOT EXISTS stock_movements (movement_id INTEGER PRIMARY KEY AUTOINCREMENT, product_id INTEGER
+       REFERENCES products(product_id), warehouse_location TEXT, date TEXT, quantity INTEGER, reason TEXT,
+       order_id INTEGER)""",
+]
+INDEXES = [
+    "CREATE INDEX IF NOT EXISTS idx_orders_customer ON orders (customer_id)",
+    "CREATE INDEX IF NOT EXISTS idx_orders_created ON orders (created_at)",
+    "CREATE INDEX IF NOT EXISTS idx_order_items_order ON order_items (order_id)",
+    "CREATE INDEX IF NOT EXISTS idx_invoices_status ON invoices (status)",
+    "CREATE INDEX IF NOT EXISTS idx_invoice_lines_invoice ON invoice_lines (invoice_id)",
+    "CREATE INDEX IF NOT EXISTS idx_invoice_orders_order ON invoice_orders (order_id)",
+    "CREATE INDEX IF NOT EXISTS idx_payments_invoice ON payments (invoice_id)",
+    "CREATE INDEX IF NOT EXISTS idx_ledger_lines_entry ON ledger_lines (entry_id)",
+    "CREATE INDEX IF NOT EXISTS idx_stock_product ON stock (product_id, warehouse_location)",
+    "CREATE INDEX IF NOT EXISTS idx_stock_movements_product ON stock_movements (product_id, date)",
+    "CREATE INDEX IF NOT EXISTS idx_tickets_customer ON tickets (customer_id)",
+]
+ACCOUNTS = [("1000", "Cash", "asset"), ("1100", "Accounts Receivable", "asset"), ("4000", "Sales Revenue", "revenue")]
+
+FIRST = ["Aisha", "Omar", "Fatima", "Khalid", "Layla", "Yousef", "Mariam", "Hassan", "Noura", "Ali",
+         "Sara", "Ahmed", "Huda", "Tariq", "Reem", "Zaid", "Dana", "Faisal", "Lina", "Majid"]
+LAST = ["Al Mansoori", "Haddad", "Rahman", "Saleh", "Nasser", "Karim", "Aziz", "Farouk", "Hamdan", "Qasim"]
+SEGMENTS = ["smb", "enterprise", "public", "retail"]
+LEAD_SOURCES = ["web", "referral", "event", "cold_call", "partner"]
+LEAD_STATUS = ["new", "contacted", "qualified", "lost", "converted"]
+PRODUCT_KINDS = ["Solar Panel", "Inverter", "Battery Pack", "Charge Controller", "Mounting Kit", "Cable Set"]
+ORDER_STATUS = ["pending", "confirmed", "shipped", "delivered", "cancelled"]
+ORDER_WEIGHTS = [10, 15, 20, 50, 5]
+PAY_METHODS = ["bank_transfer", "card", "cash", "cheque"]
+DOC_CATEGORIES = ["faq", "manual", "policy", "glossary"]
+WORDS = ("invoice order customer payment stock warehouse approval return refund policy discount shipment "
+         "ledger account vendor product warranty delivery credit tax").split()
+
+
+def counts_for(scale: float, overrides: Dict[str, int]) -> Dict[str, int]:
+    base = dict(BASE_COUNTS, **overrides)
+    return {table: max(1, int(n * scale)) for table, n in base.items()}
+
+
+class BulkLoader:
+    """Buffers rows per table and writes them with executemany, committing every `commit_every` rows."""
+
+    def __init__(self, conn: sqlite3.Connection, chunk: int = 20_000, commit_every: int = 500_000):
+        self.conn = conn
+        self.chunk = chunk
+        self.commit_every = commit_every
+        self.rows: Dict[str, int] = {}
+        self._sql: Dict[str, str] = {}
+        self._buffers: Dict[str, List[tuple]] = {}
+        self._uncommitted = 0
+
+    def table(self, name: str, columns: str):
+        marks = ",".join("?" * len(columns.split(",")))
+        self._sql[name] = f"INSERT INTO {name} ({columns}) VALUES ({marks})"
+        self._buffers[name] = []
+        self.rows[name] = 0
+
+    def add(self, name: str, row: tuple):
+        buf = self._buffers[name]
+        buf.append(row)
+        if len(buf) >= self.chunk:
+            self._flush(name)
+
+    def _flush(self, name: str):
+        buf = self._buffers[name]
+        if not buf:
+            return
+        self.conn.executemany(self._sql[name], buf)
+        self.rows[name] += len(buf)
+        self._uncommitted += len(buf)
+        buf.clear()
+        if self._uncommitted >= self.commit_every:
+            self.conn.commit()
+            self._uncommitted = 0
+
+    def close(self):
+        for name in self._buffers:
+            self._flush(name)
+        self.conn.commit()
+
+
+def _next_id(conn, table: str, column: str) -> int:
+    return (conn.execute(f"SELECT COALESCE(MAX({column}), 0) FROM {table}").fetchone()[0] or 0) + 1
+
+
+def create_schema(conn: sqlite3.Connection):
+    sql = (NEW_DIR / "seed_data.sql").read_text(encoding="utf-8-sig")
+    for statement in sql.split(";"):
+        if statement.strip().upper().startswith("CREATE TABLE"):
+            conn.execute(statement)
+    for statement in EXTRA_TABLES:
+        conn.execute(statement)
+    conn.executemany("INSERT OR IGNORE INTO chart_of_accounts (account_code, name, type) VALUES (?, ?, ?)", ACCOUNTS)
+    conn.commit()
+
+
+def generate(db_path: str, scale: float = 1.0, seed: int = 42, overrides: Dict[str, int] = None,
+             end: str = "2025-06-30", days: int = 730) -> Dict[str, int]:
+    rng = random.Random(seed)
+    n = counts_for(scale, overrides or {})
+    end_dt = datetime.fromisoformat(end)
+    start_dt = end_dt - timedelta(days=days)
+    span_s = days * 86400
+
+    def when() -> datetime:
+        return start_dt + timedelta(seconds=rng.randrange(span_s))
+
+    conn = sqlite3.connect(db_path)
+    journal = conn.execute("PRAGMA journal_mode").fetchone()[0]
+    create_schema(conn)
+    for pragma in ("journal_mode = OFF", "synchronous = OFF", "cache_size = -262144", "temp_store = MEMORY",
+                   "locking_mode = EXCLUSIVE", "foreign_keys = OFF"):
+        conn.execute(f"PRAGMA {pragma}")
+
+    loader = BulkLoader(conn)
+    loader.table("customers", "customer_id, name, email, phone, segment, created_at")
+    loader.table("leads", "lead_id, name, email, source, status, notes, score, created_at")
+    loader.table("products", "product_id, sku, name, price, stock_qty")
+    loader.table("orders", "order_id, customer_id, status, total_amount, currency, created_at")
+    loader.table("order_items", "order_id, product_id, qty, unit_price")
+    loader.table("invoices", "invoice_id, vendor_id, invoice_no, date, currency, subtotal, tax, total, status, "
+                             "risk_score, created_at")
+    loader.table("invoice_lines", "invoice_id, product_id, qty, unit_price, tax_rate")
+    loader.table("invoice_orders", "invoice_id, order_id")
+    loader.table("payments", "payment_id, invoice_id, amount, method, paid_at")
+    loader.table("payment_allocations", "payment_id, invoice_id, amount")
+    loader.table("ledger_entries", "entry_id, date, description, total_debit, total_credit")
+    loader.table("ledger_lines", "entry_id, account_code, debit, credit")
+    loader.table("stock", "product_id, warehouse_location, quantity, last_updated")
+    loader.table("stock_movements", "product_id, warehouse_location, date, quantity, reason, order_id")
+    loader.table("tickets", "customer_id, subject, status, last_msg_at")
+    loader.table("documents", "title, body, category, updated_at")
+
+    # Appending to an existing database: continue every id sequence
+    cust0 = _next_id(conn, "customers", "customer_id")
+    lead0 = _next_id(conn, "leads", "lead_id")
+    prod0 = _next_id(conn, "products", "product_id")
+    order_id = _next_id(conn, "orders", "order_id")
+    invoice_id = _next_id(conn, "invoices", "invoice_id")
+    payment_id = _next_id(conn, "payments", "payment_id")
+    entry_id = _next_id(conn, "ledger_entries", "entry_id")
+    vendor_id = conn.execute("SELECT MIN(vendor_id) FROM vendors").fetchone()[0]
+    if vendor_id is None:
+        conn.execute("INSERT INTO vendors (vendor_id, name) VALUES (1, 'Default Vendor')")
+        vendor_id = 1
+
+    started = time.perf_counter()
+    for i in range(n["customers"]):
+        cid = cust0 + i
+        name = f"{rng.choice(FIRST)} {rng.choice(LAST)}"
+        loader.add("customers", (cid, name, f"customer{cid}@example.com", f"+971-5{rng.randrange(10**8):08d}",
+                                 rng.choice(SEGMENTS), when().isoformat(" ")))
+    for i in range(n["leads"]):
+        lid = lead0 + i
+        loader.add("leads", (lid, f"{rng.choice(FIRST)} {rng.choice(LAST)}", f"lead{lid}@example.com",
+                             rng.choice(LEAD_SOURCES), rng.choice(LEAD_STATUS), " ".join(rng.sample(WORDS, 5)),
+                             round(rng.random(), 3), when().isoformat(" ")))
+
+    prices, stock = [], {}
+    for i in range(n["products"]):
+        pid = prod0 + i
+        price = round(rng.uniform(5, 2000), 2)
+        prices.append(price)
+        for wh in WAREHOUSES:
+            stock[(pid, wh)] = 0
+        loader.add("products", (pid, f"SKU-{pid:07d}", f"{rng.choice(PRODUCT_KINDS)} {rng.randrange(100, 999)}",
+                                price, 0))
+
+    # Random receipts first; a sale that would take a slot negative gets a top-up receipt below
+    for _ in range(n["receipts"]):
+        pid, wh, qty = prod0 + rng.randrange(n["products"]), rng.choice(WAREHOUSES), rng.randint(20, 500)
+        stock[(pid, wh)] += qty
+        loader.add("stock_movements", (pid, wh, when().date().isoformat(), qty, "receipt", None))
+
+    for _ in range(n["orders"]):
+        oid = order_id
+        order_id += 1
+        created = when()
+        status = rng.choices(ORDER_STATUS, ORDER_WEIGHTS)[0]
+        items, total = [], 0.0
+        for _ in range(rng.randint(1, 5)):
+            idx = rng.randrange(n["products"])
+            qty = rng.randint(1, 10)
+            items.append((prod0 + idx, qty, prices[idx]))
+            total += qty * prices[idx]
+        total = round(total, 2)
+        loader.add("orders", (oid, cust0 + rng.randrange(n["customers"]), status, total, "USD",
+                              created.isoformat(" ")))
+        for pid, qty, price in items:
+            loader.add("order_items", (oid, pid, qty, price))
+        if status == "cancelled":
+            continue
+
+        wh = rng.choice(WAREHOUSES)
+        for pid, qty, _ in items:
+            if stock[(pid, wh)] < qty:
+                # Restock the shortfall (plus a batch) on or before the sale date
+                topup = qty - stock[(pid, wh)] + rng.randint(20, 500)
+                stock[(pid, wh)] += topup
+                restocked = created - timedelta(days=rng.randint(0, 14))
+                loader.add("stock_movements", (pid, wh, restocked.date().isoformat(), topup, "receipt", None))
+            stock[(pid, wh)] -= qty
+            loader.add("stock_movements", (pid, wh, created.date().isoformat(), -qty, "sale", oid))
+
+        if status == "pending" or rng.random() < 0.15:
+            continue
+        iid = invoice_id
+        invoice_id += 1
+        inv_date = created + timedelta(days=rng.randint(0, 5))
+        tax = round(total * 0.05, 2)
+        gross = round(total + tax, 2)
+        paid = rng.random() < 0.7
+        loader.add("invoices", (iid, vendor_id, f"INV-{iid:08d}", inv_date.date().isoformat(), "USD", total, tax,
+                                gross, "paid" if paid else rng.choice(["open", "open", "overdue"]),
+                                round(rng.random() ** 3, 3), inv_date.isoformat(" ")))
+        for pid, qty, price in items:
+            loader.add("invoice_lines", (iid, pid, qty, price, 0.05))
+        loader.add("invoice_orders", (iid, oid))
+        loader.add("ledger_entries", (entry_id, inv_date.date().isoformat(), f"Invoice INV-{iid:08d}", gross, gross))
+        loader.add("ledger_lines", (entry_id, "1100", gross, 0.0))
+        loader.add("ledger_lines", (entry_id, "4000", 0.0, gross))
+        entry_id += 1
+
+        if paid:
+            pay_id = payment_id
+            payment_id += 1
+            paid_at = inv_date + timedelta(days=rng.randint(1, 60))
+            loader.add("payments", (pay_id, iid, gross, rng.choice(PAY_METHODS), paid_at.isoformat(" ")))
+            loader.add("payment_allocations", (pay_id, iid, gross))
+            loader.add("ledger_entries", (entry_id, paid_at.date().isoformat(), f"Payment {pay_id}", gross, gross))
+            loader.add("ledger_lines", (entry_id, "1000", gross, 0.0))
+            loader.add("ledger_lines", (entry_id, "1100", 0.0, gross))
+            entry_id += 1
+
+    as_of = end_dt.isoformat(" ")
+    for (pid, wh), qty in stock.items():
+        loader.add("stock", (pid, wh, qty, as_of))
+    for i in range(n["tickets"]):
+        loader.add("tickets", (cust0 + rng.randrange(n["customers"]), f"Question about {rng.choice(WORDS)}",
+                               rng.choice(["open", "pending", "closed"]), when().isoformat(" ")))
+    for i in range(n["documents"]):
+        category = rng.choice(DOC_CATEGORIES)
+        body = " ".join(rng.choice(WORDS) for _ in range(rng.randint(40, 200)))
+        loader.add("documents", (f"{category.title()} {i} - {rng.choice(WORDS)}", body, category,
+                                 when().date().isoformat()))
+    loader.close()
+
+    # products.stock_qty is the total across warehouses
+    totals: Dict[int, int] = {}
+    for (pid, _), qty in stock.items():
+        totals[pid] = totals.get(pid, 0) + qty
+    conn.executemany("UPDATE products SET stock_qty = ? WHERE product_id = ?", [(q, p) for p, q in totals.items()])
+    load_s = time.perf_counter() - started
+
+    started = time.perf_counter()
+    for statement in INDEXES:
+        conn.execute(statement)
+    conn.execute("ANALYZE")
+    conn.commit()
+    index_s = time.perf_counter() - started
+
+    conn.execute("PRAGMA locking_mode = NORMAL")
+    conn.execute(f"PRAGMA journal_mode = {journal}")
+    conn.close()
+    total = sum(loader.rows.values())
+    return dict(loader.rows, total_rows=total, load_seconds=round(load_s, 1), index_seconds=round(index_s, 1),
+                rows_per_second=int(total / load_s) if load_s else 0)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate a deterministic synthetic ERP dataset.")
+    parser.add_argument("--db", required=True, help="SQLite file to create or append to")
+    parser.add_argument("--scale", type=float, default=1.0, help="1.0 is roughly one million rows")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--end", default="2025-06-30", help="last day of the generated history")
+    parser.add_argument("--days", type=int, default=730, help="length of the generated history")
+    parser.add_argument("--set", action="append", default=[], metavar="TABLE=N",
+                        help="override a base count (" + ", ".join(BASE_COUNTS) + ")")
+    args = parser.parse_args()
+
+    overrides = {}
+    for item in args.set:
+        table, _, value = item.partition("=")
+        if table not in BASE_COUNTS:
+            parser.error(f"unknown table for --set: {table}")
+        overrides[table] = int(value)
+    result = generate(args.db, args.scale, args.seed, overrides, args.end, args.days)
+    for key, value in result.items():
+        print(f"{key}: {value}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,365 @@
+"""
+Async HTTP load generator for the API.
+
+Replays a weighted mix of chat (POST /api/chat) and intent
+(POST /api/intents/...) requests, stepping through increasing concurrency
+levels for a fixed duration each. With --rate, arrivals are open-loop at
+that many requests/s (capped at the stage's concurrency in flight);
+without it every client sends its next request as soon as the previous one
+returns. Each stage reports throughput, p50/p99 latency and error rate,
+overall and per request kind.
+
+While a stage runs, /api/health is sampled for the chat limiter (slots in
+flight, queue depth, rejections), coalescing, LLM cache and log writer
+queues, and /metrics is diffed before and after for the server-side time
+spent per span kind (llm, tool, sql, ...).
+
+--spawn starts uvicorn on a free port with the fake LLM backend, so the run
+needs no API key or network, against a fresh copy of a generated dataset
+(benchmarks/generate_data.py at --scale, cached in --data-dir like
+tools_bench) so the chat and intent SQL has real tables. Otherwise point
+--url at a server started with ERP_LLM_BACKEND=fake and a populated
+ERP_DB_PATH. An intent answering 200 with {"ok": false} counts as an error.
+From the NEW directory:
+    python -m benchmarks.http_load --spawn --concurrency 1,4,16,64 --duration 20
+    python -m benchmarks.http_load --url http://localhost:8000 --mix chat=1 --rate 20 --json load.json
+"""
+import argparse
+import asyncio
+import itertools
+import json
+import os
+import random
+import re
+import shutil
+import socket
+import subprocess
+import sys
+import time
+from collections import Counter, defaultdict
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import httpx
+
+NEW_DIR = Path(__file__).resolve().parents[1]
+
+CHAT_QUERIES = [
+    "How many customers do we have?",
+    "Show total revenue by month for this year",
+    "Which products are low on stock?",
+    "List overdue invoices over 5000",
+    "What is our refund policy?",
+]
+
+# Read-only intents, so a run leaves the database as it found it
+INTENTS: List[Tuple[str, Dict]] = [
+    ("lead-score", {"features": {"msg_len": 120, "kw_hits": 2, "visits": 4, "source": "referral"}}),
+    ("search-docs", {"q": "discount", "k": 3}),
+    ("policy-lookup", {"q": "approval", "k": 3}),
+    ("detect-anomaly", {"features": {"vendor_id": 1, "total": 12500.0, "currency": "AED"}}),
+]
+
+_SPAN = re.compile(r'^erp_span_duration_seconds_(sum|count)\{kind="([^"]*)",name="[^"]*"\} (\S+)$')
+
+
+def percentile(samples, pct):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+
+def parse_mix(text: str) -> Dict[str, float]:
+    mix = {}
+    for part in text.split(","):
+        kind, _, weight = part.partition("=")
+        if kind not in ("chat", "intents"):
+            raise ValueError(f"unknown request kind {kind!r} (use chat, intents)")
+        mix[kind] = float(weight or 1)
+    return mix
+
+
+class Workload:
+    """Deterministic stream of (kind, method args) drawn from the mix."""
+
+    def __init__(self, mix: Dict[str, float], seed: int, unique_chat: bool):
+        self._rng = random.Random(seed)
+        self._kinds, self._weights = zip(*mix.items())
+        self._unique = unique_chat
+        self._n = itertools.count()
+
+    def next(self) -> Tuple[str, str, dict]:
+        i = next(self._n)
+        kind = self._rng.choices(self._kinds, self._weights)[0]
+        if kind == "chat":
+            query = CHAT_QUERIES[i % len(CHAT_QUERIES)]
+            if self._unique:
+                # Distinct text per request, so coalescing and the LLM cache cannot absorb the load
+                query = f"{query} (#{i})"
+            return "chat", "/api/chat", {"params": {"query": query},
+                                         "headers": {"X-Session-ID": f"load-{i % 50}"}}
+        path, body = INTENTS[i % len(INTENTS)]
+        return f"intent:{path}", f"/api/intents/{path}", {"json": body}
+
+
+async def _send(client: httpx.AsyncClient, workload: Workload, results: list, timeout: float):
+    kind, path, kwargs = workload.next()
+    start = time.perf_counter()
+    try:
+        response = await client.post(path, timeout=timeout, **kwargs)
+        status = response.status_code
+        # Batch and single intents report failures in the body, sometimes with a 200
+        if kind.startswith("intent:") and status < 400 and response.json().get("ok") is False:
+            status = "ok=false"
+    except httpx.HTTPError as e:
+        status = type(e).__name__
+    except ValueError:
+        status = "invalid_json"
+    results.append((kind, status, time.perf_counter() - start))
+
+
+async def _closed_loop(client, workload, results, concurrency: int, duration: float, timeout: float):
+    deadline = time.perf_counter() + duration
+
+    async def user():
+        while time.perf_counter() < deadline:
+            await _send(client, workload, results, timeout)
+
+    await asyncio.gather(*(user() for _ in range(concurrency)))
+
+
+async def _open_loop(client, workload, results, concurrency: int, duration: float, rate: float,
+                     timeout: float, rng: random.Random):
+    slots = asyncio.Semaphore(concurrency)
+    tasks, dropped = [], 0
+    start = time.perf_counter()
+    next_at = start
+    while next_at < start + duration:
+        await asyncio.sleep(max(0.0, next_at - time.perf_counter()))
+        next_at += rng.expovariate(rate)
+        if slots.locked():
+            # Already at the stage's concurrency: count it rather than queueing client-side
+            dropped += 1
+            continue
+        await slots.acquire()
+        task = asyncio.create_task(_send(client, workload, results, timeout))
+        task.add_done_callback(lambda _: slots.release())
+        tasks.append(task)
+    await asyncio.gather(*tasks)
+    return dropped
+
+
+def _span_totals(text: str) -> Dict[str, Dict[str, float]]:
+    totals: Dict[str, Dict[str, float]] = defaultdict(lambda: {"sum": 0.0, "count": 0.0})
+    for line in text.splitlines():
+        m = _SPAN.match(line)
+        if m:
+            totals[m.group(2)][m.group(1)] += float(m.group(3))
+    return totals
+
+
+async def _scrape_metrics(client: httpx.AsyncClient) -> Dict[str, Dict[str, float]]:
+    try:
+        return _span_totals((await client.get("/metrics", timeout=10)).text)
+    except httpx.HTTPError:
+        return {}
+
+
+async def _sample_health(client: httpx.AsyncClient, interval: float, samples: list, stop: asyncio.Event):
+    while not stop.is_set():
+        try:
+            samples.append((await client.get("/api/health", timeout=5)).json())
+        except (httpx.HTTPError, ValueError):
+            pass
+        try:
+            await asyncio.wait_for(stop.wait(), interval)
+        except asyncio.TimeoutError:
+            pass
+
+
+def _summarize_health(samples: List[dict]) -> Dict:
+    if not samples:
+        return {}
+    first, last = samples[0], samples[-1]
+    chat = [s.get("chat", {}) for s in samples]
+    summary = {
+        "max_in_flight": max(c.get("in_flight", 0) for c in chat),
+        "max_queued": max(c.get("queued", 0) for c in chat),
+        "rejected": last.get("chat", {}).get("rejected", 0) - first.get("chat", {}).get("rejected", 0),
+        "coalesced": last.get("coalescing", {}).get("coalesced", 0) - first.get("coalescing", {}).get("coalesced", 0),
+        "sessions": last.get("sessions"),
+    }
+    hits = sum(c["hits"] for c in last.get("llm_cache", {}).values()) - sum(c["hits"] for c in first.get("llm_cache", {}).values())
+    misses = sum(c["misses"] for c in last.get("llm_cache", {}).values()) - sum(c["misses"] for c in first.get("llm_cache", {}).values())
+    summary["llm_cache_hit_rate"] = round(hits / (hits + misses), 3) if hits + misses else None
+    writers = [s.get("log_writers", {}) for s in samples]
+    summary["max_log_queue"] = max((sum(w["queued"] for w in ws.values()) for ws in writers), default=0)
+    summary["log_dropped"] = (sum(w["dropped"] for w in last.get("log_writers", {}).values())
+                              - sum(w["dropped"] for w in first.get("log_writers", {}).values()))
+    return summary
+
+
+def _stats(rows: List[tuple], elapsed: float) -> Dict:
+    ok = [lat for _, status, lat in rows if isinstance(status, int) and status < 400]
+    result = {
+        "requests": len(rows),
+        "ok": len(ok),
+        "throughput": round(len(ok) / elapsed, 2),
+        "error_rate": round(1 - len(ok) / len(rows), 4) if rows else 0.0,
+        "status": dict(Counter(str(status) for _, status, _ in rows)),
+    }
+    if ok:
+        result["p50_ms"] = round(percentile(ok, 50) * 1000, 1)
+        result["p99_ms"] = round(percentile(ok, 99) * 1000, 1)
+    return result
+
+
+async def run_stage(client: httpx.AsyncClient, workload: Workload, concurrency: int, duration: float,
+                    rate: Optional[float], timeout: float, sample_interval: float, seed: int) -> Dict:
+    results: list = []
+    samples: list = []
+    stop = asyncio.Event()
+    before = await _scrape_metrics(client)
+    sampler = asyncio.create_task(_sample_health(client, sample_interval, samples, stop))
+    start = time.perf_counter()
+    dropped = 0
+    if rate:
+        dropped = await _open_loop(client, workload, results, concurrency, duration, rate, timeout, random.Random(seed))
+    else:
+        await _closed_loop(client, workload, results, concurrency, duration, timeout)
+    elapsed = time.perf_counter() - start
+    stop.set()
+    await sampler
+    after = await _scrape_metrics(client)
+
+    stage = {"concurrency": concurrency, "elapsed_s": round(elapsed, 2), **_stats(results, elapsed)}
+    if rate:
+        stage["offered_rate"] = rate
+        stage["client_dropped"] = dropped
+    by_kind = defaultdict(list)
+    for row in results:
+        by_kind[row[0]].append(row)
+    stage["by_kind"] = {kind: _stats(rows, elapsed) for kind, rows in sorted(by_kind.items())}
+    stage["server"] = _summarize_health(samples)
+    spans = {}
+    for kind, now in after.items():
+        count = now["count"] - before.get(kind, {}).get("count", 0)
+        if count:
+            spans[kind] = {"count": int(count),
+                           "mean_ms": round((now["sum"] - before.get(kind, {}).get("sum", 0)) / count * 1000, 2)}
+    stage["server"]["spans"] = spans
+    return stage
+
+
+def _print_stage(stage: Dict):
+    print(f"\nconcurrency={stage['concurrency']} requests={stage['requests']} "
+          f"throughput={stage['throughput']:.2f} ok/s error_rate={stage['error_rate']:.2%} "
+          f"p50={stage.get('p50_ms', '-')}ms p99={stage.get('p99_ms', '-')}ms status={stage['status']}")
+    for kind, s in stage["by_kind"].items():
+        print(f"  {kind:<22} {s['throughput']:>8.2f} ok/s  p50={s.get('p50_ms', '-')}ms  "
+              f"p99={s.get('p99_ms', '-')}ms  errors={s['error_rate']:.2%}")
+    server = stage["server"]
+    if len(server) > 1:
+        print(f"  server: max_in_flight={server.get('max_in_flight')} max_queued={server.get('max_queued')} "
+              f"rejected={server.get('rejected')} coalesced={server.get('coalesced')} "
+              f"llm_cache_hit_rate={server.get('llm_cache_hit_rate')} max_log_queue={server.get('max_log_queue')}")
+    for kind, s in sorted(server["spans"].items()):
+        print(f"  span {kind:<17} count={s['count']:<7} mean={s['mean_ms']}ms")
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def spawn_server(llm_latency_ms: float, db_path: Path) -> Tuple[subprocess.Popen, str]:
+    """uvicorn main:app with the fake LLM backend on a free local port, serving `db_path`."""
+    port = _free_port()
+    env = dict(os.environ, ERP_LLM_BACKEND="fake", FAKE_LLM_LATENCY_MS=str(llm_latency_ms),
+               LLM_CACHE_ENABLED=os.getenv("LLM_CACHE_ENABLED", "0"),
+               ERP_DB_PATH=str(db_path), ERP_INTENTS_DB_PATH=str(db_path))
+    proc = subprocess.Popen([sys.executable, "-m", "uvicorn", "main:app", "--port", str(port), "--log-level", "warning"],
+                            cwd=NEW_DIR, env=env)
+    url = f"http://127.0.0.1:{port}"
+    deadline = time.time() + 60
+    while time.time() < deadline:
+        if proc.poll() is not None:
+            raise RuntimeError(f"server exited with code {proc.returncode}")
+        try:
+            if httpx.get(f"{url}/api/health", timeout=1).status_code == 200:
+                return proc, url
+        except httpx.HTTPError:
+            time.sleep(0.25)
+    proc.terminate()
+    raise RuntimeError("server did not become healthy within 60s")
+
+
+async def run(url: str, levels: List[int], duration: float, mix: Dict[str, float], rate: Optional[float],
+              timeout: float, sample_interval: float, seed: int, unique_chat: bool, slo_p99_ms: float,
+              max_error_rate: float) -> Dict:
+    workload = Workload(mix, seed, unique_chat)
+    limits = httpx.Limits(max_connections=max(levels) + 4, max_keepalive_connections=max(levels) + 4)
+    stages = []
+    async with httpx.AsyncClient(base_url=url, limits=limits) as client:
+        for concurrency in levels:
+            stage = await run_stage(client, workload, concurrency, duration, rate, timeout, sample_interval, seed)
+            _print_stage(stage)
+            stages.append(stage)
+    saturated = next((s["concurrency"] for s in stages
+                      if s["error_rate"] > max_error_rate or s.get("p99_ms", float("inf")) > slo_p99_ms), None)
+    peak = max(stages, key=lambda s: s["throughput"])
+    print(f"\npeak throughput {peak['throughput']:.2f} ok/s at concurrency={peak['concurrency']}; "
+          + (f"SLO (p99<={slo_p99_ms:g}ms, errors<={max_error_rate:.1%}) first broken at concurrency={saturated}"
+             if saturated else "SLO held at every level"))
+    return {"url": url, "mix": mix, "rate": rate, "duration_s": duration, "stages": stages,
+            "peak": {"concurrency": peak["concurrency"], "throughput": peak["throughput"]},
+            "saturated_at": saturated}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test the API with a mix of chat and intent requests.")
+    parser.add_argument("--url", default="http://localhost:8000")
+    parser.add_argument("--spawn", action="store_true", help="start a local server with the fake LLM backend")
+    parser.add_argument("--llm-latency-ms", type=float, default=200, help="fake LLM delay per call (with --spawn)")
+    parser.add_argument("--scale", type=float, default=0.01, help="generate_data scale of the dataset (with --spawn)")
+    parser.add_argument("--data-dir", default=str(NEW_DIR / "benchmarks" / "data"))
+    parser.add_argument("--data-seed", type=int, default=42)
+    parser.add_argument("--concurrency", default="1,4,16,64", help="comma-separated levels, run in order")
+    parser.add_argument("--duration", type=float, default=15, help="seconds per level")
+    parser.add_argument("--mix", default="chat=1,intents=3", help="relative weights of chat and intents")
+    parser.add_argument("--rate", type=float, help="open-loop arrivals per second (default: closed loop)")
+    parser.add_argument("--unique-chat", action="store_true", help="make every chat query distinct")
+    parser.add_argument("--timeout", type=float, default=300)
+    parser.add_argument("--sample-interval", type=float, default=0.5, help="seconds between /api/health samples")
+    parser.add_argument("--slo-p99-ms", type=float, default=5000)
+    parser.add_argument("--max-error-rate", type=float, default=0.01)
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--json", help="write the full report to this file")
+    args = parser.parse_args()
+
+    proc, url, work = None, args.url, None
+    if args.spawn:
+        from benchmarks.tools_bench import dataset
+        data_dir = Path(args.data_dir)
+        # A fresh copy each run: the server appends audit rows and session turns to it
+        work = data_dir / f"http_load_scale{args.scale:g}.db"
+        shutil.copyfile(dataset(data_dir, args.scale, args.data_seed), work)
+        proc, url = spawn_server(args.llm_latency_ms, work)
+    try:
+        report = asyncio.run(run(url, [int(c) for c in args.concurrency.split(",")], args.duration,
+                                 parse_mix(args.mix), args.rate, args.timeout, args.sample_interval, args.seed,
+                                 args.unique_chat, args.slo_p99_ms, args.max_error_rate))
+    finally:
+        if proc:
+            proc.terminate()
+            proc.wait(timeout=30)
+        if work:
+            for suffix in ("", "-wal", "-shm"):
+                Path(f"{work}{suffix}").unlink(missing_ok=True)
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
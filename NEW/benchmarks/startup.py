@@ -0,0 +1,59 @@
+"""
+Startup-time benchmark for the API process.
+
+Compares importing `main` (what uvicorn does before it accepts requests) with
+importing it and then building every agent, which is what the old eager
+module-level construction cost at import time.
+
+Run from the NEW directory:
+    python -m benchmarks.startup --runs 5
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+
+NEW_DIR = Path(__file__).resolve().parents[1]
+
+SCENARIOS = {
+    "lazy (import main)": "import main",
+    "eager (import main + build all agents)": (
+        "import main\n"
+        "from agents.registry import get_agent\n"
+        "for name in ('router', 'analytics', 'inventory', 'finance', 'sales'):\n"
+        "    try:\n"
+        "        get_agent(name)\n"
+        "    except Exception as e:\n"
+        "        print(f'{name}: {e}', file=sys.stderr)\n"
+    ),
+}
+
+TIMER = "import sys, time\n_t0 = time.perf_counter()\n{body}\nprint(time.perf_counter() - _t0)\n"
+
+
+def time_scenario(body: str, runs: int):
+    env = dict(os.environ, AGENT_PREWARM="0")
+    env.setdefault("GOOGLE_API_KEY", "benchmark-placeholder")  # clients are built but never called
+    samples = []
+    for _ in range(runs):
+        out = subprocess.run([sys.executable, "-c", TIMER.format(body=body)], cwd=NEW_DIR, env=env,
+                             capture_output=True, text=True)
+        if out.returncode != 0:
+            raise RuntimeError(out.stderr.strip())
+        samples.append(float(out.stdout.strip().splitlines()[-1]) * 1000)
+    return samples
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure API import/startup time.")
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+    for name, body in SCENARIOS.items():
+        samples = time_scenario(body, args.runs)
+        print(f"{name}: median {statistics.median(samples):.1f} ms, min {min(samples):.1f} ms over {args.runs} runs")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,313 @@
+"""
+Tool-level benchmark with baseline comparison.
+
+Runs every tool case below against synthetic datasets of several sizes
+(benchmarks/generate_data.py, cached in --data-dir and copied fresh for
+each run since some cases write). For each case and size it reports
+throughput and p50/p95/p99 latency. Results are written as JSON and can be
+compared against a saved baseline; a case whose p95 or throughput is more
+than --threshold worse is flagged as a regression.
+
+    sales_sql_read / sales_sql_write        SalesSQLTool
+    finance_sql_read / finance_sql_write    FinanceSQLTool
+    sales_rag / policy_rag                  SalesRAGTool / PolicyRAGTool
+    anomaly_detector                        AnomalyDetectorTool
+    lead_score                              LeadScoreTool
+    forecast                                ForecastTool
+    text_to_sql                             TextToSQLTool
+    workflow                                the run_workflows.py steps (lead -> score -> order
+                                            -> invoice -> anomaly -> policy) via the
+                                            Sales/Finance agents behind the intents API
+
+From the NEW directory:
+    python -m benchmarks.tools_bench --scales 0.01,0.1,1 --json results.json
+    python -m benchmarks.tools_bench --baseline baseline.json          # compare
+    python -m benchmarks.tools_bench --json baseline.json              # (re)record a baseline
+"""
+import argparse
+import json
+import platform
+import random
+import shutil
+import sqlite3
+import sys
+import time
+from pathlib import Path
+from typing import Callable, Dict, List
+
+from benchmarks.generate_data import WORDS, generate
+
+NEW_DIR = Path(__file__).resolve().parents[1]
+# config/, tools/ and agents/ are top-level packages rooted at NEW, as for main.py
+if str(NEW_DIR) not in sys.path:
+    sys.path.insert(0, str(NEW_DIR))
+
+
+def percentile(samples, pct):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+
+# ---------------------------------------------------------------------------
+# Cases: each factory takes (db_path, rng, sizes) and returns fn(i)
+# ---------------------------------------------------------------------------
+
+def _sizes(db_path: str) -> Dict[str, int]:
+    with sqlite3.connect(db_path) as conn:
+        return {t: conn.execute(f"SELECT COALESCE(MAX(rowid), 0) FROM {t}").fetchone()[0]
+                for t in ("customers", "products", "orders", "invoices", "leads")}
+
+
+def sales_sql_read(db_path, rng, sizes):
+    from tools.sales_sql_tool import SalesSQLTool
+    tool = SalesSQLTool(db_path)
+    sql = "SELECT order_id, status, total_amount FROM orders WHERE customer_id = ? ORDER BY created_at DESC"
+    return lambda i: tool.run({"op": "read", "query": sql, "params": [rng.randint(1, sizes["customers"])]})
+
+
+def sales_sql_write(db_path, rng, sizes):
+    from tools.sales_sql_tool import SalesSQLTool
+    tool = SalesSQLTool(db_path)
+    sql = "INSERT INTO leads (name, email, source, status, notes, created_at) VALUES (?, ?, 'web', 'new', '', CURRENT_TIMESTAMP)"
+    return lambda i: tool.run({"op": "write", "query": sql, "params": [f"Bench {i}", f"bench{i}@example.com"]})
+
+
+def finance_sql_read(db_path, rng, sizes):
+    from tools.finance_sql_tool import FinanceSQLTool
+    tool = FinanceSQLTool(db_path)
+    sql = ("SELECT i.invoice_id, i.total, COALESCE(SUM(p.amount), 0) FROM invoices i "
+           "LEFT JOIN payments p ON p.invoice_id = i.invoice_id WHERE i.invoice_id BETWEEN ? AND ? GROUP BY i.invoice_id")
+
+    def run(i):
+        start = rng.randint(1, max(1, sizes["invoices"] - 50))
+        return tool.run({"op": "read", "query": sql, "params": [start, start + 50]})
+    return run
+
+
+def finance_sql_write(db_path, rng, sizes):
+    from tools.finance_sql_tool import FinanceSQLTool
+    tool = FinanceSQLTool(db_path)
+    sql = "INSERT INTO payments (invoice_id, amount, method, paid_at) VALUES (?, ?, 'card', CURRENT_TIMESTAMP)"
+    return lambda i: tool.run({"op": "write", "query": sql,
+                               "params": [rng.randint(1, sizes["invoices"]), round(rng.uniform(10, 500), 2)]})
+
+
+def sales_rag(db_path, rng, sizes):
+    from tools.sales_rag_tool import SalesRAGTool
+    tool = SalesRAGTool(db_path)
+    return lambda i: tool.run({"query": WORDS[i % len(WORDS)], "k": 3})
+
+
+def policy_rag(db_path, rng, sizes):
+    from tools.policy_rag_tool import PolicyRAGTool
+    tool = PolicyRAGTool(db_path)
+    return lambda i: tool.run({"query": WORDS[i % len(WORDS)], "k": 3})
+
+
+def anomaly_detector(db_path, rng, sizes):
+    from tools.anomaly_detector_tool import AnomalyDetectorTool
+    tool = AnomalyDetectorTool(db_path)
+    return lambda i: tool.run({"invoice_id": rng.randint(1, sizes["invoices"])})
+
+
+def lead_score(db_path, rng, sizes):
+    from tools.lead_score_tool import LeadScoreTool
+    tool = LeadScoreTool()
+    sources = ["web", "email", "referral", "event"]
+    return lambda i: tool.run({"features": {"msg_len": rng.randint(0, 600), "kw_hits": rng.randint(0, 6),
+                                            "visits": rng.randint(0, 12), "source": sources[i % 4]}})
+
+
+def forecast(db_path, rng, sizes):
+    from tools.inventory_tools import ForecastTool
+    tool = ForecastTool(db_path)
+    # Only products with movement history, so every call fits a model instead of returning early
+    with sqlite3.connect(db_path) as conn:
+        products = [r[0] for r in conn.execute("SELECT DISTINCT product_id FROM stock_movements")]
+    if not products:
+        raise RuntimeError("dataset has no stock_movements")
+
+    def run(i):
+        result = tool.run(str(rng.choice(products)), periods=6)
+        if "error" in result or not result.get("forecast"):
+            raise RuntimeError(result.get("error") or result.get("message"))
+        return result
+    return run
+
+
+def text_to_sql(db_path, rng, sizes):
+    import config.database
+    from tools.analytics_tools import TextToSQLTool
+    config.database.DB_PATH = Path(db_path)
+    tool = TextToSQLTool()
+    queries = [
+        "SELECT c.segment, COUNT(*), SUM(o.total_amount) FROM orders o JOIN customers c "
+        "ON c.customer_id = o.customer_id WHERE o.created_at >= '2025-06-01' GROUP BY c.segment",
+        "SELECT status, COUNT(*), SUM(total) FROM invoices GROUP BY status",
+        "SELECT product_id, SUM(quantity) FROM stock GROUP BY product_id ORDER BY 2 LIMIT 10",
+    ]
+    return lambda i: tool._run(queries[i % len(queries)])
+
+
+def workflow(db_path, rng, sizes):
+    from agents.sales_agent import SalesAgent
+    from agents.finance_agent import FinanceAgent
+    sales, finance = SalesAgent(db_path), FinanceAgent(db_path)
+
+    def run(i):
+        lead = sales.handle("add_lead", {"name": f"Workflow {i}", "email": f"wf{i}@example.com",
+                                         "source": "email", "notes": "Interested to buy 10 panels"})
+        sales.handle("lead_score", {"features": {"msg_len": 80, "kw_hits": 2, "visits": 3, "source": "email"}})
+        order = sales.handle("convert_lead_to_order", {"lead_id": lead.get("lead_id", 1),
+                                                       "product_id": rng.randint(1, sizes["products"]), "qty": 10})
+        invoice = finance.handle("generate_invoice_from_order", {"order_id": order.get("order_id")})
+        finance.handle("detect_anomaly", {"invoice_id": invoice.get("invoice_id")})
+        result = finance.handle("policy_lookup", {"q": "approval", "k": 2})
+        if not invoice.get("ok"):
+            raise RuntimeError(invoice.get("error"))
+        return result
+    return run
+
+
+CASES: Dict[str, Callable] = {f.__name__: f for f in (
+    sales_sql_read, sales_sql_write, finance_sql_read, finance_sql_write, sales_rag, policy_rag,
+    anomaly_detector, lead_score, forecast, text_to_sql, workflow)}
+
+
+# ---------------------------------------------------------------------------
+# Running
+# ---------------------------------------------------------------------------
+
+def dataset(data_dir: Path, scale: float, seed: int) -> Path:
+    """Cached generated dataset for this scale/seed."""
+    data_dir.mkdir(parents=True, exist_ok=True)
+    path = data_dir / f"erp_scale{scale:g}_seed{seed}.db"
+    if not path.exists():
+        tmp = path.with_suffix(".tmp")
+        tmp.unlink(missing_ok=True)
+        print(f"Generating dataset scale={scale:g} -> {path}")
+        generate(str(tmp), scale=scale, seed=seed)
+        tmp.rename(path)
+    return path
+
+
+def measure(fn: Callable[[int], object], iterations: int, warmup: int, max_seconds: float) -> Dict[str, float]:
+    for i in range(warmup):
+        fn(i)
+    latencies, errors, last_error = [], 0, None
+    started = time.perf_counter()
+    for i in range(iterations):
+        t0 = time.perf_counter()
+        try:
+            result = fn(warmup + i)
+            if isinstance(result, dict) and result.get("ok") is False:
+                raise RuntimeError(result.get("error"))
+        except Exception as e:
+            errors += 1
+            last_error = str(e)
+        latencies.append(time.perf_counter() - t0)
+        if time.perf_counter() - started > max_seconds:
+            break
+    elapsed = time.perf_counter() - started
+    result = {
+        "iterations": len(latencies),
+        "errors": errors,
+        "ops_per_s": round(len(latencies) / elapsed, 1),
+        "mean_ms": round(sum(latencies) / len(latencies) * 1000, 3),
+        "p50_ms": round(percentile(latencies, 50) * 1000, 3),
+        "p95_ms": round(percentile(latencies, 95) * 1000, 3),
+        "p99_ms": round(percentile(latencies, 99) * 1000, 3),
+    }
+    if last_error:
+        result["last_error"] = last_error
+    return result
+
+
+def run_suite(scales: List[float], cases: List[str], data_dir: Path, seed: int, iterations: int,
+              warmup: int, max_seconds: float) -> Dict[str, Dict]:
+    results = {}
+    for scale in scales:
+        source = dataset(data_dir, scale, seed)
+        work = data_dir / f"work_scale{scale:g}.db"
+        shutil.copyfile(source, work)
+        sizes = _sizes(str(work))
+        for name in cases:
+            key = f"{name}@{scale:g}"
+            rng = random.Random(seed)
+            try:
+                fn = CASES[name](str(work), rng, sizes)
+                results[key] = measure(fn, iterations, warmup, max_seconds)
+            except Exception as e:
+                # Missing optional dependencies or tools that fail to build are reported, not fatal
+                results[key] = {"error": f"{type(e).__name__}: {e}"}
+            print(_format_row(key, results[key]))
+        work.unlink(missing_ok=True)
+    return results
+
+
+def _format_row(key: str, r: Dict) -> str:
+    if "error" in r:
+        return f"{key:<28} unavailable: {r['error'][:80]}"
+    return (f"{key:<28} {r['ops_per_s']:>9.1f} ops/s  p50={r['p50_ms']:>8.3f}ms  p95={r['p95_ms']:>8.3f}ms  "
+            f"p99={r['p99_ms']:>8.3f}ms  errors={r['errors']}")
+
+
+def compare(results: Dict[str, Dict], baseline: Dict[str, Dict], threshold: float) -> List[str]:
+    """Print a per-case diff against the baseline; return the keys that regressed."""
+    regressions = []
+    print(f"\n{'case':<28} {'p95 base':>10} {'p95 now':>10} {'delta':>8}   {'ops base':>10} {'ops now':>10} {'delta':>8}")
+    for key in sorted(results):
+        now, base = results[key], baseline.get(key, {})
+        if "p95_ms" not in now or "p95_ms" not in base:
+            print(f"{key:<28} {'(not measured in ' + ('baseline' if 'p95_ms' in now else 'this run') + ')':>30}")
+            continue
+        p95_delta = now["p95_ms"] / base["p95_ms"] - 1 if base["p95_ms"] else 0.0
+        ops_delta = now["ops_per_s"] / base["ops_per_s"] - 1 if base["ops_per_s"] else 0.0
+        mark = ""
+        if p95_delta > threshold or ops_delta < -threshold:
+            mark = "  REGRESSION"
+            regressions.append(key)
+        elif p95_delta < -threshold and ops_delta > threshold:
+            mark = "  improved"
+        print(f"{key:<28} {base['p95_ms']:>10.3f} {now['p95_ms']:>10.3f} {p95_delta:>+8.1%}   "
+              f"{base['ops_per_s']:>10.1f} {now['ops_per_s']:>10.1f} {ops_delta:>+8.1%}{mark}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the ERP tools at several dataset sizes.")
+    parser.add_argument("--scales", default="0.01,0.1,1", help="generate_data scale factors (1 is ~1M rows)")
+    parser.add_argument("--cases", default=",".join(CASES), help="comma-separated subset of " + ",".join(CASES))
+    parser.add_argument("--data-dir", default=str(NEW_DIR / "benchmarks" / "data"))
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--iterations", type=int, default=200)
+    parser.add_argument("--warmup", type=int, default=5)
+    parser.add_argument("--max-seconds", type=float, default=10.0, help="per case and size")
+    parser.add_argument("--json", help="write results to this file")
+    parser.add_argument("--baseline", help="compare against results saved earlier with --json")
+    parser.add_argument("--threshold", type=float, default=0.2, help="relative slowdown counted as a regression")
+    args = parser.parse_args()
+
+    cases = args.cases.split(",")
+    unknown = [c for c in cases if c not in CASES]
+    if unknown:
+        parser.error(f"unknown cases: {', '.join(unknown)}")
+    results = run_suite([float(s) for s in args.scales.split(",")], cases, Path(args.data_dir), args.seed,
+                        args.iterations, args.warmup, args.max_seconds)
+
+    if args.json:
+        meta = {"python": platform.python_version(), "sqlite": sqlite3.sqlite_version,
+                "platform": platform.platform(), "created_at": time.strftime("%Y-%m-%d %H:%M:%S")}
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({"meta": meta, "results": results}, f, indent=2)
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)["results"]
+        regressions = compare(results, baseline, args.threshold)
+        if regressions:
+            print(f"\n{len(regressions)} regression(s): {', '.join(regressions)}")
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,56 @@
+import asyncio
+from contextlib import asynccontextmanager
+
+
+class Saturated(Exception):
+    """Raised when a request cannot get an execution slot."""
+
+
+class ConcurrencyLimiter:
+    """
+    Bounds the number of requests executing at once.
+
+    Up to max_in_flight requests run concurrently; up to max_queue more wait
+    for a slot for at most queue_timeout seconds. Anything beyond that is
+    rejected immediately with Saturated so the caller can answer 429.
+    """
+
+    def __init__(self, max_in_flight: int, max_queue: int, queue_timeout: float):
+        self.max_in_flight = max_in_flight
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self.in_flight = 0
+        self.queued = 0
+        self.rejected = 0
+        self._sem = asyncio.Semaphore(max_in_flight)
+
+    async def acquire(self):
+        """Wait for a slot; raise Saturated when the queue is full or the wait times out."""
+        if self.in_flight + self.queued >= self.max_in_flight + self.max_queue:
+            self.rejected += 1
+            raise Saturated("Server busy: request queue is full")
+        self.queued += 1
+        try:
+            await asyncio.wait_for(self._sem.acquire(), self.queue_timeout)
+        except asyncio.TimeoutError:
+            self.rejected += 1
+            raise Saturated(f"Server busy: no slot within {self.queue_timeout:g}s")
+        finally:
+            self.queued -= 1
+        self.in_flight += 1
+
+    def release(self):
+        self.in_flight -= 1
+        self._sem.release()
+
+    @asynccontextmanager
+    async def slot(self):
+        await self.acquire()
+        try:
+            yield
+        finally:
+            self.release()
+
+    def stats(self) -> dict:
+        return {"in_flight": self.in_flight, "queued": self.queued, "rejected": self.rejected,
+                "max_in_flight": self.max_in_flight, "max_queue": self.max_queue}
@@ -0,0 +1,214 @@
+"""
+Local domain classifier for the routers.
+
+A multinomial naive Bayes model over unigram/bigram tokens, trained from the
+routing keyword lists plus past `conversations` rows (user_input -> agent).
+Prediction is a handful of dict lookups, so routers only need to escalate to
+the LLM when the model is not confident.
+
+Retrain / benchmark from the NEW directory:
+    python -m config.classifier train --db ../Graduation_project/erp_sample.db
+    python -m config.classifier benchmark --db ../Graduation_project/erp_sample.db
+"""
+import argparse
+import json
+import math
+import os
+import re
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+DOMAINS = ("sales", "finance", "inventory", "analytics")
+
+DOMAIN_KEYWORDS = {
+    "sales": ["customer", "lead", "prospect", "sale", "order", "crm", "contact", "deal", "client",
+              "feedback", "sentiment"],
+    "finance": ["finance", "invoice", "payment", "accounting", "revenue", "expense", "budget", "financial",
+                "money", "cost", "transaction", "anomaly", "fraud", "ledger"],
+    "inventory": ["stock", "inventory", "product", "warehouse", "supply", "procurement", "vendor",
+                  "item", "stock level", "unit", "forecast"],
+    "analytics": ["report", "analytics", "dashboard", "metrics", "analysis", "trend", "chart",
+                  "insight", "data", "sql", "business intelligence"],
+}
+
+# Held-out sanity set used by `benchmark` alongside any conversation history.
+SAMPLE_QUERIES = [
+    ("Show me customers", "sales"),
+    ("Add a new lead from the website form", "sales"),
+    ("Convert this prospect into an order", "sales"),
+    ("List unpaid invoices for this vendor", "finance"),
+    ("Record a payment against invoice 12", "finance"),
+    ("Flag any fraud in last month's transactions", "finance"),
+    ("How much stock do we have in warehouse A", "inventory"),
+    ("Forecast demand for product 3", "inventory"),
+    ("Which items are below the reorder level", "inventory"),
+    ("Build a dashboard of monthly metrics", "analytics"),
+    ("Show the sales trend chart for this year", "analytics"),
+    ("Run a SQL analysis of order volumes", "analytics"),
+]
+
+MODEL_PATH = Path(os.getenv("ROUTER_CLASSIFIER_PATH", Path(__file__).with_name("domain_classifier.json")))
+CONFIDENCE_THRESHOLD = float(os.getenv("ROUTER_CONFIDENCE_THRESHOLD", "0.6"))
+
+_WORD = re.compile(r"[a-z0-9]+")
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercased word tokens with a light plural strip, plus bigrams."""
+    words = []
+    for w in _WORD.findall((text or "").lower()):
+        if len(w) > 3 and w.endswith("s") and not w.endswith("ss"):
+            w = w[:-1]
+        words.append(w)
+    return words + [f"{a}_{b}" for a, b in zip(words, words[1:])]
+
+
+class DomainClassifier:
+    """Multinomial naive Bayes over `tokenize` features."""
+
+    def __init__(self, log_prior: Dict[str, float], log_lik: Dict[str, Dict[str, float]], trained_on: int = 0):
+        self.log_prior = log_prior
+        self.log_lik = log_lik
+        self.trained_on = trained_on
+
+    @classmethod
+    def train(cls, examples: Iterable[Tuple[str, str]], alpha: float = 0.1) -> "DomainClassifier":
+        counts = {d: {} for d in DOMAINS}
+        docs = {d: 0 for d in DOMAINS}
+        vocab = set()
+        for text, domain in examples:
+            if domain not in counts:
+                continue
+            docs[domain] += 1
+            for tok in tokenize(text):
+                counts[domain][tok] = counts[domain].get(tok, 0) + 1
+                vocab.add(tok)
+        n_docs = sum(docs.values())
+        log_prior = {d: math.log((docs[d] + 1) / (n_docs + len(DOMAINS))) for d in DOMAINS}
+        log_lik = {}
+        for d in DOMAINS:
+            denom = sum(counts[d].values()) + alpha * len(vocab)
+            log_lik[d] = {t: math.log((counts[d].get(t, 0) + alpha) / denom) for t in vocab}
+        return cls(log_prior, log_lik, n_docs)
+
+    def scores(self, text: str) -> Dict[str, float]:
+        """Posterior probability per domain; out-of-vocabulary tokens are ignored."""
+        logits = dict(self.log_prior)
+        vocab = self.log_lik[DOMAINS[0]]
+        for tok in tokenize(text):
+            if tok in vocab:
+                for d in DOMAINS:
+                    logits[d] += self.log_lik[d][tok]
+        top = max(logits.values())
+        exp = {d: math.exp(v - top) for d, v in logits.items()}
+        total = sum(exp.values())
+        return {d: v / total for d, v in exp.items()}
+
+    def predict(self, text: str) -> Tuple[str, float]:
+        """Return (domain, confidence)."""
+        probs = self.scores(text)
+        domain = max(probs, key=probs.get)
+        return domain, probs[domain]
+
+    def save(self, path: Path = MODEL_PATH):
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump({"log_prior": self.log_prior, "log_lik": self.log_lik, "trained_on": self.trained_on}, f)
+
+    @classmethod
+    def load(cls, path: Path = MODEL_PATH) -> "DomainClassifier":
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        return cls(data["log_prior"], data["log_lik"], data.get("trained_on", 0))
+
+
+def load_conversation_examples(db_path) -> List[Tuple[str, str]]:
+    """Successful (user_input, agent) pairs from the conversations table, if present."""
+    try:
+        with sqlite3.connect(db_path) as conn:
+            rows = conn.execute(
+                "SELECT user_input, agent FROM conversations WHERE success = 1 AND user_input IS NOT NULL"
+            ).fetchall()
+    except sqlite3.Error:
+        return []
+    return [(text, agent) for text, agent in rows if agent in DOMAINS]
+
+
+def keyword_examples() -> List[Tuple[str, str]]:
+    return [(kw, d) for d, kws in DOMAIN_KEYWORDS.items() for kw in kws]
+
+
+def train_classifier(db_path=None) -> DomainClassifier:
+    examples = keyword_examples()
+    if db_path:
+        examples += load_conversation_examples(db_path)
+    return DomainClassifier.train(examples)
+
+
+_classifier: Optional[DomainClassifier] = None
+_classifier_lock = threading.Lock()
+
+
+def get_classifier(db_path=None) -> DomainClassifier:
+    """Process-wide classifier: the saved model if present, else trained on the fly."""
+    global _classifier
+    if _classifier is None:
+        with _classifier_lock:
+            if _classifier is None:
+                if MODEL_PATH.exists():
+                    _classifier = DomainClassifier.load(MODEL_PATH)
+                else:
+                    _classifier = train_classifier(db_path)
+    return _classifier
+
+
+def _split(examples: List[Tuple[str, str]]):
+    """Deterministic 80/20 split so benchmark numbers are comparable across runs."""
+    train, test = [], []
+    for i, ex in enumerate(examples):
+        (test if i % 5 == 4 else train).append(ex)
+    return train, test
+
+
+def benchmark(db_path=None) -> Dict[str, float]:
+    history_train, history_test = _split(load_conversation_examples(db_path) if db_path else [])
+    model = DomainClassifier.train(keyword_examples() + history_train)
+    test = history_test + SAMPLE_QUERIES
+    correct = confident = confident_correct = 0
+    start = time.perf_counter()
+    for text, label in test:
+        domain, conf = model.predict(text)
+        correct += domain == label
+        if conf >= CONFIDENCE_THRESHOLD:
+            confident += 1
+            confident_correct += domain == label
+    elapsed = time.perf_counter() - start
+    return {
+        "examples": len(test),
+        "accuracy": correct / len(test),
+        "escalation_rate": 1 - confident / len(test),
+        "accuracy_when_confident": confident_correct / confident if confident else 0.0,
+        "mean_latency_us": elapsed / len(test) * 1e6,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Train or benchmark the router domain classifier.")
+    parser.add_argument("command", choices=["train", "benchmark"])
+    parser.add_argument("--db", help="SQLite database with a conversations table")
+    parser.add_argument("--out", default=str(MODEL_PATH), help="Where to write the trained model")
+    args = parser.parse_args()
+
+    if args.command == "train":
+        model = train_classifier(args.db)
+        model.save(Path(args.out))
+        print(f"Trained on {model.trained_on} examples, saved to {args.out}")
+    else:
+        for key, value in benchmark(args.db).items():
+            print(f"{key}: {value:.4f}" if isinstance(value, float) else f"{key}: {value}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,14 +1,26 @@
+import os
 import sqlite3
 from pathlib import Path
 from typing import Optional, Dict
+from .metrics import TracedConnection
 
 # Correct pathing to the database file
 DB_NAME = "erp.db"
-DB_PATH = Path(__file__).resolve().parents[1] / "database" / DB_NAME
+DB_PATH = Path(os.getenv("ERP_DB_PATH", Path(__file__).resolve().parents[1] / "database" / DB_NAME))
+
+# SalesAgent/FinanceAgent (the /api/intents routes and the sales/finance executors) need the
+# agent_erp_person_b_2 schema (leads, tickets, vendors, invoice_lines, payments, ledger, documents),
+# which erp.db does not have. ERP_INTENTS_DB_PATH overrides it; an explicit ERP_DB_PATH is used
+# when it is set on its own (benchmarks.generate_data builds both schemas in one file).
+INTENTS_DB_PATH = Path(
+    os.getenv("ERP_INTENTS_DB_PATH")
+    or os.getenv("ERP_DB_PATH")
+    or Path(__file__).resolve().parents[2] / "agent_erp_person_b_2" / "db" / "erp_sample.db"
+)
 
 def get_connection():
     """Establishes and returns a new database connection."""
-    conn = sqlite3.connect(DB_PATH)
+    conn = sqlite3.connect(DB_PATH, factory=TracedConnection)
     conn.row_factory = sqlite3.Row  # This allows column access by name
     return conn
 
@@ -0,0 +1,142 @@
+"""
+Offline, deterministic stand-in for the Gemini chat model.
+
+Selected with ERP_LLM_BACKEND=fake; no API key or network is needed. Each
+prompt is answered from, in order:
+
+1. a script (FAKE_LLM_SCRIPT, a JSON list of {"match": regex, "response": text}),
+   matched against the prompt's last "Question:" block; "{question}" and
+   "{observation}" in the response are filled in,
+2. recordings (FAKE_LLM_RECORDINGS, JSONL of {"prompt_sha256", "response"}),
+   e.g. exported from the response cache of a real run,
+3. a ReAct autopilot: route with classify_and_route, call the
+   execute_with_<domain>_agent tool it names, then give the last
+   observation as the Final Answer,
+4. FAKE_LLM_DEFAULT for plain (non-ReAct) prompts.
+
+FAKE_LLM_LATENCY_MS / FAKE_LLM_JITTER_MS add a per-call delay; the jitter is
+seeded by the prompt so runs are repeatable.
+"""
+import hashlib
+import json
+import os
+import random
+import re
+import time
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional
+
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk, BaseMessage
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+
+_TOOLS = re.compile(r"should be one of \[([^\]]*)\]")
+_OBSERVATION = re.compile(r"Observation:\s*(.*?)\s*(?:\nThought:|$)", re.S)
+
+
+def _last_question(prompt: str) -> str:
+    tail = prompt.rsplit("Question:", 1)[-1]
+    return tail.split("\nThought:", 1)[0].strip()
+
+
+def _observations(prompt: str) -> List[str]:
+    return _OBSERVATION.findall(prompt.rsplit("Question:", 1)[-1])
+
+
+def _load_script(path: Optional[str]) -> List[Dict[str, Any]]:
+    if not path or not Path(path).exists():
+        return []
+    rules = json.loads(Path(path).read_text(encoding="utf-8"))
+    return [dict(rule, match=re.compile(rule["match"], re.I | re.S)) for rule in rules]
+
+
+def _load_recordings(path: Optional[str]) -> Dict[str, str]:
+    if not path or not Path(path).exists():
+        return {}
+    with open(path, encoding="utf-8") as f:
+        records = (json.loads(line) for line in f if line.strip())
+        return {r["prompt_sha256"]: r["response"] for r in records}
+
+
+def prompt_digest(prompt: str) -> str:
+    return hashlib.sha256(prompt.encode("utf-8")).hexdigest()
+
+
+class FakeChatModel(BaseChatModel):
+    """Chat model that replays scripted or recorded responses without network access."""
+
+    script: List[Dict[str, Any]] = []
+    recordings: Dict[str, str] = {}
+    default: str = "unknown"
+    latency_ms: float = 0.0
+    jitter_ms: float = 0.0
+    calls: int = 0
+
+    @property
+    def _llm_type(self) -> str:
+        return "fake-erp"
+
+    def respond(self, prompt: str) -> str:
+        question = _last_question(prompt)
+        observations = _observations(prompt)
+        last = observations[-1] if observations else ""
+        for rule in self.script:
+            if rule["match"].search(question):
+                return rule["response"].format(question=question, observation=last)
+        recorded = self.recordings.get(prompt_digest(prompt))
+        if recorded is not None:
+            return recorded
+        tools_match = _TOOLS.search(prompt)
+        if tools_match is None:
+            return self.default
+        return self._react_step(question, [t.strip() for t in tools_match.group(1).split(",")], observations)
+
+    @staticmethod
+    def _react_step(question: str, tools: List[str], observations: List[str]) -> str:
+        if not observations and "classify_and_route" in tools:
+            return f"Thought: I should route this request.\nAction: classify_and_route\nAction Input: {question}"
+        if len(observations) == 1 and "classify_and_route" in tools:
+            executor = f"execute_with_{observations[0].strip()}"
+            if executor in tools:
+                return f"Thought: I should ask the specialist.\nAction: {executor}\nAction Input: {question}"
+        answer = observations[-1] if observations else f"[fake] {question}"
+        return f"Thought: I now know the final answer\nFinal Answer: {answer}"
+
+    def _delay(self, prompt: str):
+        delay = self.latency_ms
+        if self.jitter_ms:
+            delay += random.Random(prompt_digest(prompt)).uniform(0, self.jitter_ms)
+        if delay:
+            time.sleep(delay / 1000)
+
+    def _generate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None,
+                  run_manager=None, **kwargs: Any) -> ChatResult:
+        prompt = "\n".join(str(m.content) for m in messages)
+        self.calls += 1
+        self._delay(prompt)
+        text = self.respond(prompt)
+        for token in stop or []:
+            text = text.split(token, 1)[0]
+        usage = {"input_tokens": len(prompt.split()), "output_tokens": len(text.split())}
+        usage["total_tokens"] = usage["input_tokens"] + usage["output_tokens"]
+        return ChatResult(generations=[ChatGeneration(message=AIMessage(content=text, usage_metadata=usage))])
+
+    def _stream(self, messages: List[BaseMessage], stop: Optional[List[str]] = None,
+                run_manager=None, **kwargs: Any) -> Iterator[ChatGenerationChunk]:
+        text = self._generate(messages, stop=stop).generations[0].message.content
+        for piece in re.findall(r"\S+\s*|\s+", text):
+            chunk = ChatGenerationChunk(message=AIMessageChunk(content=piece))
+            if run_manager:
+                run_manager.on_llm_new_token(piece, chunk=chunk)
+            yield chunk
+
+
+def get_fake_llm() -> FakeChatModel:
+    """Fake model configured from the FAKE_LLM_* environment variables."""
+    return FakeChatModel(
+        script=_load_script(os.getenv("FAKE_LLM_SCRIPT")),
+        recordings=_load_recordings(os.getenv("FAKE_LLM_RECORDINGS")),
+        default=os.getenv("FAKE_LLM_DEFAULT", "unknown"),
+        latency_ms=float(os.getenv("FAKE_LLM_LATENCY_MS", "0")),
+        jitter_ms=float(os.getenv("FAKE_LLM_JITTER_MS", "0")),
+    )
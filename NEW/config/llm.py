@@ -1,28 +1,42 @@
 import os
+from functools import lru_cache
 from dotenv import load_dotenv
-from langchain_google_genai import ChatGoogleGenerativeAI
+from .llm_cache import get_response_cache
+from .fake_llm import get_fake_llm
+from .metrics import MetricsCallbackHandler
 
 # Load variables from .env if running locally
 load_dotenv()
 
-def get_llm():
-    """Get configured LLM instance - general (Gemini 1.5 Flash)."""
+# "gemini" (default) or "fake" for the offline scripted model in config/fake_llm.py
+LLM_BACKEND = os.getenv("ERP_LLM_BACKEND", "gemini").lower()
+
+def _api_key() -> str:
     api_key = os.getenv("GOOGLE_API_KEY")
     if not api_key:
         raise RuntimeError("GOOGLE_API_KEY not set. Define it in .env or export it in your environment.")
+    return api_key
+
+@lru_cache(maxsize=None)
+def _client(model: str, temperature: float, api_key: str):
+    """One shared client per configuration; the Gemini SDK is only imported here."""
+    if LLM_BACKEND == "fake":
+        llm = get_fake_llm()
+        llm.callbacks = [MetricsCallbackHandler("fake")]
+        return llm
+    from langchain_google_genai import ChatGoogleGenerativeAI
     return ChatGoogleGenerativeAI(
-        model="gemini-1.5-flash",
-        temperature=0.1,
+        model=model,
+        temperature=temperature,
         google_api_key=api_key,
+        cache=get_response_cache(model, temperature),
+        callbacks=[MetricsCallbackHandler(model)],
     )
 
+def get_llm():
+    """Get configured LLM instance - general (Gemini 1.5 Flash)."""
+    return _client("gemini-1.5-flash", 0.1, "" if LLM_BACKEND == "fake" else _api_key())
+
 def get_router_llm():
     """Get LLM for router decisions (deterministic)."""
-    api_key = os.getenv("GOOGLE_API_KEY")
-    if not api_key:
-        raise RuntimeError("GOOGLE_API_KEY not set. Define it in .env or export it in your environment.")
-    return ChatGoogleGenerativeAI(
-        model="gemini-1.5-flash",
-        temperature=0.0,
-        google_api_key=api_key,
-    )
+    return _client("gemini-1.5-flash", 0.0, "" if LLM_BACKEND == "fake" else _api_key())
@@ -0,0 +1,161 @@
+"""
+Disk-backed exact-match cache for LLM responses.
+
+Entries are keyed on (model, temperature, prompt hash), where the hashed
+prompt also carries LangChain's serialized call parameters (stop words etc.).
+The cache is size-bounded (least recently hit entries are evicted first),
+entries expire after a TTL, and a single call can skip it with
+`llm_cache_bypass()`.
+
+Settings (environment):
+    LLM_CACHE_ENABLED      "0" disables caching (default "1")
+    LLM_CACHE_PATH         SQLite file (default NEW/llm_cache.db)
+    LLM_CACHE_MAX_ENTRIES  maximum number of cached responses (default 10000)
+    LLM_CACHE_TTL_SECONDS  entry lifetime in seconds (default 86400)
+    LLM_CACHE_PRUNE_EVERY  expired/overflow entries are pruned every N stores
+                           (default 100), so the size can exceed the cap by that much
+"""
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from pathlib import Path
+from typing import Any, Dict, Optional, Tuple
+
+from langchain_core.caches import BaseCache, RETURN_VAL_TYPE
+from langchain_core.load import dumps, loads
+
+CACHE_PATH = Path(os.getenv("LLM_CACHE_PATH", Path(__file__).resolve().parents[1] / "llm_cache.db"))
+MAX_ENTRIES = int(os.getenv("LLM_CACHE_MAX_ENTRIES", "10000"))
+TTL_SECONDS = float(os.getenv("LLM_CACHE_TTL_SECONDS", "86400"))
+PRUNE_EVERY = max(1, int(os.getenv("LLM_CACHE_PRUNE_EVERY", "100")))
+
+_bypass: ContextVar[bool] = ContextVar("llm_cache_bypass", default=False)
+
+
+@contextmanager
+def llm_cache_bypass():
+    """Skip the response cache (no lookup, no store) for calls made inside the block."""
+    token = _bypass.set(True)
+    try:
+        yield
+    finally:
+        _bypass.reset(token)
+
+
+class SQLiteResponseCache(BaseCache):
+    """LangChain cache bound to one model configuration."""
+
+    def __init__(self, model: str, temperature: float, path: Path = CACHE_PATH,
+                 max_entries: int = MAX_ENTRIES, ttl_seconds: float = TTL_SECONDS):
+        self.model = model
+        self.temperature = float(temperature)
+        self.path = Path(path)
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.hits = 0
+        self.misses = 0
+        self._stores = 0
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        con = self._conn()
+        # WAL is a property of the database file, so setting it once is enough
+        con.execute("PRAGMA journal_mode=WAL;")
+        with con:
+            con.execute(
+                """
+                CREATE TABLE IF NOT EXISTS llm_cache (
+                    key TEXT PRIMARY KEY,
+                    model TEXT,
+                    temperature REAL,
+                    response TEXT,
+                    created_at REAL,
+                    last_hit REAL
+                )
+                """
+            )
+            con.execute("CREATE INDEX IF NOT EXISTS idx_llm_cache_last_hit ON llm_cache(last_hit)")
+
+    def _conn(self):
+        """This thread's connection to the cache file, opened on first use."""
+        con = getattr(self._local, "con", None)
+        if con is None:
+            con = self._local.con = sqlite3.connect(self.path, timeout=5)
+        return con
+
+    def _key(self, prompt: str, llm_string: str) -> str:
+        digest = hashlib.sha256(f"{llm_string}\x00{prompt}".encode("utf-8")).hexdigest()
+        return f"{self.model}|{self.temperature}|{digest}"
+
+    def lookup(self, prompt: str, llm_string: str) -> Optional[RETURN_VAL_TYPE]:
+        if _bypass.get():
+            return None
+        key = self._key(prompt, llm_string)
+        now = time.time()
+        with self._conn() as con:
+            row = con.execute("SELECT response, created_at FROM llm_cache WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            if now - row[1] > self.ttl_seconds:
+                con.execute("DELETE FROM llm_cache WHERE key = ?", (key,))
+                self.misses += 1
+                return None
+            con.execute("UPDATE llm_cache SET last_hit = ? WHERE key = ?", (now, key))
+        self.hits += 1
+        return [loads(g) for g in json.loads(row[0])]
+
+    def update(self, prompt: str, llm_string: str, return_val: RETURN_VAL_TYPE) -> None:
+        if _bypass.get():
+            return
+        now = time.time()
+        payload = json.dumps([dumps(g) for g in return_val])
+        with self._lock:
+            self._stores += 1
+            prune = self._stores % PRUNE_EVERY == 0
+        with self._conn() as con:
+            con.execute(
+                "INSERT OR REPLACE INTO llm_cache (key, model, temperature, response, created_at, last_hit) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (self._key(prompt, llm_string), self.model, self.temperature, payload, now, now),
+            )
+        if prune:
+            self.prune(now)
+
+    def prune(self, now: Optional[float] = None) -> None:
+        """Delete expired entries, then the least recently hit ones above max_entries."""
+        now = time.time() if now is None else now
+        with self._conn() as con:
+            con.execute("DELETE FROM llm_cache WHERE created_at < ?", (now - self.ttl_seconds,))
+            overflow = con.execute("SELECT COUNT(*) FROM llm_cache").fetchone()[0] - self.max_entries
+            if overflow > 0:
+                con.execute(
+                    "DELETE FROM llm_cache WHERE key IN (SELECT key FROM llm_cache ORDER BY last_hit LIMIT ?)",
+                    (overflow,),
+                )
+
+    def clear(self, **kwargs: Any) -> None:
+        with self._conn() as con:
+            con.execute("DELETE FROM llm_cache WHERE model = ? AND temperature = ?", (self.model, self.temperature))
+
+
+_caches: Dict[Tuple[str, float], SQLiteResponseCache] = {}
+
+
+def get_response_cache(model: str, temperature: float) -> Optional[SQLiteResponseCache]:
+    """Shared cache for a model configuration, or None when caching is disabled."""
+    if os.getenv("LLM_CACHE_ENABLED", "1") == "0":
+        return None
+    key = (model, float(temperature))
+    if key not in _caches:
+        _caches[key] = SQLiteResponseCache(model, temperature)
+    return _caches[key]
+
+
+def cache_stats() -> Dict[str, Dict[str, int]]:
+    """Lookup hits/misses per cached model configuration since process start."""
+    return {f"{model}@{temperature:g}": {"hits": c.hits, "misses": c.misses} for (model, temperature), c in _caches.items()}
@@ -0,0 +1,193 @@
+"""
+Background writer for audit rows (tool calls, conversations, slow queries).
+
+Callers enqueue (sql, params) records and return immediately; one thread per
+database drains the queue and commits them in batches, by size or after a
+short interval, so the request path never waits on SQLite commits.
+
+Settings (environment):
+    AUDIT_LOG_QUEUE_SIZE   bounded queue length (default 10000)
+    AUDIT_LOG_BATCH_SIZE   rows per transaction (default 200)
+    AUDIT_LOG_FLUSH_MS     max time a record waits before a flush (default 500)
+    AUDIT_LOG_POLICY       "drop" (default) or "block" when the queue is full
+"""
+import atexit
+import os
+import queue
+import sqlite3
+import threading
+import time
+from itertools import groupby
+from pathlib import Path
+from typing import Dict, Optional, Sequence
+
+_STOP = object()
+
+
+class LogWriter:
+    def __init__(self, db_path, max_queue: int = 10000, batch_size: int = 200,
+                 flush_interval: float = 0.5, policy: str = "drop", block_timeout: Optional[float] = 1.0):
+        if policy not in ("drop", "block"):
+            raise ValueError(f"Unknown queue-full policy: {policy}")
+        self.db_path = str(db_path)
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.policy = policy
+        self.block_timeout = block_timeout
+        self.written = 0
+        self.dropped = 0
+        self.batches = 0
+        self.errors = 0
+        self._queue: "queue.Queue" = queue.Queue(maxsize=max_queue)
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, name=f"log-writer:{Path(self.db_path).name}", daemon=True)
+        self._thread.start()
+
+    def write(self, sql: str, params: Sequence) -> bool:
+        """Queue one row; returns False if it was dropped because the queue is full."""
+        if self._closed:
+            self.dropped += 1
+            return False
+        try:
+            if self.policy == "block":
+                self._queue.put((sql, tuple(params)), timeout=self.block_timeout)
+            else:
+                self._queue.put_nowait((sql, tuple(params)))
+            return True
+        except queue.Full:
+            self.dropped += 1
+            return False
+
+    def flush(self, timeout: float = 5.0) -> bool:
+        """Wait until everything queued so far is committed."""
+        deadline = time.monotonic() + timeout
+        while self._queue.unfinished_tasks and time.monotonic() < deadline:
+            time.sleep(0.01)
+        return not self._queue.unfinished_tasks
+
+    def close(self, timeout: float = 5.0):
+        """Stop accepting rows, drain the queue and stop the thread."""
+        if self._closed:
+            return
+        self._closed = True
+        self._queue.put(_STOP)
+        self._thread.join(timeout)
+
+    def stats(self) -> dict:
+        return {"queued": self._queue.qsize(), "written": self.written, "dropped": self.dropped,
+                "batches": self.batches, "errors": self.errors}
+
+    def _collect(self):
+        """Block for the first record, then gather more until the batch is full or the interval ends."""
+        first = self._queue.get()
+        batch, stop = [], first is _STOP
+        if not stop:
+            batch.append(first)
+        deadline = time.monotonic() + self.flush_interval
+        while not stop and len(batch) < self.batch_size:
+            remaining = deadline - time.monotonic()
+            try:
+                item = self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if item is _STOP:
+                stop = True
+            else:
+                batch.append(item)
+        if stop:
+            # Drain whatever was queued before close()
+            while True:
+                try:
+                    item = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if item is not _STOP:
+                    batch.append(item)
+                else:
+                    self._queue.task_done()
+        return batch, stop
+
+    def _run(self):
+        conn = sqlite3.connect(self.db_path, check_same_thread=False)
+        conn.execute("PRAGMA synchronous=NORMAL")
+        try:
+            while True:
+                batch, stop = self._collect()
+                for start in range(0, len(batch), self.batch_size):
+                    self._commit(conn, batch[start:start + self.batch_size])
+                for _ in range(len(batch) + stop):
+                    self._queue.task_done()
+                if stop:
+                    return
+        finally:
+            conn.close()
+
+    def _commit(self, conn, batch):
+        # Consecutive rows for the same statement go in one executemany
+        groups = [(sql, [params for _, params in rows]) for sql, rows in groupby(batch, key=lambda r: r[0])]
+        try:
+            with conn:
+                for sql, rows in groups:
+                    conn.executemany(sql, rows)
+            self.written += len(batch)
+            self.batches += 1
+            return
+        except sqlite3.Error as e:
+            self.errors += 1
+            error = e
+        # The batch was rolled back; retry each group on its own, and each row of a failing group,
+        # so one bad row only loses itself
+        lost = 0
+        for sql, rows in groups:
+            try:
+                with conn:
+                    conn.executemany(sql, rows)
+                self.written += len(rows)
+                continue
+            except sqlite3.Error:
+                pass
+            for params in rows:
+                try:
+                    with conn:
+                        conn.execute(sql, params)
+                    self.written += 1
+                except sqlite3.Error as e:
+                    lost += 1
+                    error = e
+        self.batches += 1
+        if lost:
+            print(f"Audit log write error ({lost} of {len(batch)} rows lost): {error}")
+
+_writers: Dict[str, LogWriter] = {}
+_writers_lock = threading.Lock()
+
+
+def get_log_writer(db_path) -> LogWriter:
+    """Return the process-wide writer for a database file (drained at exit)."""
+    key = os.path.abspath(str(db_path))
+    with _writers_lock:
+        writer = _writers.get(key)
+        if writer is None:
+            writer = _writers[key] = LogWriter(
+                key,
+                max_queue=int(os.getenv("AUDIT_LOG_QUEUE_SIZE", "10000")),
+                batch_size=int(os.getenv("AUDIT_LOG_BATCH_SIZE", "200")),
+                flush_interval=float(os.getenv("AUDIT_LOG_FLUSH_MS", "500")) / 1000,
+                policy=os.getenv("AUDIT_LOG_POLICY", "drop"),
+            )
+        return writer
+
+
+def writer_stats() -> Dict[str, dict]:
+    """Queue depth and counters of every process-wide writer, keyed by database file."""
+    with _writers_lock:
+        return {path: writer.stats() for path, writer in _writers.items()}
+
+
+@atexit.register
+def close_all():
+    """Drain every writer; also safe to call from an application shutdown hook."""
+    with _writers_lock:
+        writers = list(_writers.values())
+    for writer in writers:
+        writer.close()
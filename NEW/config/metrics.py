@@ -0,0 +1,315 @@
+"""
+In-process span timing and Prometheus-format metrics.
+
+    with span("tool", "text_to_sql_tool"):
+        ...
+
+records the duration in the `erp_span_duration_seconds` histogram and logs
+it with the current request's trace ID. SQL statements run on a
+TracedConnection are timed the same way and their row counts are recorded;
+slow ones also go to the slow-query log (config/slow_queries.py).
+LLM calls are timed through MetricsCallbackHandler, which also records token
+counts. `render()` returns everything in the Prometheus text format for the
+/metrics endpoint.
+"""
+import bisect
+import logging
+import re
+import sqlite3
+import sys
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import wraps
+from typing import Dict, Iterable, Optional, Tuple
+
+from langchain_core.callbacks import BaseCallbackHandler
+
+from . import slow_queries
+
+logger = logging.getLogger("erp.trace")
+
+# NEW/ is importable both as the top-level `config` package (main.py, agents, tools) and as
+# `NEW.config` (Graduation_project). Whichever copy loads second reuses the first one's trace ID and
+# histograms, so /metrics and the logs see spans recorded through either name.
+_twin = next((m for m in (sys.modules.get(n) for n in ("config.metrics", "NEW.config.metrics"))
+              if m is not None and m.__name__ != __name__ and hasattr(m, "REGISTRY")), None)
+
+trace_id_var: ContextVar[str] = _twin.trace_id_var if _twin else ContextVar("trace_id", default="-")
+
+LATENCY_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+COUNT_BUCKETS = (0, 1, 5, 10, 50, 100, 500, 1000, 5000, 10000, 100000)
+
+
+class Histogram:
+    """Cumulative-bucket histogram with labels, rendered in the Prometheus text format."""
+
+    def __init__(self, name: str, help_text: str, labelnames: Tuple[str, ...], buckets: Iterable[float]):
+        self.name = name
+        self.help_text = help_text
+        self.labelnames = labelnames
+        self.buckets = tuple(sorted(buckets))
+        self._series: Dict[Tuple[str, ...], list] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, *labels: str):
+        i = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                # [per-bucket counts..., +Inf count, sum]
+                series = self._series[labels] = [0] * (len(self.buckets) + 1) + [0.0]
+            series[i] += 1
+            series[-1] += value
+
+    def render(self) -> str:
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            items = [(labels, list(series)) for labels, series in sorted(self._series.items())]
+        for labels, series in items:
+            base = ",".join(f'{k}="{_escape(v)}"' for k, v in zip(self.labelnames, labels))
+            sep = "," if base else ""
+            cumulative = 0
+            for bound, count in zip(self.buckets, series):
+                cumulative += count
+                lines.append(f'{self.name}_bucket{{{base}{sep}le="{bound:g}"}} {cumulative}')
+            cumulative += series[len(self.buckets)]
+            lines.append(f'{self.name}_bucket{{{base}{sep}le="+Inf"}} {cumulative}')
+            lines.append(f"{self.name}_sum{{{base}}} {series[-1]:.6f}")
+            lines.append(f"{self.name}_count{{{base}}} {cumulative}")
+        return "\n".join(lines)
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+SPAN_SECONDS = Histogram("erp_span_duration_seconds", "Duration of instrumented operations.",
+                         ("kind", "name"), LATENCY_BUCKETS)
+SQL_ROWS = Histogram("erp_sql_rows", "Rows returned or changed per SQL statement.",
+                     ("statement",), COUNT_BUCKETS)
+LLM_TOKENS = Histogram("erp_llm_tokens", "Tokens per LLM call.",
+                       ("model", "direction"), COUNT_BUCKETS)
+if _twin:
+    SPAN_SECONDS, SQL_ROWS, LLM_TOKENS = _twin.SPAN_SECONDS, _twin.SQL_ROWS, _twin.LLM_TOKENS
+REGISTRY = [SPAN_SECONDS, SQL_ROWS, LLM_TOKENS]
+
+
+def render() -> str:
+    return "\n".join(h.render() for h in REGISTRY) + "\n"
+
+
+def new_trace_id() -> str:
+    return uuid.uuid4().hex[:16]
+
+
+@contextmanager
+def span(kind: str, name: str):
+    """Time a block into erp_span_duration_seconds{kind, name}."""
+    start = time.perf_counter()
+    status = "ok"
+    try:
+        yield
+    except Exception:
+        status = "error"
+        raise
+    finally:
+        elapsed = time.perf_counter() - start
+        SPAN_SECONDS.observe(elapsed, kind, name)
+        logger.debug("span %s:%s %.1fms %s", kind, name, elapsed * 1000, status)
+
+
+def traced(kind: str, name: Optional[str] = None):
+    """Decorator form of span()."""
+    def decorate(fn):
+        label = name or fn.__qualname__
+
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            with span(kind, label):
+                return fn(*args, **kwargs)
+        wrapper.__traced__ = True
+        return wrapper
+    return decorate
+
+
+class TraceIdFilter(logging.Filter):
+    """Adds `trace_id` to every log record so formats can include %(trace_id)s."""
+
+    def filter(self, record):
+        record.trace_id = trace_id_var.get()
+        return True
+
+
+def configure_logging(level: int = logging.INFO):
+    """Add the trace-ID handler to the root logger once; later calls only change the level."""
+    root = logging.getLogger()
+    if not any(getattr(h, "erp_trace_handler", False) for h in root.handlers):
+        handler = logging.StreamHandler()
+        handler.erp_trace_handler = True
+        handler.addFilter(TraceIdFilter())
+        handler.setFormatter(logging.Formatter("%(asctime)s %(levelname)s [%(trace_id)s] %(name)s: %(message)s"))
+        root.addHandler(handler)
+    root.setLevel(level)
+
+
+# ---------------------------------------------------------------------------
+# SQL
+# ---------------------------------------------------------------------------
+
+_STATEMENT = re.compile(r"^\s*(\w+)(?:.*?\b(?:FROM|INTO|UPDATE|TABLE)\s+[\"`\[]?(\w+))?", re.I | re.S)
+
+
+def statement_label(sql: str) -> str:
+    """'SELECT customers', 'INSERT tool_calls', ... - bounded by the schema, unlike raw SQL."""
+    m = _STATEMENT.match(sql or "")
+    if not m:
+        return "OTHER"
+    verb = m.group(1).upper()
+    if verb == "UPDATE":
+        table = re.match(r"^\s*UPDATE\s+[\"`\[]?(\w+)", sql, re.I)
+        return f"UPDATE {table.group(1)}" if table else verb
+    return f"{verb} {m.group(2)}" if m.group(2) else verb
+
+
+class TracedCursor(sqlite3.Cursor):
+    _label = "SELECT"
+    # [sql, params, seconds spent executing and fetching, rows fetched] of a SELECT. SQLite does most
+    # of the work while stepping through rows, so it is reported once the rows are exhausted, or when
+    # the cursor is reused, closed or collected - whichever way (fetch*, iteration) they were read.
+    _pending = None
+
+    def _report(self):
+        pending, self._pending = self._pending, None
+        if pending:
+            sql, parameters, elapsed, rows = pending
+            SQL_ROWS.observe(rows, self._label)
+            slow_queries.record(self.connection, sql, parameters, elapsed, rows, trace_id_var.get())
+
+    def _fetched(self, start: float, rows: int, exhausted: bool):
+        pending = self._pending
+        if pending:
+            pending[2] += time.perf_counter() - start
+            pending[3] += rows
+            if exhausted:
+                self._report()
+
+    def execute(self, sql, parameters=()):
+        self._report()
+        self._label = label = statement_label(sql)
+        start = time.perf_counter()
+        with span("sql", label):
+            super().execute(sql, parameters)
+        elapsed = time.perf_counter() - start
+        if self.description is None:
+            SQL_ROWS.observe(max(self.rowcount, 0), label)
+            slow_queries.record(self.connection, sql, parameters, elapsed, max(self.rowcount, 0), trace_id_var.get())
+        else:
+            self._pending = [sql, parameters, elapsed, 0]
+        return self
+
+    def executemany(self, sql, seq_of_parameters):
+        self._report()
+        self._label = label = statement_label(sql)
+        if not isinstance(seq_of_parameters, (list, tuple)):
+            seq_of_parameters = list(seq_of_parameters)
+        start = time.perf_counter()
+        with span("sql", label):
+            super().executemany(sql, seq_of_parameters)
+        SQL_ROWS.observe(max(self.rowcount, 0), label)
+        # The first row's parameters stand in for the batch in the plan
+        slow_queries.record(self.connection, sql, seq_of_parameters[0] if seq_of_parameters else (),
+                            time.perf_counter() - start, max(self.rowcount, 0), trace_id_var.get())
+        return self
+
+    def fetchall(self):
+        start = time.perf_counter()
+        rows = super().fetchall()
+        self._fetched(start, len(rows), True)
+        return rows
+
+    def fetchmany(self, size=None):
+        start = time.perf_counter()
+        size = self.arraysize if size is None else size
+        rows = super().fetchmany(size)
+        self._fetched(start, len(rows), len(rows) < size or not rows)
+        return rows
+
+    def fetchone(self):
+        start = time.perf_counter()
+        row = super().fetchone()
+        self._fetched(start, row is not None, row is None)
+        return row
+
+    def __next__(self):
+        start = time.perf_counter()
+        try:
+            row = super().__next__()
+        except StopIteration:
+            self._fetched(start, 0, True)
+            raise
+        self._fetched(start, 1, False)
+        return row
+
+    def close(self):
+        self._report()
+        super().close()
+
+    def __del__(self):
+        # conn.execute(...).fetchone() drops the cursor with its rows unread
+        try:
+            self._report()
+        except Exception:
+            pass
+
+
+class TracedConnection(sqlite3.Connection):
+    """sqlite3 connection whose statements are timed; use as sqlite3.connect(..., factory=TracedConnection)."""
+
+    def cursor(self, factory=TracedCursor):
+        return super().cursor(factory)
+
+    # The C implementations of these shortcuts don't go through cursor()
+    def execute(self, sql, parameters=()):
+        return self.cursor().execute(sql, parameters)
+
+    def executemany(self, sql, seq_of_parameters):
+        return self.cursor().executemany(sql, seq_of_parameters)
+
+
+# ---------------------------------------------------------------------------
+# LLM
+# ---------------------------------------------------------------------------
+
+class MetricsCallbackHandler(BaseCallbackHandler):
+    """Times LLM calls and records prompt/completion token counts."""
+
+    def __init__(self, model: str):
+        self.model = model
+        self._started: Dict[uuid.UUID, float] = {}
+
+    def on_chat_model_start(self, serialized, messages, *, run_id, **kwargs):
+        self._started[run_id] = time.perf_counter()
+
+    def on_llm_start(self, serialized, prompts, *, run_id, **kwargs):
+        self._started[run_id] = time.perf_counter()
+
+    def on_llm_end(self, response, *, run_id, **kwargs):
+        start = self._started.pop(run_id, None)
+        if start is not None:
+            elapsed = time.perf_counter() - start
+            SPAN_SECONDS.observe(elapsed, "llm", self.model)
+            logger.debug("span llm:%s %.1fms", self.model, elapsed * 1000)
+        for generations in response.generations:
+            for generation in generations:
+                usage = getattr(getattr(generation, "message", None), "usage_metadata", None)
+                if usage:
+                    LLM_TOKENS.observe(usage.get("input_tokens", 0), self.model, "prompt")
+                    LLM_TOKENS.observe(usage.get("output_tokens", 0), self.model, "completion")
+
+    def on_llm_error(self, error, *, run_id, **kwargs):
+        start = self._started.pop(run_id, None)
+        if start is not None:
+            SPAN_SECONDS.observe(time.perf_counter() - start, "llm_error", self.model)
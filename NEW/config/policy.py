@@ -0,0 +1,268 @@
+"""
+Governance policy engine for the routers.
+
+Rules live in a JSON file (GOVERNANCE_RULES_PATH, default
+governance_rules.json next to this module):
+
+    {"rules": [{"phrase": "export all", "risk": "HIGH"},
+               {"phrase": "payout", "domains": ["finance"], "risk": "HIGH"}]}
+
+A rule without `domains` applies to every domain; `reason` overrides the
+text reported when it matches. Large rule sets are compiled once into an
+Aho-Corasick automaton, so checking a request is a single pass over its
+characters whatever the number of rules, and overlapping phrases
+("transfer" inside "transfer funds") are all reported like the old
+substring checks did. The automaton walks the text in Python while `in`
+runs in C, so it only pays off with many rules: below
+GOVERNANCE_AUTOMATON_MIN_RULES (default 100, about where the two break
+even; see the benchmark) the per-phrase scan is used, which is about 3x
+faster for the couple of dozen shipped rules. The file is re-read when
+its mtime changes (checked at most every GOVERNANCE_RELOAD_SECONDS); a
+broken edit keeps the previous rules in force.
+
+Benchmark against the per-phrase `in` scan from the NEW directory:
+    python -m config.policy benchmark --sizes 10,100,1000,10000
+"""
+import argparse
+import json
+import os
+import random
+import threading
+import time
+from collections import deque
+from pathlib import Path
+from typing import Dict, FrozenSet, Iterable, List, NamedTuple, Optional
+
+RULES_PATH = Path(os.getenv("GOVERNANCE_RULES_PATH", Path(__file__).with_name("governance_rules.json")))
+RELOAD_INTERVAL = float(os.getenv("GOVERNANCE_RELOAD_SECONDS", "2"))
+AUTOMATON_MIN_RULES = int(os.getenv("GOVERNANCE_AUTOMATON_MIN_RULES", "100"))
+RISK_LEVELS = ("LOW", "MEDIUM", "HIGH")
+
+
+class Rule(NamedTuple):
+    phrase: str
+    domains: Optional[FrozenSet[str]]
+    risk: str
+    reason: str
+
+
+def parse_rules(data: Dict) -> List[Rule]:
+    rules = []
+    for i, raw in enumerate(data.get("rules", [])):
+        phrase = str(raw.get("phrase", "")).strip().lower()
+        if not phrase:
+            raise ValueError(f"rule {i} has no phrase")
+        risk = str(raw.get("risk", "HIGH")).upper()
+        if risk not in RISK_LEVELS:
+            raise ValueError(f"rule {i} ({phrase!r}) has unknown risk {risk!r}")
+        domains = raw.get("domains")
+        domains = frozenset(d.lower() for d in domains) if domains else None
+        reason = raw.get("reason") or (f"domain-sensitive: {phrase}" if domains else phrase)
+        rules.append(Rule(phrase, domains, risk, reason))
+    return rules
+
+
+class PhraseMatcher:
+    """Aho-Corasick automaton over a fixed list of phrases."""
+
+    def __init__(self, phrases: Iterable[str]):
+        goto: List[Dict[str, int]] = [{}]
+        out: List[tuple] = [()]
+        for i, phrase in enumerate(phrases):
+            node = 0
+            for ch in phrase:
+                nxt = goto[node].get(ch)
+                if nxt is None:
+                    nxt = goto[node][ch] = len(goto)
+                    goto.append({})
+                    out.append(())
+                node = nxt
+            out[node] += (i,)
+
+        fail = [0] * len(goto)
+        queue = deque(goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for ch, nxt in goto[node].items():
+                queue.append(nxt)
+                f = fail[node]
+                while f and ch not in goto[f]:
+                    f = fail[f]
+                fail[nxt] = goto[f].get(ch, 0)
+                # A match ending here also ends every phrase on the failure chain
+                out[nxt] += out[fail[nxt]]
+        self._goto, self._fail, self._out = goto, fail, out
+
+    def find(self, text: str) -> set:
+        """Indices of all phrases occurring in `text` (overlaps included)."""
+        goto, fail, out = self._goto, self._fail, self._out
+        node, found = 0, set()
+        for ch in text:
+            while node and ch not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(ch, 0)
+            if out[node]:
+                found.update(out[node])
+        return found
+
+
+class PolicyEngine:
+    """Compiled rule set; immutable, so readers never see a half-built reload."""
+
+    def __init__(self, rules: List[Rule], automaton: Optional[bool] = None):
+        self.rules = rules
+        if automaton is None:
+            automaton = len(rules) >= AUTOMATON_MIN_RULES
+        self._matcher = PhraseMatcher(rule.phrase for rule in rules) if automaton else None
+
+    @classmethod
+    def from_file(cls, path: Path) -> "PolicyEngine":
+        with open(path, "r", encoding="utf-8") as f:
+            return cls(parse_rules(json.load(f)))
+
+    def check(self, user_request: str, domain: Optional[str] = None) -> dict:
+        """{needs_approval, risk_level, reasons} for the request in `domain`."""
+        domain = (domain or "").lower()
+        text = (user_request or "").lower()
+        if self._matcher is None:
+            matched = [r for r in self.rules if r.phrase in text]
+        else:
+            matched = [self.rules[i] for i in sorted(self._matcher.find(text))]
+        matched = [r for r in matched if r.domains is None or domain in r.domains]
+        if not matched:
+            return {"needs_approval": False, "risk_level": "LOW", "reasons": []}
+        risk = max((r.risk for r in matched), key=RISK_LEVELS.index)
+        return {"needs_approval": True, "risk_level": risk, "reasons": [r.reason for r in matched]}
+
+
+class PolicyStore:
+    """Serves the current PolicyEngine, recompiling when the rules file changes."""
+
+    def __init__(self, path: Path = RULES_PATH, reload_interval: float = RELOAD_INTERVAL):
+        self.path = Path(path)
+        self.reload_interval = reload_interval
+        self._lock = threading.Lock()
+        self._mtime = self.path.stat().st_mtime_ns
+        self._engine = PolicyEngine.from_file(self.path)
+        self._checked = time.monotonic()
+
+    def engine(self) -> PolicyEngine:
+        if time.monotonic() - self._checked >= self.reload_interval:
+            self._maybe_reload()
+        return self._engine
+
+    def _maybe_reload(self):
+        with self._lock:
+            self._checked = time.monotonic()
+            try:
+                mtime = self.path.stat().st_mtime_ns
+            except OSError:
+                return
+            if mtime == self._mtime:
+                return
+            self._mtime = mtime
+            try:
+                engine = PolicyEngine.from_file(self.path)
+            except (OSError, ValueError) as e:
+                # json.JSONDecodeError is a ValueError; keep enforcing the last good rules
+                print(f"Governance rules not reloaded from {self.path}: {e}")
+                return
+            self._engine = engine
+            print(f"Governance rules reloaded: {len(engine.rules)} rules")
+
+
+_store: Optional[PolicyStore] = None
+_store_lock = threading.Lock()
+
+
+def get_policy_store() -> PolicyStore:
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                _store = PolicyStore()
+    return _store
+
+
+def check_governance(user_request: str, domain: str) -> dict:
+    """Flag risky requests that need approval.
+    Returns dict: {needs_approval: bool, risk_level: str, reasons: [str]}
+    """
+    return get_policy_store().engine().check(user_request, domain)
+
+
+# ---------------------------------------------------------------------------
+# Benchmark
+# ---------------------------------------------------------------------------
+
+_SAMPLE_REQUESTS = [
+    "Show me customers in Dubai with open orders",
+    "Export all invoices and transfer funds to the vendor",
+    "How much stock do we have of the solar panels in warehouse A",
+    "Build a dashboard of monthly revenue by region and download report",
+]
+
+
+def _naive_check(rules: List[Rule], user_request: str, domain: str) -> list:
+    """The previous approach: one substring scan per rule."""
+    text = user_request.lower()
+    return [r.reason for r in rules if (r.domains is None or domain in r.domains) and r.phrase in text]
+
+
+def _synthetic_rules(count: int, seed: int = 7) -> List[Rule]:
+    rng = random.Random(seed)
+    alphabet = "abcdefghijklmnopqrstuvwxyz"
+    rules = []
+    for _ in range(count):
+        words = ["".join(rng.choice(alphabet) for _ in range(rng.randint(3, 8))) for _ in range(rng.randint(1, 3))]
+        domains = None if rng.random() < 0.5 else frozenset([rng.choice(["sales", "finance", "inventory", "analytics"])])
+        phrase = " ".join(words)
+        rules.append(Rule(phrase, domains, "HIGH", phrase))
+    return rules
+
+
+def benchmark(sizes: Iterable[int], iterations: int = 2000) -> List[Dict[str, float]]:
+    base = PolicyEngine.from_file(RULES_PATH).rules
+    results = []
+    for size in sizes:
+        rules = base + _synthetic_rules(max(0, size - len(base)))
+        started = time.perf_counter()
+        engine = PolicyEngine(rules, automaton=True)
+        compile_ms = (time.perf_counter() - started) * 1000
+        row = {"rules": len(rules), "compile_ms": round(compile_ms, 2)}
+        for name, fn in (("engine", lambda q: engine.check(q, "finance")),
+                         ("naive", lambda q: _naive_check(rules, q, "finance"))):
+            started = time.perf_counter()
+            for i in range(iterations):
+                fn(_SAMPLE_REQUESTS[i % len(_SAMPLE_REQUESTS)])
+            row[f"{name}_us"] = round((time.perf_counter() - started) / iterations * 1e6, 2)
+        results.append(row)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Check requests against, or benchmark, the governance rules.")
+    sub = parser.add_subparsers(dest="command", required=True)
+    check = sub.add_parser("check")
+    check.add_argument("request")
+    check.add_argument("--domain", default="")
+    bench = sub.add_parser("benchmark")
+    bench.add_argument("--sizes", default="10,100,1000,10000")
+    bench.add_argument("--iterations", type=int, default=2000)
+    bench.add_argument("--json", action="store_true")
+    args = parser.parse_args()
+
+    if args.command == "check":
+        print(json.dumps(check_governance(args.request, args.domain), indent=2))
+        return
+    rows = benchmark([int(s) for s in args.sizes.split(",")], args.iterations)
+    if args.json:
+        print(json.dumps(rows, indent=2))
+        return
+    for r in rows:
+        print(f"rules={r['rules']:>6}  compile={r['compile_ms']:>9.2f}ms  "
+              f"automaton={r['engine_us']:>8.2f}us/check  naive={r['naive_us']:>9.2f}us/check")
+
+
+if __name__ == "__main__":
+    main()
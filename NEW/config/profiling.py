@@ -0,0 +1,208 @@
+"""
+On-demand profiling of single requests.
+
+A profiled call runs in the current thread while either a stack sampler
+(default) or cProfile watches that thread only, so concurrent requests don't
+leak into the profile. Work the call hands to other threads is not seen:
+a profiled `mode=fanout` chat shows the fan-out waiting on its futures,
+while the domain agents run in the _fanout_pool workers unprofiled (profile
+one domain through the react mode to see its agent). Results are stored
+under a profile ID (the request ID plus a server-generated suffix) in
+PROFILE_DIR:
+
+    <id>.json        metadata (query, mode, duration, sample count)
+    <id>.collapsed   folded stacks, one "root;...;leaf count" line per stack
+                     (flamegraph.pl, speedscope, inferno all read this)
+    <id>.prof        raw cProfile stats (cProfile mode only)
+
+Enable per request with `X-Profile: 1` / `?profile=1` (`cprofile` selects
+cProfile), or for every request with PROFILE_ALL=1. List and export with
+GET /api/profiles or from the NEW directory:
+
+    python -m config.profiling list
+    python -m config.profiling export <request_id> -o chat.collapsed
+"""
+import argparse
+import cProfile
+import io
+import json
+import os
+import pstats
+import re
+import sys
+import threading
+import time
+import uuid
+from collections import Counter
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+PROFILE_DIR = Path(os.getenv("PROFILE_DIR", Path(__file__).resolve().parents[1] / "profiles"))
+PROFILE_KEEP = int(os.getenv("PROFILE_KEEP", "100"))
+SAMPLE_INTERVAL = float(os.getenv("PROFILE_INTERVAL_MS", "5")) / 1000
+MODES = ("sample", "cprofile")
+_ID = re.compile(r"^[A-Za-z0-9_-]{1,64}$")
+
+
+def requested_mode(flag: Optional[str]) -> Optional[str]:
+    """Map a header/query flag (or PROFILE_ALL) to a profiling mode, or None."""
+    flag = (flag or os.getenv("PROFILE_ALL") or "").strip().lower()
+    if flag in ("", "0", "false", "no", "off"):
+        return None
+    return flag if flag in MODES else "sample"
+
+
+def _frame_label(code) -> str:
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+
+class StackSampler:
+    """Samples one thread's Python stack every `interval` seconds into folded-stack counts."""
+
+    def __init__(self, thread_id: int, interval: float = SAMPLE_INTERVAL):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks: Counter = Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="stack-sampler", daemon=True)
+
+    def _run(self):
+        own = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is None or self.thread_id == own:
+                continue
+            labels = []
+            while frame is not None:
+                labels.append(_frame_label(frame.f_code))
+                frame = frame.f_back
+            self.stacks[";".join(reversed(labels))] += 1
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+
+
+def _cprofile_stacks(stats: pstats.Stats) -> Counter:
+    """Approximate folded stacks from cProfile: caller;callee weighted by callee time (ms)."""
+    stacks: Counter = Counter()
+    for func, (_, _, tottime, _, callers) in stats.stats.items():
+        label = f"{func[2]} ({os.path.basename(func[0])}:{func[1]})"
+        parents = list(callers) or [None]
+        for parent in parents:
+            prefix = f"{parent[2]} ({os.path.basename(parent[0])}:{parent[1]});" if parent else ""
+            stacks[prefix + label] += max(1, int(tottime * 1000 / len(parents)))
+    return stacks
+
+
+def profile_call(request_id: str, fn: Callable[..., Any], *args, mode: str = "sample",
+                 meta: Optional[Dict[str, Any]] = None, **kwargs) -> Any:
+    """Run fn(*args, **kwargs) in this thread under the profiler and store the profile."""
+    request_id = _safe_id(request_id)
+    PROFILE_DIR.mkdir(parents=True, exist_ok=True)
+    start = time.perf_counter()
+    error = None
+    if mode == "cprofile":
+        profiler = cProfile.Profile()
+        try:
+            result = profiler.runcall(fn, *args, **kwargs)
+        except Exception as e:
+            error, result = e, None
+        profiler.dump_stats(str(PROFILE_DIR / f"{request_id}.prof"))
+        stacks = _cprofile_stacks(pstats.Stats(profiler))
+    else:
+        with StackSampler(threading.get_ident()) as sampler:
+            try:
+                result = fn(*args, **kwargs)
+            except Exception as e:
+                error, result = e, None
+        stacks = sampler.stacks
+    duration = time.perf_counter() - start
+
+    with open(PROFILE_DIR / f"{request_id}.collapsed", "w", encoding="utf-8") as f:
+        for stack, count in stacks.most_common():
+            f.write(f"{stack} {count}\n")
+    info = dict(meta or {}, request_id=request_id, mode=mode, duration_ms=round(duration * 1000, 1),
+                samples=sum(stacks.values()), created_at=time.time(), error=str(error) if error else None)
+    (PROFILE_DIR / f"{request_id}.json").write_text(json.dumps(info), encoding="utf-8")
+    _prune()
+    if error:
+        raise error
+    return result
+
+
+def _prune():
+    metas = sorted(PROFILE_DIR.glob("*.json"), key=lambda p: p.stat().st_mtime)
+    for old in metas[:-PROFILE_KEEP] if PROFILE_KEEP > 0 else []:
+        for suffix in (".json", ".collapsed", ".prof"):
+            old.with_suffix(suffix).unlink(missing_ok=True)
+
+
+def profile_id(candidate: Optional[str]) -> str:
+    """
+    A fresh profile ID, prefixed with the request's ID when that is safe as a file name.
+
+    The request ID can come from the client (X-Request-ID), so it is never the
+    file name on its own: two requests sending the same ID would overwrite each
+    other's profiles.
+    """
+    suffix = uuid.uuid4().hex[:16]
+    prefix = candidate.strip("-_")[:47] if candidate and _ID.match(candidate) else ""
+    return f"{prefix}-{suffix}" if prefix else suffix
+
+
+def _safe_id(request_id: str) -> str:
+    if not _ID.match(request_id or ""):
+        raise KeyError(request_id)
+    return request_id
+
+
+def list_profiles() -> List[Dict[str, Any]]:
+    """Stored profile metadata, newest first."""
+    if not PROFILE_DIR.exists():
+        return []
+    metas = [json.loads(p.read_text(encoding="utf-8")) for p in PROFILE_DIR.glob("*.json")]
+    return sorted(metas, key=lambda m: m.get("created_at", 0), reverse=True)
+
+
+def export_profile(request_id: str, fmt: str = "collapsed") -> str:
+    """The stored profile as folded stacks, metadata JSON, or (cProfile only) a pstats report."""
+    path = PROFILE_DIR / _safe_id(request_id)
+    if fmt == "json":
+        return path.with_suffix(".json").read_text(encoding="utf-8")
+    if fmt == "pstats":
+        out = io.StringIO()
+        pstats.Stats(str(path.with_suffix(".prof")), stream=out).sort_stats("cumulative").print_stats(40)
+        return out.getvalue()
+    return path.with_suffix(".collapsed").read_text(encoding="utf-8")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="List and export stored request profiles.")
+    sub = parser.add_subparsers(dest="command", required=True)
+    sub.add_parser("list")
+    export = sub.add_parser("export")
+    export.add_argument("request_id")
+    export.add_argument("--format", choices=["collapsed", "json", "pstats"], default="collapsed")
+    export.add_argument("-o", "--output", help="write to this file instead of stdout")
+    args = parser.parse_args()
+
+    if args.command == "list":
+        for m in list_profiles():
+            created = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(m["created_at"]))
+            print(f"{m['request_id']}  {created}  {m['mode']:<8} {m['duration_ms']:>9.1f}ms  "
+                  f"{m['samples']:>6} samples  {m.get('query', '')[:60]}")
+        return
+    text = export_profile(args.request_id, args.format)
+    if args.output:
+        Path(args.output).write_text(text, encoding="utf-8")
+    else:
+        sys.stdout.write(text)
+
+
+if __name__ == "__main__":
+    main()
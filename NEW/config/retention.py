@@ -0,0 +1,271 @@
+"""
+Retention for the audit tables (conversations, tool_calls, approvals).
+
+Rows older than RETENTION_DAYS are processed oldest first in batches of
+RETENTION_BATCH. For each batch the job:
+
+1. appends the raw rows to a compressed archive (gzip JSONL, or Parquet if
+   pyarrow is installed and --format parquet is used) and flushes it,
+2. adds them to `audit_daily_rollups` (day, table, agent -> row count,
+   successes, failures, avg/max duration) and deletes them in one short
+   transaction,
+3. pauses RETENTION_PAUSE_MS so foreground writers get the lock back.
+
+Afterwards free pages are returned with PRAGMA incremental_vacuum, which
+needs auto_vacuum=INCREMENTAL (switch once with --enable-incremental-vacuum;
+that runs a full VACUUM). Works on both the NEW and the Graduation audit
+schemas; columns are discovered per table.
+
+    python -m config.retention run --db database/erp.db --days 90 --archive-dir archive
+"""
+import argparse
+import gzip
+import json
+import os
+import sqlite3
+import threading
+import time
+from contextlib import closing
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+RETENTION_DAYS = int(os.getenv("RETENTION_DAYS", "90"))
+RETENTION_BATCH = int(os.getenv("RETENTION_BATCH", "5000"))
+RETENTION_PAUSE_MS = float(os.getenv("RETENTION_PAUSE_MS", "50"))
+ARCHIVE_DIR = Path(os.getenv("RETENTION_ARCHIVE_DIR", Path(__file__).resolve().parents[1] / "archive"))
+AUDIT_TABLES = ("conversations", "tool_calls", "approvals")
+
+ROLLUP_TABLE = """
+CREATE TABLE IF NOT EXISTS audit_daily_rollups (
+    day TEXT NOT NULL,
+    table_name TEXT NOT NULL,
+    agent TEXT NOT NULL,
+    rows INTEGER NOT NULL,
+    successes INTEGER NOT NULL,
+    failures INTEGER NOT NULL,
+    total_ms REAL NOT NULL,
+    max_ms REAL,
+    PRIMARY KEY (day, table_name, agent)
+)
+"""
+ROLLUP_UPSERT = """
+INSERT INTO audit_daily_rollups (day, table_name, agent, rows, successes, failures, total_ms, max_ms)
+VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+ON CONFLICT (day, table_name, agent) DO UPDATE SET
+    rows = rows + excluded.rows,
+    successes = successes + excluded.successes,
+    failures = failures + excluded.failures,
+    total_ms = total_ms + excluded.total_ms,
+    max_ms = MAX(COALESCE(max_ms, 0), COALESCE(excluded.max_ms, 0))
+"""
+
+
+def _connect(db_path: str) -> sqlite3.Connection:
+    conn = sqlite3.connect(db_path, timeout=30)
+    conn.row_factory = sqlite3.Row
+    return conn
+
+
+def _columns(conn, table: str) -> List[str]:
+    return [row[1] for row in conn.execute(f'PRAGMA table_info("{table}")')]
+
+
+def _outcome(row: Dict[str, Any]) -> Optional[bool]:
+    """True/False for success/failure when the schema records it, else None."""
+    if row.get("success") is not None:
+        return bool(row["success"])
+    status = str(row.get("status") or "").lower()
+    if status in ("success", "ok", "approved", "done"):
+        return True
+    if status in ("error", "failed", "failure", "rejected"):
+        return False
+    return None
+
+
+def _rollup(table: str, rows: List[Dict[str, Any]]) -> List[tuple]:
+    groups: Dict[tuple, list] = {}
+    for row in rows:
+        day = str(row.get("created_at") or "")[:10] or "unknown"
+        agent = row.get("agent_name") or row.get("agent") or row.get("request_type") or "-"
+        g = groups.setdefault((day, agent), [0, 0, 0, 0.0, None])
+        g[0] += 1
+        outcome = _outcome(row)
+        if outcome is True:
+            g[1] += 1
+        elif outcome is False:
+            g[2] += 1
+        ms = row.get("execution_time_ms")
+        if ms is not None:
+            g[3] += float(ms)
+            g[4] = max(g[4] or 0.0, float(ms))
+    return [(day, table, agent, *g) for (day, agent), g in groups.items()]
+
+
+class _Archive:
+    """Append-only archive for one table and run; each batch is flushed before its rows are deleted."""
+
+    def __init__(self, directory: Path, table: str, fmt: str):
+        directory.mkdir(parents=True, exist_ok=True)
+        stamp = datetime.utcnow().strftime("%Y%m%d-%H%M%S")
+        self.fmt = fmt
+        self._writer = None
+        if fmt == "parquet":
+            import pyarrow  # noqa: F401  (optional dependency, checked up front)
+            self.path = directory / f"{table}-{stamp}.parquet"
+        else:
+            self.path = directory / f"{table}-{stamp}.jsonl.gz"
+            self._file = gzip.open(self.path, "ab")
+
+    def write(self, rows: List[Dict[str, Any]]):
+        if self.fmt == "parquet":
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+            # Stringify values so batches with NULLs in different columns share one schema
+            batch = pa.Table.from_pylist([{k: None if v is None else str(v) for k, v in r.items()} for r in rows])
+            if self._writer is None:
+                self._writer = pq.ParquetWriter(str(self.path), batch.schema, compression="zstd")
+            self._writer.write_table(batch.cast(self._writer.schema))
+            return
+        for row in rows:
+            self._file.write((json.dumps(row, default=str) + "\n").encode("utf-8"))
+        self._file.flush()
+        os.fsync(self._file.fileobj.fileno())
+
+    def close(self):
+        if self.fmt == "parquet":
+            if self._writer is not None:
+                self._writer.close()
+        else:
+            self._file.close()
+
+
+def purge_table(db_path: str, table: str, cutoff: str, archive_dir: Path, fmt: str = "jsonl",
+                batch_size: int = RETENTION_BATCH, pause: float = RETENTION_PAUSE_MS / 1000) -> Dict[str, Any]:
+    """Archive, roll up and delete rows of `table` created before `cutoff`."""
+    with closing(_connect(db_path)) as conn, conn:
+        columns = _columns(conn, table)
+        if not columns or "created_at" not in columns or "id" not in columns:
+            return {"table": table, "skipped": "missing table or id/created_at columns"}
+        conn.execute(ROLLUP_TABLE)
+
+    where = "created_at < ?"
+    if "status" in columns:
+        # Pending approvals are still live work, whatever their age
+        where += " AND (status IS NULL OR UPPER(status) != 'PENDING')"
+    archive, moved, last_id = None, 0, 0
+    try:
+        while True:
+            with closing(_connect(db_path)) as conn:
+                rows = [dict(r) for r in conn.execute(
+                    f'SELECT * FROM "{table}" WHERE id > ? AND {where} ORDER BY id LIMIT ?',
+                    (last_id, cutoff, batch_size))]
+            if not rows:
+                break
+            if archive is None:
+                archive = _Archive(archive_dir / table, table, fmt)
+            archive.write(rows)
+            last_id = rows[-1]["id"]
+            # One short write transaction per batch keeps the lock free for foreground writers.
+            # Delete exactly the archived ids: re-evaluating the predicate would also remove rows
+            # that started matching after the SELECT and were never archived.
+            with closing(_connect(db_path)) as conn, conn:
+                conn.executemany(ROLLUP_UPSERT, _rollup(table, rows))
+                conn.executemany(f'DELETE FROM "{table}" WHERE id = ?', [(row["id"],) for row in rows])
+            moved += len(rows)
+            if pause:
+                time.sleep(pause)
+    finally:
+        if archive is not None:
+            archive.close()
+    return {"table": table, "archived": moved, "archive": str(archive.path) if archive else None}
+
+
+def incremental_vacuum(db_path: str, pages_per_step: int = 1000, pause: float = RETENTION_PAUSE_MS / 1000) -> int:
+    """Release free pages in small steps; returns pages freed (0 unless auto_vacuum=INCREMENTAL)."""
+    freed = 0
+    with closing(_connect(db_path)) as conn:
+        if conn.execute("PRAGMA auto_vacuum").fetchone()[0] != 2:
+            return 0
+        while True:
+            free = conn.execute("PRAGMA freelist_count").fetchone()[0]
+            if not free:
+                return freed
+            step = min(free, pages_per_step)
+            # executescript steps the pragma to completion; execute() frees a single page
+            conn.executescript(f"PRAGMA incremental_vacuum({step})")
+            freed += step
+            time.sleep(pause)
+
+
+def enable_incremental_vacuum(db_path: str):
+    """One-off switch to auto_vacuum=INCREMENTAL; rewrites the whole file (blocking)."""
+    with closing(_connect(db_path)) as conn:
+        conn.execute("PRAGMA auto_vacuum = INCREMENTAL")
+        conn.execute("VACUUM")
+
+
+def run_retention(db_path: str, days: int = RETENTION_DAYS, archive_dir: Path = ARCHIVE_DIR,
+                  fmt: str = "jsonl", tables=AUDIT_TABLES) -> Dict[str, Any]:
+    cutoff = (datetime.utcnow() - timedelta(days=days)).strftime("%Y-%m-%d %H:%M:%S")
+    started = time.perf_counter()
+    results = [purge_table(db_path, t, cutoff, Path(archive_dir), fmt) for t in tables]
+    freed = incremental_vacuum(db_path)
+    return {"db": db_path, "cutoff": cutoff, "tables": results, "pages_freed": freed,
+            "seconds": round(time.perf_counter() - started, 2)}
+
+
+class RetentionScheduler:
+    """Runs run_retention once a day at `at` (HH:MM, local time) on a daemon thread."""
+
+    def __init__(self, db_path: str, at: str = "03:30", **options):
+        self.db_path = db_path
+        self.hour, self.minute = (int(x) for x in at.split(":"))
+        self.options = options
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._loop, name="retention", daemon=True)
+
+    def _next_delay(self) -> float:
+        now = datetime.now()
+        target = now.replace(hour=self.hour, minute=self.minute, second=0, microsecond=0)
+        if target <= now:
+            target += timedelta(days=1)
+        return (target - now).total_seconds()
+
+    def _loop(self):
+        while not self._stop.wait(self._next_delay()):
+            try:
+                print(f"Retention run: {run_retention(self.db_path, **self.options)}")
+            except Exception as e:
+                print(f"Retention run failed: {e}")
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+
+
+def main():
+    from .database import DB_PATH
+    parser = argparse.ArgumentParser(description="Roll up, archive and delete old audit rows.")
+    sub = parser.add_subparsers(dest="command", required=True)
+    run = sub.add_parser("run")
+    run.add_argument("--db", default=str(DB_PATH))
+    run.add_argument("--days", type=int, default=RETENTION_DAYS)
+    run.add_argument("--archive-dir", default=str(ARCHIVE_DIR))
+    run.add_argument("--format", choices=["jsonl", "parquet"], default="jsonl")
+    run.add_argument("--tables", default=",".join(AUDIT_TABLES))
+    run.add_argument("--enable-incremental-vacuum", action="store_true",
+                     help="switch the database to auto_vacuum=INCREMENTAL first (one full VACUUM)")
+    args = parser.parse_args()
+
+    if args.enable_incremental_vacuum:
+        enable_incremental_vacuum(args.db)
+    result = run_retention(args.db, args.days, Path(args.archive_dir), args.format, args.tables.split(","))
+    print(json.dumps(result, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,168 @@
+"""
+Slow-query log for every statement run through metrics.TracedConnection.
+
+A statement whose execute + fetch time exceeds SLOW_QUERY_MS (default 200)
+is written to a `slow_queries` table in the same database, together with its
+parameters, row count, trace ID and EXPLAIN QUERY PLAN output. Rows go
+through the background log writer, so recording never blocks the query's
+own transaction. SLOW_QUERY_MS=0 turns it off.
+
+Rank the worst query shapes (literals and IN-lists normalised away):
+    python -m config.slow_queries summary --db database/erp.db --top 20
+"""
+import argparse
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import threading
+from collections import defaultdict
+from typing import Any, Dict, List, Optional, Sequence
+
+from .log_writer import get_log_writer
+
+SLOW_QUERY_MS = float(os.getenv("SLOW_QUERY_MS", "200"))
+
+CREATE_TABLE = """
+CREATE TABLE IF NOT EXISTS slow_queries (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    fingerprint TEXT NOT NULL,
+    sql TEXT NOT NULL,
+    params TEXT,
+    duration_ms REAL NOT NULL,
+    rows INTEGER,
+    query_plan TEXT,
+    trace_id TEXT
+)
+"""
+INSERT = ("INSERT INTO slow_queries (fingerprint, sql, params, duration_ms, rows, query_plan, trace_id) "
+          "VALUES (?, ?, ?, ?, ?, ?, ?)")
+
+_EXPLAINABLE = ("select", "with", "insert", "update", "delete", "replace")
+_COMMENT = re.compile(r"--[^\n]*|/\*.*?\*/", re.S)
+_STRING = re.compile(r"'(?:[^']|'')*'")
+_NUMBER = re.compile(r"\b\d+(?:\.\d+)?\b")
+_IN_LIST = re.compile(r"\bin\s*\(\s*\?(?:\s*,\s*\?)*\s*\)")
+_VALUES = re.compile(r"\bvalues\s*(\(\s*\?(?:\s*,\s*\?)*\s*\))(?:\s*,\s*\(\s*\?(?:\s*,\s*\?)*\s*\))*")
+_SPACE = re.compile(r"\s+")
+
+_prepared = set()
+_prepared_lock = threading.Lock()
+
+
+def normalize(sql: str) -> str:
+    """Query shape: comments, literals, IN-lists and multi-row VALUES collapsed."""
+    text = _COMMENT.sub(" ", sql or "").lower()
+    text = _STRING.sub("?", text)
+    text = _NUMBER.sub("?", text)
+    text = _SPACE.sub(" ", text).strip().rstrip(";")
+    text = _IN_LIST.sub("in (?+)", text)
+    return _VALUES.sub(r"values \1", text)
+
+
+def fingerprint(sql: str) -> str:
+    return hashlib.sha1(normalize(sql).encode("utf-8")).hexdigest()[:12]
+
+
+def _db_file(conn) -> Optional[str]:
+    """Path of the connection's main database, or None for in-memory/temporary ones."""
+    rows = sqlite3.Connection.execute(conn, "PRAGMA database_list").fetchall()
+    path = next((row[2] for row in rows if row[1] == "main"), "")
+    return path or None
+
+
+def _plan(conn, sql: str, params: Sequence) -> Optional[str]:
+    if not sql.lstrip().lower().startswith(_EXPLAINABLE):
+        return None
+    try:
+        # Base-class execute: not traced, so it can't recurse into this log
+        rows = sqlite3.Connection.execute(conn, f"EXPLAIN QUERY PLAN {sql}", params).fetchall()
+    except sqlite3.Error as e:
+        return f"(plan unavailable: {e})"
+    return "\n".join(str(row[-1]) for row in rows)
+
+
+def record(conn, sql: str, params: Any, duration: float, rows: Optional[int], trace_id: str = "-"):
+    """Log one statement if it was slower than SLOW_QUERY_MS."""
+    duration_ms = duration * 1000
+    if SLOW_QUERY_MS <= 0 or duration_ms < SLOW_QUERY_MS or not isinstance(sql, str):
+        return
+    try:
+        path = _db_file(conn)
+        if path is None:
+            return
+        if isinstance(params, dict):
+            plan_params, shown = params, params
+        else:
+            plan_params, shown = tuple(params or ()), list(params or ())
+        plan = _plan(conn, sql, plan_params)
+        writer = get_log_writer(path)
+        with _prepared_lock:
+            if path not in _prepared:
+                writer.write(CREATE_TABLE, ())
+                _prepared.add(path)
+        writer.write(INSERT, (fingerprint(sql), sql, json.dumps(shown, default=str)[:2000],
+                              round(duration_ms, 2), rows, plan, trace_id))
+    except Exception as e:
+        print(f"Slow query log error: {e}")
+
+
+def summary(db_path: str, top: int = 20, since: Optional[str] = None) -> List[Dict[str, Any]]:
+    """Slow query shapes ranked by total time spent."""
+    query = "SELECT fingerprint, sql, duration_ms, rows, query_plan FROM slow_queries"
+    params: List[Any] = []
+    if since:
+        query += " WHERE created_at >= ?"
+        params.append(since)
+    groups: Dict[str, Dict[str, Any]] = defaultdict(lambda: {"durations": [], "rows": 0})
+    with sqlite3.connect(db_path) as conn:
+        for fp, sql, duration_ms, rows, plan in conn.execute(query + " ORDER BY id", params):
+            g = groups[fp]
+            g["durations"].append(duration_ms)
+            g["rows"] += rows or 0
+            g["example"], g["plan"] = sql, plan
+    ranked = []
+    for fp, g in groups.items():
+        durations = sorted(g["durations"])
+        ranked.append({
+            "fingerprint": fp,
+            "count": len(durations),
+            "total_ms": round(sum(durations), 1),
+            "avg_ms": round(sum(durations) / len(durations), 1),
+            "p95_ms": round(durations[min(len(durations) - 1, int(len(durations) * 0.95))], 1),
+            "max_ms": round(durations[-1], 1),
+            "avg_rows": round(g["rows"] / len(durations), 1),
+            "shape": normalize(g["example"]),
+            "plan": g["plan"],
+        })
+    ranked.sort(key=lambda r: r["total_ms"], reverse=True)
+    return ranked[:top]
+
+
+def main():
+    from .database import DB_PATH
+    parser = argparse.ArgumentParser(description="Rank slow query shapes from the slow_queries table.")
+    sub = parser.add_subparsers(dest="command", required=True)
+    cmd = sub.add_parser("summary")
+    cmd.add_argument("--db", default=str(DB_PATH))
+    cmd.add_argument("--top", type=int, default=20)
+    cmd.add_argument("--since", help="only entries at or after this timestamp (YYYY-MM-DD[ HH:MM:SS])")
+    cmd.add_argument("--json", action="store_true")
+    args = parser.parse_args()
+
+    rows = summary(args.db, args.top, args.since)
+    if args.json:
+        print(json.dumps(rows, indent=2))
+        return
+    for r in rows:
+        print(f"{r['fingerprint']}  n={r['count']:<5} total={r['total_ms']:>9.1f}ms  avg={r['avg_ms']:>8.1f}ms  "
+              f"p95={r['p95_ms']:>8.1f}ms  max={r['max_ms']:>8.1f}ms  rows~{r['avg_rows']}")
+        print(f"    {r['shape'][:200]}")
+        for line in (r["plan"] or "").splitlines():
+            print(f"      plan: {line}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+"""
+Typed endpoints for the deterministic sales/finance intents.
+
+These call SalesAgent.handle / FinanceAgent.handle directly, with no LLM in
+the path, so integrations and scripted workflows run at database speed.
+Every intent has a single-item route and a `/batch` route that takes a list
+and returns one result per item in order (a failing item does not abort the
+rest).
+"""
+from functools import lru_cache
+from typing import Any, Dict, List, Optional, Type
+
+from fastapi import APIRouter
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel, Field
+
+from agents.sales_agent import SalesAgent
+from agents.finance_agent import FinanceAgent
+from config.database import INTENTS_DB_PATH
+
+router = APIRouter(prefix="/api/intents", tags=["intents"])
+
+
+class AddLead(BaseModel):
+    name: str
+    email: str
+    source: str = "web"
+    notes: str = ""
+
+
+class LeadScore(BaseModel):
+    features: Dict[str, Any] = {}
+
+
+class ConvertLeadToOrder(BaseModel):
+    lead_id: int
+    product_id: int
+    qty: int = Field(1, ge=1)
+
+
+class SearchDocs(BaseModel):
+    q: str
+    k: int = Field(3, ge=1)
+
+
+class GenerateInvoiceFromOrder(BaseModel):
+    order_id: int
+
+
+class DetectAnomaly(BaseModel):
+    invoice_id: Optional[int] = None
+    features: Dict[str, Any] = {}
+
+
+class PolicyLookup(BaseModel):
+    q: str
+    k: int = Field(3, ge=1)
+
+
+@lru_cache(maxsize=None)
+def get_intent_agent(name: str):
+    """One agent per process; their tools open a connection per call."""
+    if name == "sales":
+        return SalesAgent(str(INTENTS_DB_PATH))
+    return FinanceAgent(str(INTENTS_DB_PATH))
+
+
+def run_intent(agent: str, intent: str, data: Dict[str, Any]) -> Dict[str, Any]:
+    try:
+        return get_intent_agent(agent).handle(intent, data)
+    except Exception as e:
+        return {"ok": False, "error": str(e)}
+
+
+def _status(result: Dict[str, Any]) -> int:
+    if result.get("ok", True):
+        return 200
+    return 404 if "not found" in str(result.get("error", "")).lower() else 400
+
+
+def _add_intent_routes(agent: str, intent: str, model: Type[BaseModel]):
+    path = "/" + intent.replace("_", "-")
+
+    def single(body: model):
+        result = run_intent(agent, intent, body.model_dump(exclude_none=True))
+        return JSONResponse(status_code=_status(result), content=result)
+
+    def batch(items: List[model]):
+        results = [run_intent(agent, intent, item.model_dump(exclude_none=True)) for item in items]
+        return {"ok": all(r.get("ok", True) for r in results), "results": results}
+
+    router.add_api_route(path, single, methods=["POST"], name=intent)
+    router.add_api_route(path + "/batch", batch, methods=["POST"], name=f"{intent}_batch")
+
+
+for _agent, _intent, _model in [
+    ("sales", "add_lead", AddLead),
+    ("sales", "lead_score", LeadScore),
+    ("sales", "convert_lead_to_order", ConvertLeadToOrder),
+    ("sales", "search_docs", SearchDocs),
+    ("finance", "generate_invoice_from_order", GenerateInvoiceFromOrder),
+    ("finance", "detect_anomaly", DetectAnomaly),
+    ("finance", "policy_lookup", PolicyLookup),
+]:
+    _add_intent_routes(_agent, _intent, _model)
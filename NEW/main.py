@@ -1,11 +1,48 @@
+import asyncio
+import logging
+import os
+import time
 import uvicorn
-from fastapi import FastAPI
+from typing import Optional
+from fastapi import FastAPI, Header, Request, Response
+from fastapi.responses import JSONResponse, PlainTextResponse, StreamingResponse
 from dotenv import load_dotenv
 from fastapi.middleware.cors import CORSMiddleware
 from langchain.schema import HumanMessage
-from agents.router_agent import router_executor
+import agents.router_agent  # registers the specialist agents
+from agents.router_agent import fan_out
+from agents.registry import get_agent, prewarm
+from agents.session_memory import SessionMemoryStore
+from config.database import DB_PATH, INTENTS_DB_PATH
+from config import metrics, profiling
+from config.llm_cache import cache_stats
+from config.log_writer import writer_stats
+from config.retention import RetentionScheduler
+from concurrency import ConcurrencyLimiter, Saturated
+from intents import router as intents_router
+from singleflight import SingleFlight, data_version, flight_key, is_read_only, normalize
+from streaming import sse, stream_agent_events
 
 load_dotenv()
+metrics.configure_logging(getattr(logging, os.getenv("LOG_LEVEL", "INFO").upper(), logging.INFO))
+logger = logging.getLogger(__name__)
+
+# Chat requests hold a slot for the whole LLM/tool round trip.
+chat_limiter = ConcurrencyLimiter(
+    max_in_flight=int(os.getenv("CHAT_MAX_IN_FLIGHT", "8")),
+    max_queue=int(os.getenv("CHAT_MAX_QUEUE", "32")),
+    queue_timeout=float(os.getenv("CHAT_QUEUE_TIMEOUT", "10")),
+)
+CHAT_TIMEOUT = float(os.getenv("CHAT_TIMEOUT", "120"))
+
+# Identical questions (same normalised text, history and data version) share one run.
+chat_flights = SingleFlight(window=float(os.getenv("CHAT_COALESCE_WINDOW", "5")))
+
+# Conversation memory is per session; idle sessions spill to the conversations table.
+session_memory = SessionMemoryStore(
+    max_sessions=int(os.getenv("SESSION_MEMORY_MAX_SESSIONS", "256")),
+    k=int(os.getenv("SESSION_MEMORY_TURNS", "5")),
+)
 
 app = FastAPI(
     title="Helios Dynamics Agent-Driven ERP",
@@ -21,18 +58,191 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+@app.middleware("http")
+async def trace_requests(request: Request, call_next):
+    """Give every request a trace ID (X-Request-ID if the caller sent one) for logs and spans."""
+    trace_id = request.headers.get("X-Request-ID") or metrics.new_trace_id()
+    token = metrics.trace_id_var.set(trace_id)
+    start = time.perf_counter()
+    try:
+        response = await call_next(request)
+        response.headers["X-Trace-ID"] = trace_id
+        return response
+    finally:
+        # The route template (not the raw path) keeps the label set bounded
+        route = request.scope.get("route")
+        metrics.SPAN_SECONDS.observe(time.perf_counter() - start, "http", route.path if route else "unmatched")
+        metrics.trace_id_var.reset(token)
+
+# Deterministic sales/finance intents, no LLM in the path
+app.include_router(intents_router)
+
+@app.on_event("startup")
+def prewarm_agents():
+    """Build the agents in the background once the server is up (AGENT_PREWARM=0 to skip)."""
+    if os.getenv("AGENT_PREWARM", "1") != "0":
+        prewarm()
+
+@app.on_event("startup")
+def schedule_retention():
+    """Daily archive/rollup/delete of old audit rows (RETENTION_ENABLED=1, runs at RETENTION_RUN_AT)."""
+    if os.getenv("RETENTION_ENABLED", "0") == "1":
+        app.state.retention = RetentionScheduler(str(DB_PATH), at=os.getenv("RETENTION_RUN_AT", "03:30")).start()
+
+@app.on_event("shutdown")
+def flush_session_memory():
+    session_memory.flush()
+    retention = getattr(app.state, "retention", None)
+    if retention:
+        retention.stop()
+
 @app.get("/")
 def read_root():
     return {"message": "Welcome to the Helios Dynamics ERP API!"}
 
+def _release_chat_slot(task: asyncio.Future):
+    chat_limiter.release()
+    if not task.cancelled():
+        task.exception()  # retrieved here so an abandoned call's error is not logged as unhandled
+
 @app.post("/api/chat")
-async def chat_endpoint(query: str):
+async def chat_endpoint(query: str, http_response: Response, session_id: Optional[str] = None,
+                        mode: str = "react", profile: Optional[str] = None,
+                        x_session_id: Optional[str] = Header(None), x_user_id: int = Header(0),
+                        x_profile: Optional[str] = Header(None)):
+    sid = x_session_id or session_id or "anonymous"
+    profile_mode = profiling.requested_mode(x_profile or profile)
+
+    async def run(history):
+        # Only the request that actually executes takes a limiter slot
+        await chat_limiter.acquire()
+        try:
+            if mode == "fanout":
+                # Split across domains and run the specialist agents concurrently
+                fn, arg = fan_out, query
+            else:
+                router = await asyncio.to_thread(get_agent, "router")
+                fn, arg = router.invoke, {"input": query, "chat_history": history}
+            if profile_mode:
+                # Profiled runs take the sync path in one worker thread so the profiler sees all of it
+                # (for fanout that is the coordinator only; the _fanout_pool workers are not sampled)
+                profile_id = profiling.profile_id(metrics.trace_id_var.get())
+                http_response.headers["X-Profile-ID"] = profile_id
+                call = asyncio.to_thread(profiling.profile_call, profile_id, fn, arg, mode=profile_mode,
+                                         meta={"query": query, "chat_mode": mode})
+            elif mode == "fanout":
+                call = asyncio.to_thread(fan_out, query)
+            else:
+                call = router.ainvoke(arg)
+            task = asyncio.ensure_future(call)
+        except BaseException:
+            chat_limiter.release()
+            raise
+        # A timed-out worker thread cannot be stopped, so the slot stays taken until the
+        # call really finishes; shield keeps wait_for from cancelling it on timeout
+        task.add_done_callback(_release_chat_slot)
+        response = await asyncio.wait_for(asyncio.shield(task), CHAT_TIMEOUT)
+        if mode == "fanout":
+            response["input"] = query
+        return response
+
     try:
-        response = router_executor.invoke({"input": query})
+        history = "" if mode == "fanout" else await asyncio.to_thread(session_memory.history, sid, x_user_id)
+        if profile_mode or not is_read_only(query):
+            # A profile must come from its own run, and every write request must actually execute
+            response = await run(history)
+        else:
+            # The router and fan-out agents read both the ERP and the intents databases
+            key = flight_key(mode, normalize(query), history, data_version(DB_PATH, INTENTS_DB_PATH))
+            response, shared = await chat_flights.do(key, lambda: run(history))
+            if shared:
+                http_response.headers["X-Coalesced"] = "1"
+        await asyncio.to_thread(session_memory.save_turn, sid, query, response["output"], x_user_id)
         return {"response": response}
+    except Saturated as e:
+        return JSONResponse(status_code=429, content={"error": str(e)}, headers={"Retry-After": "1"})
+    except asyncio.TimeoutError:
+        return JSONResponse(status_code=504, content={"error": f"Chat timed out after {CHAT_TIMEOUT:.0f}s"})
     except Exception as e:
         logger.error(f"Error during chat invocation: {e}")
-        return {"error": str(e)}, 500
+        return JSONResponse(status_code=500, content={"error": str(e)})
+
+class SlotStreamingResponse(StreamingResponse):
+    """Streams the body and then frees a limiter slot, even if the client left before the body started."""
+
+    def __init__(self, content, release, **kwargs):
+        super().__init__(content, **kwargs)
+        self._release = release
+
+    async def __call__(self, scope, receive, send):
+        try:
+            await super().__call__(scope, receive, send)
+        finally:
+            self._release()
+
+@app.api_route("/api/chat/stream", methods=["GET", "POST"])
+async def chat_stream_endpoint(query: str, session_id: Optional[str] = None,
+                               x_session_id: Optional[str] = Header(None), x_user_id: int = Header(0)):
+    """Stream agent steps and answer tokens as Server-Sent Events."""
+    sid = x_session_id or session_id or "anonymous"
+    try:
+        await chat_limiter.acquire()
+    except Saturated as e:
+        return JSONResponse(status_code=429, content={"error": str(e)}, headers={"Retry-After": "1"})
+
+    async def agent_events():
+        router = await asyncio.to_thread(get_agent, "router")
+        history = await asyncio.to_thread(session_memory.history, sid, x_user_id)
+        # save_turn does DB I/O; keep it off the event loop like the history load above
+        on_final = lambda output: asyncio.to_thread(session_memory.save_turn, sid, query, output, x_user_id)
+        async for message in stream_agent_events(router, {"input": query, "chat_history": history},
+                                                 on_final=on_final):
+            yield message
+
+    async def events():
+        # Same overall deadline as /api/chat, measured from the start of the stream
+        deadline = time.monotonic() + CHAT_TIMEOUT
+        messages = agent_events()
+        try:
+            while True:
+                try:
+                    message = await asyncio.wait_for(messages.__anext__(), deadline - time.monotonic())
+                except StopAsyncIteration:
+                    break
+                except asyncio.TimeoutError:
+                    yield sse("error", {"error": f"Chat timed out after {CHAT_TIMEOUT:.0f}s"})
+                    break
+                yield message
+        finally:
+            await messages.aclose()
+
+    return SlotStreamingResponse(events(), release=chat_limiter.release, media_type="text/event-stream",
+                                 headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+@app.get("/metrics")
+def metrics_endpoint():
+    """Prometheus text exposition of span durations, SQL row counts and LLM tokens."""
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
+
+@app.get("/api/profiles")
+def profiles_endpoint():
+    """Stored request profiles, newest first."""
+    return {"profiles": profiling.list_profiles()}
+
+@app.get("/api/profiles/{request_id}")
+def profile_export_endpoint(request_id: str, format: str = "collapsed"):
+    """One profile as folded stacks (flamegraph.pl / speedscope), json metadata or a pstats report."""
+    try:
+        text = profiling.export_profile(request_id, format)
+    except (KeyError, FileNotFoundError):
+        return JSONResponse(status_code=404, content={"error": f"No profile {request_id}"})
+    media = "application/json" if format == "json" else "text/plain"
+    return PlainTextResponse(text, media_type=media)
+
+@app.get("/api/health")
+def health():
+    return {"status": "ok", "chat": chat_limiter.stats(), "coalescing": chat_flights.stats(),
+            "sessions": len(session_memory), "llm_cache": cache_stats(), "log_writers": writer_stats()}
 
 if __name__ == "__main__":
     uvicorn.run(app, host="0.0.0.0", port=8000)
@@ -0,0 +1,96 @@
+import asyncio
+import copy
+import hashlib
+import os
+import re
+import time
+from typing import Any, Awaitable, Callable, Dict, Tuple
+
+_SPACE = re.compile(r"\s+")
+# Verbs that ask the agents to change data. Deliberately broad: a read that looks like a write
+# only misses coalescing, while a write that looks like a read would be silently merged.
+_WRITE_WORDS = re.compile(
+    r"\b(add|creat|insert|updat|delet|remov|drop|adjust|set|chang|modif|edit|renam|convert|generat|"
+    r"approv|reject|record|pay|paid|cancel|restock|reorder|place|book|send|assign|transfer|move|"
+    r"writ|regist|submit|import|issu|refund|void|reserv|increas|decreas|reduc|raise|mark|log)\w*")
+
+
+def normalize(text: str) -> str:
+    """Case-fold, collapse whitespace and drop trailing punctuation."""
+    return _SPACE.sub(" ", (text or "").strip().lower()).rstrip(" ?!.")
+
+
+def is_read_only(text: str) -> bool:
+    """True when a chat query reads data only, so identical ones can share a result."""
+    return not _WRITE_WORDS.search((text or "").lower())
+
+
+def data_version(*db_paths) -> str:
+    """Changes whenever any of the SQLite databases (or their WALs) is written."""
+    parts = []
+    for path in (p for db_path in dict.fromkeys(map(str, db_paths)) for p in (db_path, f"{db_path}-wal")):
+        try:
+            st = os.stat(path)
+            parts.append(f"{st.st_mtime_ns}:{st.st_size}")
+        except OSError:
+            parts.append("-")
+    return "/".join(parts)
+
+
+def flight_key(*parts: Any) -> str:
+    return hashlib.sha256("\0".join(str(p) for p in parts).encode("utf-8")).hexdigest()
+
+
+class SingleFlight:
+    """
+    Coalesces identical concurrent calls into one execution.
+
+    The first caller for a key runs `fn`; callers arriving while it runs await
+    the same task. A successful result is also served to callers arriving
+    within `window` seconds after it finished; every caller gets its own deep
+    copy of it. Errors are shared with the callers already waiting but never
+    kept. The shared task is shielded, so a
+    caller that times out or disconnects does not cancel it for the others.
+    """
+
+    def __init__(self, window: float = 5.0, max_results: int = 256):
+        self.window = window
+        self.max_results = max_results
+        self.executed = 0
+        self.coalesced = 0
+        self._inflight: Dict[str, asyncio.Task] = {}
+        self._results: Dict[str, Tuple[float, Any]] = {}
+
+    def _recent(self, key: str):
+        now = time.monotonic()
+        for k in [k for k, (expires, _) in self._results.items() if expires <= now]:
+            del self._results[k]
+        hit = self._results.get(key)
+        return hit[1] if hit else None
+
+    def _finished(self, key: str, task: asyncio.Task):
+        self._inflight.pop(key, None)
+        if self.window > 0 and not task.cancelled() and task.exception() is None:
+            if len(self._results) >= self.max_results:
+                self._results.pop(next(iter(self._results)))
+            self._results[key] = (time.monotonic() + self.window, task.result())
+
+    async def do(self, key: str, fn: Callable[[], Awaitable[Any]]) -> Tuple[Any, bool]:
+        """Return (result, shared); shared is True when another caller's run was reused."""
+        recent = self._recent(key)
+        if recent is not None:
+            self.coalesced += 1
+            return copy.deepcopy(recent), True
+        task = self._inflight.get(key)
+        shared = task is not None
+        if shared:
+            self.coalesced += 1
+        else:
+            self.executed += 1
+            task = self._inflight[key] = asyncio.ensure_future(fn())
+            task.add_done_callback(lambda t: self._finished(key, t))
+        return copy.deepcopy(await asyncio.shield(task)), shared
+
+    def stats(self) -> dict:
+        return {"executed": self.executed, "coalesced": self.coalesced,
+                "in_flight": len(self._inflight), "window": self.window}
@@ -0,0 +1,65 @@
+import inspect
+import json
+from typing import Any, AsyncIterator, Callable, Dict, Optional
+
+FINAL_MARKER = "Final Answer:"
+
+
+def sse(event: str, data: Dict[str, Any]) -> str:
+    """Format one Server-Sent Events message."""
+    return f"event: {event}\ndata: {json.dumps(data, default=str)}\n\n"
+
+
+async def stream_agent_events(executor, inputs: Dict[str, Any],
+                              on_final: Optional[Callable[[str], Any]] = None) -> AsyncIterator[str]:
+    """
+    Translate an AgentExecutor run into SSE messages as it happens.
+
+    Emits `step`/`observation` around each tool call, `thought` for the ReAct
+    reasoning text, `token` for text after "Final Answer:", and a closing
+    `final` with the executor output (or `error`). `on_final` is called with
+    the output before the `final` event is sent; if it returns an awaitable
+    (e.g. asyncio.to_thread for blocking I/O), that is awaited first.
+    """
+    buffers: Dict[str, str] = {}
+    try:
+        async for event in executor.astream_events(inputs, version="v2"):
+            kind = event["event"]
+            if kind == "on_chat_model_stream":
+                text = getattr(event["data"]["chunk"], "content", "") or ""
+                if not text:
+                    continue
+                run_id = event["run_id"]
+                before = buffers.get(run_id, "")
+                buffers[run_id] = after = before + text
+                if FINAL_MARKER in before:
+                    # Drop the whitespace between the marker and the answer
+                    if not before.split(FINAL_MARKER, 1)[1].strip():
+                        text = text.lstrip()
+                    if text:
+                        yield sse("token", {"text": text})
+                elif FINAL_MARKER in after:
+                    head, tail = after.split(FINAL_MARKER, 1)
+                    if head[len(before):]:
+                        yield sse("thought", {"text": head[len(before):]})
+                    if tail.strip():
+                        yield sse("token", {"text": tail.lstrip()})
+                else:
+                    yield sse("thought", {"text": text})
+            elif kind == "on_chain_stream" and not event.get("parent_ids"):
+                chunk = event["data"].get("chunk") or {}
+                for action in chunk.get("actions", []):
+                    yield sse("step", {"tool": action.tool, "input": action.tool_input})
+                for step in chunk.get("steps", []):
+                    yield sse("observation", {"tool": step.action.tool, "output": str(step.observation)[:500]})
+                if "output" in chunk:
+                    if on_final:
+                        saved = on_final(chunk["output"])
+                        if inspect.isawaitable(saved):
+                            await saved
+                    final = {"output": chunk["output"]}
+                    if "chart_spec" in chunk:
+                        final["chart_spec"] = chunk["chart_spec"]
+                    yield sse("final", final)
+    except Exception as e:
+        yield sse("error", {"error": str(e)})
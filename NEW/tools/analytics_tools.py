@@ -15,19 +15,8 @@ class TextToSQLToolInput(BaseModel):
 class TextToSQLTool(BaseTool):
     name: str = "text_to_sql_tool"
     description: str = """
-    A tool to convert natural language questions into executable SQL queries and run them.
-    This tool requires a well-formed SQL query as input. It can read from all available tables.
-    The database schema is as follows:
-    - customers(customer_id, name, email, country)
-    - products(product_id, name, category, price, stock)
-    - sales(sale_id, customer_id, product_id, date, quantity, total)
-    - vendors(vendor_id, name, email)
-    - invoices(invoice_id, vendor_id, amount, due_date, status)
-    - invoice_lines(id, invoice_id, product_id, qty, unit_price)
-    - orders(order_id, customer_id, date, status)
-    - order_items(id, order_id, product_id, qty, unit_price)
-    
-    You must always provide a complete SQL query as input.
+    Runs a complete, read-only SQLite query and returns the rows.
+    Use only the tables and columns listed in the schema given with the question.
     """
     # CORRECTED THIS LINE 👇
     args_schema: Type[BaseModel] = TextToSQLToolInput
@@ -1,6 +1,7 @@
 ﻿import sqlite3
 from typing import Any, Dict, List
-from base_tool import BaseTool, register_tool
+from tools.base_tool import BaseTool, register_tool
+from config.metrics import TracedConnection
 
 class AnomalyDetectorTool(BaseTool):
     name = "anomaly_detector_tool"
@@ -9,7 +10,7 @@ class AnomalyDetectorTool(BaseTool):
         self.ratio_threshold = ratio_threshold
         self.min_history = min_history
     def _conn(self):
-        return sqlite3.connect(self.db_path)
+        return sqlite3.connect(self.db_path, factory=TracedConnection)
     def _vendor_history(self, vendor_id: int) -> List[float]:
         sql = "SELECT total FROM invoices WHERE vendor_id=? AND status IN ('posted','paid')"
         with self._conn() as con:
@@ -1,11 +1,14 @@
 ﻿from langchain.tools import Tool
 from typing import Dict
+from config.metrics import traced
 
 _tool_registry: Dict[str, Tool] = {}
 
 def register_tool(cls):
-    if not hasattr(cls, "_run"):
-        raise TypeError(f"Class {cls.__name__} must define a '_run' method.")
+    # Tools implement either the langchain-style _run or the plain run entry point
+    func = getattr(cls, "_run", None) or getattr(cls, "run", None)
+    if func is None:
+        raise TypeError(f"Class {cls.__name__} must define a 'run' or '_run' method.")
 
     name = getattr(cls, "name", None)
     description = getattr(cls, "description", None)
@@ -17,7 +20,7 @@ def register_tool(cls):
     tool_instance = Tool(
         name=name,
         description=description,
-        func=cls._run,
+        func=func,
         args_schema=args_schema
     )
 
@@ -29,5 +32,11 @@ class BaseTool:
     """
     A lightweight base class for custom tools.
     (Not inheriting from langchain.Tool to avoid init conflicts.)
+    Subclasses' run/_run are timed as erp_span_duration_seconds{kind="tool"}.
     """
-    pass
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        for method in ("run", "_run"):
+            fn = cls.__dict__.get(method)
+            if callable(fn) and not getattr(fn, "__traced__", False):
+                setattr(cls, method, traced("tool", getattr(cls, "name", None) or cls.__name__)(fn))
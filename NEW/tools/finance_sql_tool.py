@@ -1,13 +1,14 @@
 ﻿import sqlite3
 from typing import Any, Dict
-from base_tool import BaseTool, register_tool
+from tools.base_tool import BaseTool, register_tool
+from config.metrics import TracedConnection
 
 class FinanceSQLTool(BaseTool):
     name = "finance_sql_read_write"
     def __init__(self, db_path: str):
         self.db_path = db_path
     def _conn(self):
-        con = sqlite3.connect(self.db_path)
+        con = sqlite3.connect(self.db_path, factory=TracedConnection)
         con.execute("PRAGMA foreign_keys = ON;")
         return con
     def run(self, payload: Dict[str, Any]) -> Dict[str, Any]:
@@ -1,7 +1,9 @@
+import json
+import re
 import sqlite3
-import pandas as pd
-from statsmodels.tsa.holtwinters import ExponentialSmoothing
-from base_tool import BaseTool, register_tool
+from tools.base_tool import BaseTool, register_tool
+from tools.stock_cache import get_stock_cache
+from config.metrics import TracedConnection
 
 
 @register_tool
@@ -10,7 +12,7 @@ class InventorySQLReadTool(BaseTool):
     description = "Read data from inventory tables (stock, suppliers, products, etc.)."
 
     def __init__(self, db_path: str):
-        self.conn = sqlite3.connect(db_path)
+        self.conn = sqlite3.connect(db_path, factory=TracedConnection)
 
     def run(self, query: str):
         try:
@@ -29,18 +31,114 @@ class InventorySQLWriteTool(BaseTool):
     description = "Insert/update/delete data in inventory tables (stock, orders, receipts, etc.)."
 
     def __init__(self, db_path: str):
-        self.conn = sqlite3.connect(db_path)
+        self.conn = sqlite3.connect(db_path, factory=TracedConnection)
+        self.stock_cache = get_stock_cache(db_path)
 
     def run(self, query: str):
         try:
             cursor = self.conn.cursor()
             cursor.execute(query)
             self.conn.commit()
+            # Free-form SQL can touch any row, so drop the whole snapshot.
+            if re.search(r"\bstock\b", query, re.IGNORECASE):
+                self.stock_cache.invalidate()
             return {"status": "success"}
         except Exception as e:
             self.conn.rollback()
             return {"error": str(e)}
 
+    def bulk_adjust(self, adjustments, all_or_nothing: bool = True):
+        """
+        Apply a batch of stock deltas in a single transaction.
+
+        Each adjustment is a dict with product_id, warehouse and delta, plus an
+        optional expected_qty used for optimistic concurrency. Lines whose stock
+        row is missing, whose current quantity differs from expected_qty, or
+        which would take stock below zero are returned as conflicts. When
+        all_or_nothing is set any conflict rolls the whole batch back,
+        otherwise the remaining lines are still applied.
+        """
+        try:
+            cursor = self.conn.cursor()
+            cursor.execute("BEGIN IMMEDIATE")
+            original, running, conflicts = {}, {}, []
+            for line, adj in enumerate(adjustments):
+                key = (int(adj["product_id"]), str(adj["warehouse"]))
+                delta = int(adj["delta"])
+                if key not in original:
+                    cursor.execute(
+                        "SELECT quantity FROM stock WHERE product_id = ? AND warehouse_location = ?",
+                        key,
+                    )
+                    row = cursor.fetchone()
+                    original[key] = running[key] = row[0] if row else None
+                current = running[key]
+                expected = adj.get("expected_qty")
+                reason = None
+                if current is None:
+                    reason = "missing_stock_row"
+                elif expected is not None and int(expected) != current:
+                    reason = "expected_qty_mismatch"
+                elif current + delta < 0:
+                    reason = "negative_stock"
+                if reason:
+                    conflicts.append({"line": line, "product_id": key[0], "warehouse": key[1],
+                                      "reason": reason, "expected_qty": expected, "current_qty": current})
+                    continue
+                running[key] = current + delta
+
+            if conflicts and all_or_nothing:
+                self.conn.rollback()
+                return {"status": "conflict", "applied": 0, "conflicts": conflicts}
+
+            # The quantity guard is redundant under BEGIN IMMEDIATE but keeps the
+            # statement safe if the locking mode is ever relaxed.
+            updates = [(running[k], k[0], k[1], original[k])
+                       for k in running if running[k] != original[k]]
+            cursor.executemany(
+                "UPDATE stock SET quantity = ?, last_updated = CURRENT_TIMESTAMP "
+                "WHERE product_id = ? AND warehouse_location = ? AND quantity = ?",
+                updates,
+            )
+            if cursor.rowcount != len(updates):
+                self.conn.rollback()
+                return {"error": "Stock changed concurrently, batch rolled back"}
+            self.conn.commit()
+            for qty, product_id, warehouse, _ in updates:
+                self.stock_cache.set_qty(product_id, warehouse, qty)
+            return {"status": "success" if not conflicts else "partial",
+                    "applied": len(adjustments) - len(conflicts), "conflicts": conflicts}
+        except Exception as e:
+            self.conn.rollback()
+            return {"error": str(e)}
+
+
+@register_tool
+class InventoryBulkAdjustTool(BaseTool):
+    name = "inventory_bulk_adjust"
+    description = (
+        "Apply several stock changes in one transaction. Input is a JSON object: "
+        '{"adjustments": [{"product_id": 1, "warehouse": "A", "delta": -5, "expected_qty": 40}], '
+        '"all_or_nothing": true}. expected_qty is optional; lines that conflict are returned.'
+    )
+
+    def __init__(self, db_path: str):
+        self.writer = InventorySQLWriteTool(db_path)
+
+    def run(self, payload):
+        # Agents pass tool input as text, API callers as a dict or a bare list of lines
+        if isinstance(payload, str):
+            try:
+                payload = json.loads(payload)
+            except ValueError as e:
+                return {"error": f"Input must be a JSON object: {e}"}
+        if isinstance(payload, list):
+            payload = {"adjustments": payload}
+        adjustments = payload.get("adjustments") if isinstance(payload, dict) else None
+        if not adjustments:
+            return {"error": "No adjustments given"}
+        return self.writer.bulk_adjust(adjustments, all_or_nothing=bool(payload.get("all_or_nothing", True)))
+
 
 @register_tool
 class ForecastTool(BaseTool):
@@ -48,9 +146,13 @@ class ForecastTool(BaseTool):
     description = "Generate demand forecasts from historical stock movement data."
 
     def __init__(self, db_path: str):
-        self.conn = sqlite3.connect(db_path)
+        self.conn = sqlite3.connect(db_path, factory=TracedConnection)
 
     def run(self, product_id: str, periods: int = 12):
+        # pandas/statsmodels are slow to import; only pay for them when forecasting
+        import pandas as pd
+        from statsmodels.tsa.holtwinters import ExponentialSmoothing
+
         query = f"""
             SELECT date, quantity
             FROM stock_movements
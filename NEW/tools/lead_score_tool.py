@@ -1,6 +1,6 @@
 ﻿import os
 from typing import Any, Dict
-from base_tool import BaseTool, register_tool
+from tools.base_tool import BaseTool, register_tool
 
 def _heuristic_score(features: Dict[str, Any]) -> float:
     msg_len = min(int(features.get("msg_len", 0)), 500) / 500.0
@@ -1,14 +1,15 @@
 import sqlite3
 from typing import Any, Dict
-from base_tool import Tool
-from sales_rag_tool import _score_text
+from tools.base_tool import BaseTool
+from tools.sales_rag_tool import _score_text
+from config.metrics import TracedConnection
 
-class PolicyRAGTool(Tool):
+class PolicyRAGTool(BaseTool):
     name = "policy_rag_tool"
     def __init__(self, db_path: str):
         self.db_path = db_path
     def _conn(self):
-        return sqlite3.connect(self.db_path)
+        return sqlite3.connect(self.db_path, factory=TracedConnection)
     def run(self, payload: Dict[str, Any]) -> Dict[str, Any]:
         q = (payload.get("query") or "").strip()
         k = int(payload.get("k", 3))
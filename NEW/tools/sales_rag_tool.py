@@ -1,6 +1,7 @@
 ﻿import sqlite3
 from typing import Any, Dict
-from base_tool import BaseTool, register_tool
+from tools.base_tool import BaseTool, register_tool
+from config.metrics import TracedConnection
 
 def _score_text(text: str, query: str) -> int:
     text_low = (text or "").lower()
@@ -14,7 +15,7 @@ class SalesRAGTool(BaseTool):
     def __init__(self, db_path: str):
         self.db_path = db_path
     def _conn(self):
-        return sqlite3.connect(self.db_path)
+        return sqlite3.connect(self.db_path, factory=TracedConnection)
     def run(self, payload: Dict[str, Any]) -> Dict[str, Any]:
         q = (payload.get("query") or "").strip()
         k = int(payload.get("k", 3))
@@ -0,0 +1,215 @@
+import os
+import re
+import sqlite3
+import threading
+import time
+from typing import Dict, List, Optional, Set
+
+_WORD = re.compile(r"[a-z0-9]+")
+_STOP = {"the", "a", "an", "of", "for", "by", "in", "on", "and", "or", "to", "with", "what", "which",
+         "how", "many", "much", "show", "list", "me", "all", "is", "are", "do", "we", "have", "id"}
+
+SAMPLE_VALUES = 3
+SAMPLE_WIDTH = 24
+# Text columns with more distinct values than this are free text, not worth sampling
+MAX_CATEGORIES = 20
+# Columns that hold identifiers or personal data are never sampled into prompts
+_SENSITIVE_COLUMN = re.compile(
+    r"(^|_)(id|uuid|guid|no|num|number|code|sku|ref|username|login|email|mail|phone|mobile|fax|name|first|last|address|street|city|zip|"
+    r"postcode|password|passwd|hash|token|secret|key|ssn|iban|card|account|ip|notes?|comment|description)(_|$)",
+    re.I)
+_SENSITIVE_VALUE = re.compile(r"@|\d{6,}|^[0-9a-f-]{16,}$", re.I)
+
+# Business words that never appear in identifiers, mapped to the stems that do
+_SYNONYMS = {
+    "revenue": {"amount", "total", "price"},
+    "sale": {"order"},
+    "sold": {"order", "qty", "quantity"},
+    "overdue": {"due", "status"},
+    "unpaid": {"status", "invoice"},
+    "client": {"customer"},
+    "buyer": {"customer"},
+    "item": {"product"},
+    "inventory": {"stock", "quantity"},
+    "employee": {"user"},
+}
+
+
+def _stems(text: str) -> Set[str]:
+    """Lowercase word stems (identifiers split on '_', light plural strip), minus stop words."""
+    out = set()
+    for w in _WORD.findall((text or "").lower().replace("_", " ")):
+        if len(w) > 3 and w.endswith("ies"):
+            w = w[:-3] + "y"
+        elif len(w) > 3 and w.endswith("s") and not w.endswith("ss"):
+            w = w[:-1]
+        if w not in _STOP:
+            out.add(w)
+    return out
+
+
+def _question_stems(text: str) -> Set[str]:
+    words = _stems(text)
+    for w in list(words):
+        words |= _SYNONYMS.get(w, set())
+    return words
+
+
+def _is_text(ctype: str) -> bool:
+    return not ctype or any(k in ctype for k in ("CHAR", "TEXT", "CLOB"))
+
+
+def _samplable(col: str, ctype: str) -> bool:
+    """Only categorical text columns: no identifiers, contact details, credentials or free notes."""
+    return _is_text(ctype) and not _SENSITIVE_COLUMN.search(col)
+
+
+class _Table:
+    __slots__ = ("name", "columns", "pk", "fks", "samples", "name_stems", "column_stems", "value_stems")
+
+    def __init__(self, name):
+        self.name = name
+        self.columns = []      # (name, type)
+        self.pk = set()
+        self.fks = {}          # column -> referenced table
+        self.samples = {}      # column -> [value, ...]
+        self.name_stems = _stems(name)
+        self.column_stems = set()
+        self.value_stems = set()
+
+
+class SchemaDigest:
+    """
+    Compact, question-specific schema text for text-to-SQL prompts.
+
+    The database is introspected once (tables, column types, keys, foreign
+    keys and a few distinct sample values per text column) and cached. The
+    snapshot is refreshed when the file has changed and is older than `ttl`
+    seconds. `digest(question)` keeps only the tables whose name, columns or
+    sample values match the question, plus the tables they join to.
+    """
+
+    def __init__(self, db_path: str, ttl: float = 300.0):
+        self.db_path = db_path
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._tables: Dict[str, _Table] = {}
+        self._loaded_at = 0.0
+        self._mtime = None
+
+    def _introspect(self) -> Dict[str, _Table]:
+        tables = {}
+        con = sqlite3.connect(f"file:{self.db_path}?mode=ro", uri=True)
+        try:
+            names = [r[0] for r in con.execute(
+                "SELECT name FROM sqlite_master WHERE type='table' AND name NOT LIKE 'sqlite_%' ORDER BY name")]
+            for name in names:
+                t = _Table(name)
+                for _, col, ctype, _, _, pk in con.execute(f'PRAGMA table_info("{name}")'):
+                    t.columns.append((col, (ctype or "").upper()))
+                    t.column_stems |= _stems(col)
+                    if pk:
+                        t.pk.add(col)
+                for row in con.execute(f'PRAGMA foreign_key_list("{name}")'):
+                    t.fks[row[3]] = row[2]
+                for col, ctype in t.columns:
+                    if col in t.pk or col in t.fks or not _samplable(col, ctype):
+                        continue
+                    distinct = con.execute(
+                        f'SELECT COUNT(*) FROM (SELECT DISTINCT "{col}" FROM "{name}" LIMIT ?)',
+                        (MAX_CATEGORIES + 1,)).fetchone()[0]
+                    if distinct > MAX_CATEGORIES:
+                        continue
+                    values = [str(r[0])[:SAMPLE_WIDTH] for r in con.execute(
+                        f'SELECT DISTINCT "{col}" FROM "{name}" WHERE "{col}" IS NOT NULL LIMIT ?',
+                        (SAMPLE_VALUES,))]
+                    if values and not any(_SENSITIVE_VALUE.search(v) for v in values):
+                        t.samples[col] = values
+                        for v in values:
+                            t.value_stems |= _stems(v)
+                tables[name] = t
+        finally:
+            con.close()
+        return tables
+
+    def tables(self) -> Dict[str, _Table]:
+        now = time.time()
+        with self._lock:
+            if self._tables and now - self._loaded_at < self.ttl:
+                return self._tables
+            try:
+                mtime = os.path.getmtime(self.db_path)
+            except OSError:
+                return self._tables
+            if not self._tables or mtime != self._mtime:
+                self._tables = self._introspect()
+                self._mtime = mtime
+            self._loaded_at = now
+            return self._tables
+
+    def relevant_tables(self, question: str, max_tables: int = 4) -> List[str]:
+        """Tables ranked by match against the question, plus their foreign-key neighbours."""
+        tables = self.tables()
+        words = _question_stems(question)
+        scored = []
+        for t in tables.values():
+            score = 3 * len(words & t.name_stems) + len(words & t.column_stems) + len(words & t.value_stems)
+            if score:
+                scored.append((score, t.name))
+        if not scored:
+            return list(tables)[:max_tables]
+        picked = [name for _, name in sorted(scored, key=lambda s: (-s[0], s[1]))][:max_tables]
+        # Pull in join targets so multi-table questions get their keys
+        for name in list(picked):
+            for ref in tables[name].fks.values():
+                if ref in tables and ref not in picked and len(picked) < max_tables + 2:
+                    picked.append(ref)
+        return picked
+
+    def describe(self, name: str) -> str:
+        t = self.tables()[name]
+        cols = []
+        for col, ctype in t.columns:
+            text = f"{col} {ctype or 'TEXT'}"
+            if col in t.pk:
+                text += " PK"
+            if col in t.fks:
+                text += f" -> {t.fks[col]}"
+            if col in t.samples:
+                text += " e.g. " + ", ".join(repr(v) for v in t.samples[col])
+            cols.append(text)
+        return f"{name}({'; '.join(cols)})"
+
+    def digest(self, question: str, max_tables: int = 4) -> str:
+        """Schema lines for the tables relevant to `question`."""
+        return "\n".join(self.describe(name) for name in self.relevant_tables(question, max_tables))
+
+
+_digests: Dict[str, SchemaDigest] = {}
+_digests_lock = threading.Lock()
+
+
+def get_schema_digest(db_path: str) -> SchemaDigest:
+    """Return the process-wide digest for a database file."""
+    key = os.path.abspath(db_path)
+    with _digests_lock:
+        digest = _digests.get(key)
+        if digest is None:
+            digest = _digests[key] = SchemaDigest(key)
+        return digest
+
+
+def build_sql_context(question: str, db_path: Optional[str] = None, max_tables: int = 4) -> str:
+    """Prompt block describing only the schema a question needs."""
+    if db_path is None:
+        from config.database import DB_PATH
+        db_path = str(DB_PATH)
+    try:
+        schema = get_schema_digest(db_path).digest(question, max_tables)
+    except sqlite3.Error as e:
+        print(f"Schema digest error: {e}")
+        return ""
+    if not schema:
+        # Missing or empty database: no header, so the prompt does not claim a schema
+        return ""
+    return f"SQLite tables relevant to this question (column TYPE, PK, -> foreign key, e.g. sample values):\n{schema}"
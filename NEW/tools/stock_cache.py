@@ -0,0 +1,136 @@
+import json
+import os
+import sqlite3
+import threading
+from array import array
+from typing import Any, Dict, Optional
+from tools.base_tool import BaseTool
+from config.metrics import TracedConnection
+
+# Marks a (product, warehouse) slot that has no stock row.
+_NO_ROW = -(2 ** 63)
+
+
+class StockLevelCache:
+    """
+    In-process snapshot of the stock table: product_id -> quantity per warehouse.
+
+    Quantities are kept in one array('q') per warehouse, indexed through a
+    shared product_id -> slot map, so a lookup is a dict hit plus an array read.
+    The snapshot is loaded on first use. Writers keep it current with set_qty();
+    writers that cannot tell exactly what changed call invalidate().
+    """
+
+    def __init__(self, db_path: str):
+        self.db_path = db_path
+        self._lock = threading.RLock()
+        self._loaded = False
+        self._dirty = set()
+        self._slots: Dict[int, int] = {}
+        self._columns: Dict[str, array] = {}
+
+    def _conn(self):
+        return sqlite3.connect(self.db_path, factory=TracedConnection)
+
+    def load(self):
+        """(Re)load the full snapshot from the database."""
+        with self._lock, self._conn() as con:
+            rows = con.execute("SELECT product_id, warehouse_location, quantity FROM stock").fetchall()
+            self._slots, self._columns = {}, {}
+            for product_id, warehouse, qty in rows:
+                self._store(int(product_id), warehouse, int(qty))
+            self._dirty.clear()
+            self._loaded = True
+
+    def _store(self, product_id: int, warehouse: str, qty: int):
+        slot = self._slots.get(product_id)
+        if slot is None:
+            slot = self._slots[product_id] = len(self._slots)
+            for column in self._columns.values():
+                column.append(_NO_ROW)
+        column = self._columns.get(warehouse)
+        if column is None:
+            column = self._columns[warehouse] = array("q", [_NO_ROW]) * len(self._slots)
+        column[slot] = qty
+
+    def _refresh_product(self, product_id: int):
+        with self._conn() as con:
+            rows = con.execute(
+                "SELECT warehouse_location, quantity FROM stock WHERE product_id = ?", (product_id,)
+            ).fetchall()
+        slot = self._slots.get(product_id)
+        if slot is not None:
+            for column in self._columns.values():
+                column[slot] = _NO_ROW
+        for warehouse, qty in rows:
+            self._store(product_id, warehouse, int(qty))
+        self._dirty.discard(product_id)
+
+    def get(self, product_id: int, warehouse: Optional[str] = None) -> Dict[str, int]:
+        """Return {warehouse: quantity} for a product, optionally for one warehouse."""
+        product_id = int(product_id)
+        with self._lock:
+            if not self._loaded:
+                self.load()
+            elif product_id in self._dirty:
+                self._refresh_product(product_id)
+            slot = self._slots.get(product_id)
+            if slot is None:
+                return {}
+            columns = self._columns.items() if warehouse is None else [(warehouse, self._columns.get(warehouse))]
+            return {wh: col[slot] for wh, col in columns if col is not None and col[slot] != _NO_ROW}
+
+    def set_qty(self, product_id: int, warehouse: str, qty: int):
+        """Write-through hook: record the committed quantity of a stock row."""
+        with self._lock:
+            if self._loaded:
+                self._store(int(product_id), warehouse, int(qty))
+
+    def invalidate(self, product_id: Optional[int] = None):
+        """Drop one product (reloaded on next read) or the whole snapshot."""
+        with self._lock:
+            if product_id is None:
+                self._loaded = False
+            elif self._loaded:
+                self._dirty.add(int(product_id))
+
+
+_caches: Dict[str, StockLevelCache] = {}
+_caches_lock = threading.Lock()
+
+
+def get_stock_cache(db_path: str) -> StockLevelCache:
+    """Return the process-wide cache for a database file."""
+    key = os.path.abspath(db_path)
+    with _caches_lock:
+        cache = _caches.get(key)
+        if cache is None:
+            cache = _caches[key] = StockLevelCache(key)
+        return cache
+
+
+class StockLevelTool(BaseTool):
+    name = "stock_level_lookup"
+    description = "Fast stock level lookup for a product (optionally one warehouse), served from memory."
+
+    def __init__(self, db_path: str):
+        self.cache = get_stock_cache(db_path)
+
+    def run(self, payload) -> Dict[str, Any]:
+        if isinstance(payload, str):
+            # Agents pass text: a bare product id or a JSON object
+            text = payload.strip()
+            try:
+                payload = {"product_id": int(text)} if text.isdigit() else json.loads(text)
+            except ValueError as e:
+                return {"ok": False, "error": f"Input must be a product id or a JSON object: {e}"}
+        if not isinstance(payload, dict) or "product_id" not in payload:
+            return {"ok": False, "error": "Missing 'product_id'"}
+        try:
+            levels = self.cache.get(payload["product_id"], payload.get("warehouse"))
+        except Exception as e:
+            return {"ok": False, "error": str(e)}
+        if not levels:
+            return {"ok": False, "error": "No stock rows for product"}
+        return {"ok": True, "product_id": int(payload["product_id"]), "levels": levels,
+                "total": sum(levels.values())}